@@ -1,396 +1,321 @@
-#!/usr/bin/env python
-from __future__ import print_function
-import sys
+#!/usr/bin/env python3
+"""
+Fetches the stops, schedule stop pairs and routes of the transit.land feeds for every local level
+tile which one of the feeds covers, and writes them as one minified JSON file per tile to the
+mjolnir.transit_dir of the config.
+
+The tiles are fetched concurrently, every thread keeps its connections open. Finished tiles are
+logged in the transit_dir together with the keys handed out for the onestop ids, trips and blocks,
+so that a rerun resumes where the last one stopped with the same keys.
+"""
+import argparse
 import json
-import urllib2
 import math
 import os
-import shutil
-import getopt
+import sys
+import threading
 import time
-from datetime import datetime,date
-from collections import defaultdict
-
-
-#globals for valhalla tiles
-minx_ = -180
-miny_ = -90
-maxx_ = 180
-maxy_ = 90
-
-tilesize_ = .25
-ncolumns_ = int(math.ceil((maxx_ - minx_) / tilesize_))
-nrows_ = int(math.ceil((maxy_ - miny_) / tilesize_))
-max_tile_id_ = ((ncolumns_ * nrows_) - 1)
-level_ = 2
-output_transit_dir_ = '.'
-
-class json_resource_t:
-  #constructor
-  def __init__(self, url):
-    self.url = url
-    try:
-      #open a readable object at that url
-      response = urllib2.urlopen(url)
-    except Exception as e:
-      print('Could not fetch %s' % url, file=sys.stderr)
-      raise e
-
-    try:
-      #turn the json into a python dict
-      self.kv = json.load(response)
-    except Exception as e:
-      print('Could not parse response from %s as json' % url, file=sys.stderr)
-      raise e
-
-  #put the json to file
-  def write(self, file_name, pretty=False):
-    with open(file_name, 'w') as f:
-      #pretty print
-      if pretty:
-        json.dump(self.kv, f, indent=2, sort_keys=True)
-      #minified
-      else:
-        json.dump(self.kv, f, separators=(',',':'))
-
-class Tile(object):
-
-  def __init__(self, min_x, min_y, max_x, max_y):
-     self.minx = min_x
-     self.miny = min_y
-     self.maxx = max_x
-     self.maxy = max_y
-
-#The bounding boxes do NOT intersect if the other bounding box is
-#entirely LEFT, BELOW, RIGHT, or ABOVE bounding box.
-  def intersects(self,minx, miny, maxx, maxy):
-     if ((minx < self.minx and maxx < self.minx) or
-         (miny < self.miny and maxy < self.miny) or
-         (minx > self.maxx and maxx > self.maxx) or
-         (miny > self.maxy and maxy > self.maxy)):
-            return False
-     return True
-
-  def digits(self, number):
-     digits = 1 if (number < 0) else 0
-     while (long(number)):
-        number /= 10
-        digits += 1
-     return int(digits)
-
-  def file(self, row, col, max_tile_id):
-
-     #get the tile id 
-     tile_id = (row * ncolumns_) + col
-
-     max_length = self.digits(max_tile_id)
-
-     remainder = max_length % 3
-     if(remainder):
-        max_length += 3 - remainder
-
-     #if it starts with a zero the pow trick doesn't work
-     if(level_ == 0):
-        file_suffix = "0"
-        file_suffix += '{:,}'.format(level_ * int(pow(10, max_length)) + tile_id).replace(',', '/')
-        file_suffix += ".json"
-        return file_suffix
-
-     #it was something else
-     file_suffix = '{:,}'.format(level_ * int(pow(10, max_length)) + tile_id).replace(',', '/')
-     file_suffix += ".json"
-
-     file = output_transit_dir_ + '/' + file_suffix
-
-     directory = os.path.dirname(file)
-     if not os.path.exists(directory):
-        os.makedirs(directory)
-
-     return file
-
-def check_args(argv):
-   global level_
-   global tilesize_
-   global output_transit_dir_
-   
-   configfile = ''
-   try:
-      opts, args = getopt.getopt(argv,"hc:",["cfile="])
-   except getopt.GetoptError:
-      print('tiles.py -c <config file: valhalla.json>')
-      sys.exit(2)
-   for opt, arg in opts:
-      if opt == '-h':
-         print('tiles.py -c <config file: valhalla.json>')
-         sys.exit()
-      elif opt in ("-c", "--cfile"):
-         configfile = arg
-
-   if not os.path.isfile(configfile):
-      print('Config file not found.')
-      print('tiles.py -c <config file: valhalla.json>')
-      sys.exit()
-
-   with open(configfile) as config_file:    
-      valhalla_config = json.load(config_file)
-
-      for level in valhalla_config['mjolnir']['hierarchy']['levels']:
-         if 'name' in level.keys():
-            if (level['name'] == 'local'):
-               if 'level' in level.keys():
-                  level_ = level['level']
-               else: 
-                  print('Using default level.')
-               if 'size' in level.keys():
-                  tilesize_ = level['size']
-               else:
-                  print('Using default size.')
-
-      output_transit_dir_ = valhalla_config['mjolnir']['transit_dir']
-
-   print('Level: ' + str(level_))
-   print('Size: ' + str(tilesize_))
-   print('Output transit directory: ' + output_transit_dir_)
-
-#this is the entry point to the program
-if __name__ == "__main__":
-
-   now = time.strftime("%c")
-   print ("Start time: %s" % now )
-  
-   check_args(sys.argv[1:])
-
-   directory = output_transit_dir_ + "/" + str(level_)
-   shutil.rmtree(directory, ignore_errors=True)
-
-   current_date = datetime.now()
-
-   bb_list = []
-
-#The following will obtain all the transit bounding boxes(BBs) from transit land.
-#If you only want to download your market, comment out the code 
-#from the begin to the end transitland BBs download sections.  
-#Next, add your BB to the list in the custom BB section.  A
-#San Francisco BB is shown as an example.  
-
-#<begin transitland BBs download>
-   tl_bb_url = 'http://dev.transit.land/api/v1/feeds.geojson'
-   tl_bbs = json_resource_t(tl_bb_url)
-
-   for features in tl_bbs.kv.get('features', []):
-      coords = features['geometry']['coordinates'][0]
-      # following for debugging.
-      #for index in range(len(coords)-1):
-      #   print(coords[index][0])
-      #   print(coords[index][1])
-      minx = coords[0][0]
-      miny = coords[0][1]
-
-      maxx = coords[2][0]
-      maxy = coords[2][1]
-
-      bb_list.append(Tile(minx,miny,maxx,maxy))
-#<end transitland BBs download>
-
-#custom BB 
-#   minx = -123.0977
-#   miny = 36.9005
-#   maxx = -121.2520
-#   maxy = 38.2576
-#bb_list.append(Tile(minx,miny,maxx,maxy))
-
-# add your api key here.
-   api_key = '<your key>'
-
-#used to generate unique keys for onestop IDs
-   onestop_key = 1
-   onestops = dict()
-
-   trip_key = 1
-   trips = dict()
-
-   block_key = 1
-   blocks = dict()
-
-   for row in xrange(0, nrows_):
-      for col in xrange(0, ncolumns_):
-         
-         #tile for world BB
-         min_x = minx_ + (col * tilesize_)
-         min_y = miny_ + (row * tilesize_)
-  	 max_x = min_x + tilesize_
-         max_y = min_y + tilesize_
-                
-         tile = Tile(min_x,min_y,max_x,max_y)
-         #After we get the BBs from transitland we will check if any of the BBs
-         #intersect this tile
-
-         for tl_bb in bb_list:
-
-            if tile.intersects(tl_bb.minx,tl_bb.miny,tl_bb.maxx,tl_bb.maxy): 
-            
-               dictionary = defaultdict(list)
-               file = tile.file( row, col, max_tile_id_)
-
-               url = 'http://dev.transit.land/api/v1/stops?per_page=1000&bbox='
-               url += str(min_x) + ',' + str(min_y) + ',' + str(max_x) + ',' + str(max_y)
-               url += '&api_key='
-               url += api_key
-               while url:
-               
-                  tl_stops = json_resource_t(url)
-                  meta = tl_stops.kv.get('meta', [])
-
-                  for tl_s in tl_stops.kv.get('stops', []):
-                     map(tl_s.pop, ['identifiers','imported_from_feed_onestop_ids','created_or_updated_in_changeset_id','created_at','updated_at','operators_serving_stop','routes_serving_stop'])
-                     onestop_id = tl_s['onestop_id']
-                     if onestop_id not in onestops:
-                        onestops[onestop_id] = onestop_key
-                        onestop_key = onestop_key + 1
-                     tl_s['key'] = onestops[onestop_id]
-                  
-                     dictionary['stops'].append(tl_s)
-
-                  if not dictionary:
-                     break
-
-                  print(url)
-                  dictionary['stops_url'].append(url)
-
-                  if 'next' in meta.keys():
-                     url = meta['next']
-                     url += '&api_key='
-                     url += api_key
-                  else:
-                     url = ""
-
-               if not dictionary:
-                  continue
-
-               stop_pairs = defaultdict(list)
-
-               url = 'http://dev.transit.land/api/v1/schedule_stop_pairs?per_page=1000&bbox='
-               url += str(min_x) + ',' + str(min_y) + ',' + str(max_x) + ',' + str(max_y)
-               url += '&api_key='
-               url += api_key
-
-               while url:
-                  print(url) 
-
-                  tl_stop_pairs = json_resource_t(url)
-                  meta = tl_stop_pairs.kv.get('meta', [])
-
-                  dictionary['schedule_stop_pairs_url'].append(url)
-
-                  for tl_s_p in tl_stop_pairs.kv.get('schedule_stop_pairs', []):
-                     map(tl_s_p.pop, ['origin_timezone','destination_timezone','pickup_type','drop_off_type', 'shape_dist_traveled','origin_arrival_time','destination_departure_time','window_start','window_end','origin_timepoint_source','destination_timepoint_source','created_at','updated_at'])
-
-                     end_date = datetime.strptime(tl_s_p['service_end_date'],"%Y-%m-%d").date()
-                     
-                     if current_date.date() <= end_date:
-
-                        onestop_id = tl_s_p['origin_onestop_id']
-                        if onestop_id not in onestops:
-                           onestops[onestop_id] = onestop_key
-                           onestop_key = onestop_key + 1
-                        tl_s_p['origin_key'] = onestops[onestop_id]
-                
-                        onestop_id = tl_s_p['destination_onestop_id']
-                        if onestop_id not in onestops:
-                           onestops[onestop_id] = onestop_key
-                           onestop_key = onestop_key + 1
-                        tl_s_p['destination_key'] = onestops[onestop_id] 
-                  
-                        onestop_id = tl_s_p['route_onestop_id']
-                        if onestop_id not in onestops:
-                           onestops[onestop_id] = onestop_key
-                           onestop_key = onestop_key + 1
-                        tl_s_p['route_key'] = onestops[onestop_id]
-                  
-                        block_id = tl_s_p['block_id']
-                        if block_id is not None:
-                           block = block_id + tl_s_p['route_onestop_id']
-                           if block not in blocks:
-                              blocks[block] = block_key
-                              block_key = block_key + 1
-                           tl_s_p['block_key'] = blocks[block]			
-
-                        trip = tl_s_p['trip']
-                        if trip not in trips:
-                           trips[trip] = trip_key
-                           trip_key = trip_key + 1
-                        tl_s_p['trip_key'] = trips[trip]
-
-                        stop_pairs['schedule_stop_pairs'].append(tl_s_p)
-
-                  #should never happen.  Stops exist, but stop_pairs do not.
-                  if not stop_pairs:
-                     break;
-
-                  if 'next' in meta.keys():
-                     url = meta['next']
-                     url += '&api_key='
-                     url += api_key
-                  else:
-                     url = ""
-
-               if not stop_pairs:
-                  print('Stops exist, but stop_pairs do not!')
-
-               dictionary.update(stop_pairs)
-
-               routes = defaultdict(list)
-
-               url = 'http://dev.transit.land/api/v1/routes?per_page=1000&bbox='
-               url += str(min_x) + ',' + str(min_y) + ',' + str(max_x) + ',' + str(max_y) 
-               url += '&api_key='
-               url += api_key
-#hack due to BB issue
-#            if (min_x == -121.75 and min_y == 37.0 and max_x == -121.5 and max_y == 37.25):
-#               url = 'http://dev.transit.land/api/v1/routes?per_page=1000'
-
-               while url:
-                  print(url)
-
-                  tl_routes = json_resource_t(url)
-                  meta = tl_routes.kv.get('meta', [])
-
-                  routes['route_url'].append(url)
-
-                  for tl_r in tl_routes.kv.get('routes', []):
-                     map(tl_r.pop, ['identifiers','imported_from_feed_onestop_ids','created_or_updated_in_changeset_id','geometry','created_at','updated_at'])
-
-                     onestop_id = tl_r['onestop_id']
-                     if onestop_id not in onestops:
-                        onestops[onestop_id] = onestop_key
-                        onestop_key = onestop_key + 1
-                     tl_r['key'] = onestops[onestop_id]
-
-                     routes['routes'].append(tl_r)
-
-                  #should never happen.  Stops and stop_pairs exist, but routes do not.
-                  if not routes:
-                     break;
-
-                  if 'next' in meta.keys():
-                     url = meta['next']
-                     url += '&api_key='
-                     url += api_key
-                  else:
-                     url = ""
-
-               if not routes:
-                  raise ValueError('Stops and stop_pairs exist, but routes do not!')
-
-               dictionary.update(routes)
-
-               with open(file, 'w') as f:
-                  json.dump(dictionary, f, indent=2, sort_keys=True)
-               
-               #break ensures that we don't download data for a tile more than once.
-               #a valhalla tile can intersect multiple markets. 
-               break 
-               
-   now = time.strftime("%c")   
-   print("End time: %s" % now )
-
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime
+from http.client import HTTPConnection, HTTPException, HTTPSConnection
+from typing import Iterator, List, Optional, Sequence, Tuple
+from urllib.parse import urlencode, urlsplit
+
+# the world the tiles cover
+MIN_X, MIN_Y, MAX_X, MAX_Y = -180, -90, 180, 90
+
+DONE_LOG = 'transit_tiles.done'
+KEYS_LOG = 'transit_tiles.keys'
+
+STOP_FIELDS = ('identifiers', 'imported_from_feed_onestop_ids', 'created_or_updated_in_changeset_id', 'created_at', 'updated_at', 'operators_serving_stop', 'routes_serving_stop')
+STOP_PAIR_FIELDS = ('origin_timezone', 'destination_timezone', 'pickup_type', 'drop_off_type', 'shape_dist_traveled', 'origin_arrival_time', 'destination_departure_time', 'window_start', 'window_end', 'origin_timepoint_source', 'destination_timepoint_source', 'created_at', 'updated_at')
+ROUTE_FIELDS = ('identifiers', 'imported_from_feed_onestop_ids', 'created_or_updated_in_changeset_id', 'geometry', 'created_at', 'updated_at')
+
+
+class Tiles:
+    """The tiles of a level, squares of tile_size degrees numbered row by row from the south west."""
+
+    def __init__(self, level: int, tile_size: float):
+        self.level = level
+        self.tile_size = tile_size
+        self.ncolumns = int(math.ceil((MAX_X - MIN_X) / tile_size))
+        self.nrows = int(math.ceil((MAX_Y - MIN_Y) / tile_size))
+        self.max_tile_id = self.ncolumns * self.nrows - 1
+
+    def row(self, y: float) -> int:
+        return min(int((min(max(y, MIN_Y), MAX_Y) - MIN_Y) / self.tile_size), self.nrows - 1)
+
+    def col(self, x: float) -> int:
+        return min(int((min(max(x, MIN_X), MAX_X) - MIN_X) / self.tile_size), self.ncolumns - 1)
+
+    def covering(self, bbox: Sequence[float]) -> Iterator[int]:
+        """The ids of the tiles intersecting bbox (min_x, min_y, max_x, max_y)."""
+        min_col, max_col = self.col(bbox[0]), self.col(bbox[2])
+        for row in range(self.row(bbox[1]), self.row(bbox[3]) + 1):
+            yield from range(row * self.ncolumns + min_col, row * self.ncolumns + max_col + 1)
+
+    def bbox(self, tile_id: int) -> Tuple[float, float, float, float]:
+        row, col = divmod(tile_id, self.ncolumns)
+        min_x, min_y = MIN_X + col * self.tile_size, MIN_Y + row * self.tile_size
+        return min_x, min_y, min_x + self.tile_size, min_y + self.tile_size
+
+    def file(self, tile_id: int) -> str:
+        """The path of the tile relative to the transit_dir, e.g. 2/000/818/660.json"""
+        digits = len(str(self.max_tile_id))
+        digits += -digits % 3
+        padded = str(tile_id).zfill(digits)
+        return os.path.join(str(self.level), *[padded[i:i + 3] for i in range(0, digits, 3)]) + '.json'
+
+
+class Client:
+    """GETs JSON, every thread keeps one connection per host open and reuses it."""
+
+    def __init__(self, api_key: str = '', timeout: float = 60, retries: int = 3):
+        self.api_key = api_key
+        self.timeout = timeout
+        self.retries = retries
+        self.local = threading.local()
+
+    def get(self, url: str) -> dict:
+        parts = urlsplit(url)
+        path = parts.path + ('?' + parts.query if parts.query else '')
+        for attempt in range(self.retries + 1):
+            connection = self._connection(parts.scheme, parts.netloc)
+            try:
+                connection.request('GET', path, headers={'Accept': 'application/json'})
+                response = connection.getresponse()
+                body = response.read()
+                if response.status < 500:
+                    break
+                error = HTTPException('{} {}'.format(response.status, response.reason))
+            except (OSError, HTTPException) as e:
+                error = e
+            # a connection the server closed or which broke is opened anew
+            connection.close()
+            self.local.connections.pop((parts.scheme, parts.netloc), None)
+            if attempt == self.retries:
+                raise RuntimeError('Could not fetch {}: {}'.format(url, error))
+            time.sleep(2 ** attempt)
+
+        if response.status != 200:
+            raise RuntimeError('Could not fetch {}: {} {}'.format(url, response.status, response.reason))
+        try:
+            return json.loads(body)
+        except ValueError as e:
+            raise RuntimeError('Could not parse response from {} as json: {}'.format(url, e))
+
+    def pages(self, url: str) -> Iterator[Tuple[str, dict]]:
+        """Follows the meta.next links of a paginated endpoint."""
+        while url:
+            url = self._with_key(url)
+            page = self.get(url)
+            yield url, page
+            url = page.get('meta', {}).get('next')
+
+    def _with_key(self, url: str) -> str:
+        if not self.api_key or 'api_key=' in url:
+            return url
+        return url + ('&' if '?' in url else '?') + urlencode({'api_key': self.api_key})
+
+    def _connection(self, scheme: str, netloc: str):
+        if not hasattr(self.local, 'connections'):
+            self.local.connections = dict()
+        connection = self.local.connections.get((scheme, netloc))
+        if connection is None:
+            factory = HTTPSConnection if scheme == 'https' else HTTPConnection
+            connection = factory(netloc, timeout=self.timeout)
+            self.local.connections[(scheme, netloc)] = connection
+        return connection
+
+
+class Keys:
+    """Hands out the same integer key for the same onestop id, trip or block across threads and runs."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self.keys = {'onestop': dict(), 'trip': dict(), 'block': dict()}
+        self.pending = []
+        for line in _complete_lines(path):
+            fields = line.split('\t')
+            if len(fields) == 3 and fields[2].isdigit():
+                self.keys[fields[0]][fields[1]] = int(fields[2])
+
+    def __call__(self, kind: str, name: str) -> int:
+        with self.lock:
+            keys = self.keys[kind]
+            key = keys.get(name)
+            if key is None:
+                key = keys[name] = len(keys) + 1
+                self.pending.append('{}\t{}\t{}\n'.format(kind, name, key))
+            return key
+
+    def flush(self):
+        with self.lock:
+            if self.pending:
+                with open(self.path, 'a') as f:
+                    f.writelines(self.pending)
+                self.pending = []
+
+
+def _complete_lines(path: str) -> List[str]:
+    """
+    The lines of a log which end in a newline. A line cut short by a crash is dropped, the tile
+    it was written for wasn't finished, and cut off the log so that the next line starts on its own.
+    """
+    if not os.path.exists(path):
+        return []
+    with open(path, 'rb+') as f:
+        data = f.read()
+        complete = data.rfind(b'\n') + 1
+        if complete < len(data):
+            f.truncate(complete)
+    return data[:complete].decode().splitlines()
+
+
+def feed_bboxes(client: Client, url: str) -> List[Tuple[float, float, float, float]]:
+    """The bboxes of all feeds at url."""
+    bboxes = []
+    for feature in client.get(url).get('features', []):
+        coords = feature['geometry']['coordinates'][0]
+        xs, ys = [c[0] for c in coords], [c[1] for c in coords]
+        bboxes.append((min(xs), min(ys), max(xs), max(ys)))
+    return bboxes
+
+
+def fetch_tile(client: Client, keys: Keys, api: str, bbox: Sequence[float], per_page: int, today: date) -> Optional[dict]:
+    """The stops, schedule stop pairs and routes in bbox, None if there are no stops."""
+    query = urlencode({'per_page': per_page, 'bbox': ','.join(str(c) for c in bbox)})
+    tile = {'stops': [], 'stops_url': [], 'schedule_stop_pairs': [], 'schedule_stop_pairs_url': [], 'routes': [], 'route_url': []}
+
+    for url, page in client.pages('{}/stops?{}'.format(api, query)):
+        tile['stops_url'].append(url)
+        for stop in page.get('stops', []):
+            _drop(stop, STOP_FIELDS)
+            stop['key'] = keys('onestop', stop['onestop_id'])
+            tile['stops'].append(stop)
+    if not tile['stops']:
+        return None
+
+    for url, page in client.pages('{}/schedule_stop_pairs?{}'.format(api, query)):
+        tile['schedule_stop_pairs_url'].append(url)
+        for pair in page.get('schedule_stop_pairs', []):
+            if datetime.strptime(pair['service_end_date'], '%Y-%m-%d').date() < today:
+                continue
+            _drop(pair, STOP_PAIR_FIELDS)
+            pair['origin_key'] = keys('onestop', pair['origin_onestop_id'])
+            pair['destination_key'] = keys('onestop', pair['destination_onestop_id'])
+            pair['route_key'] = keys('onestop', pair['route_onestop_id'])
+            if pair.get('block_id') is not None:
+                pair['block_key'] = keys('block', pair['block_id'] + pair['route_onestop_id'])
+            pair['trip_key'] = keys('trip', pair['trip'])
+            tile['schedule_stop_pairs'].append(pair)
+    if not tile['schedule_stop_pairs']:
+        print('Stops exist, but stop_pairs do not in {}'.format(bbox), file=sys.stderr)
+
+    for url, page in client.pages('{}/routes?{}'.format(api, query)):
+        tile['route_url'].append(url)
+        for route in page.get('routes', []):
+            _drop(route, ROUTE_FIELDS)
+            route['key'] = keys('onestop', route['onestop_id'])
+            tile['routes'].append(route)
+    if not tile['routes']:
+        print('Stops and stop_pairs exist, but routes do not in {}'.format(bbox), file=sys.stderr)
+
+    return tile
+
+
+def _drop(item: dict, fields: Sequence[str]):
+    for field in fields:
+        item.pop(field, None)
+
+
+def fetch(transit_dir: str, tiles: Tiles, bboxes: Sequence[Sequence[float]], client: Client, api: str, per_page: int = 1000, workers: int = 16, today: date = None) -> int:
+    """
+    Fetches all tiles intersecting bboxes to transit_dir, skipping the ones a previous run finished.
+    Returns the number of tiles written.
+    """
+    today = today or date.today()
+    os.makedirs(transit_dir, exist_ok=True)
+    keys = Keys(os.path.join(transit_dir, KEYS_LOG))
+
+    done_path = os.path.join(transit_dir, DONE_LOG)
+    done = {int(line) for line in _complete_lines(done_path) if line.isdigit()}
+
+    # every feed only looks at the tiles it covers instead of every tile at every feed
+    todo = sorted(set(tile_id for bbox in bboxes for tile_id in tiles.covering(bbox)) - done)
+
+    written = 0
+    done_lock = threading.Lock()
+    with open(done_path, 'a') as done_log, ThreadPoolExecutor(workers) as executor:
+        def work(tile_id: int) -> bool:
+            tile = fetch_tile(client, keys, api, tiles.bbox(tile_id), per_page, today)
+            if tile is not None:
+                # the keys are logged before any tile uses them, the tile is replaced atomically
+                keys.flush()
+                path = os.path.join(transit_dir, tiles.file(tile_id))
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path + '.tmp', 'w') as f:
+                    json.dump(tile, f, separators=(',', ':'), sort_keys=True)
+                os.replace(path + '.tmp', path)
+            with done_lock:
+                done_log.write('{}\n'.format(tile_id))
+                done_log.flush()
+            return tile is not None
+
+        futures = [executor.submit(work, tile_id) for tile_id in todo]
+        try:
+            for future in as_completed(futures):
+                written += future.result()
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+
+    return written
+
+
+def local_level(config: dict) -> Tiles:
+    level, size = 2, .25
+    for hierarchy_level in config['mjolnir'].get('hierarchy', {}).get('levels', []):
+        if hierarchy_level.get('name') == 'local':
+            level, size = hierarchy_level.get('level', level), hierarchy_level.get('size', size)
+    return Tiles(level, size)
+
+
+def main(argv: Sequence[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-c', '--config', required=True, help='the valhalla.json with mjolnir.transit_dir')
+    parser.add_argument('-u', '--url', default='http://dev.transit.land', help='the transit.land server')
+    parser.add_argument('-k', '--api-key', default='', help='the transit.land API key')
+    parser.add_argument('-b', '--bbox', action='append', help='min_x,min_y,max_x,max_y to fetch instead of all feeds, can be repeated')
+    parser.add_argument('-p', '--per-page', type=int, default=1000)
+    parser.add_argument('-w', '--workers', type=int, default=16, help='the tiles fetched at the same time')
+    parser.add_argument('--restart', action='store_true', help='fetch all tiles again instead of resuming')
+    args = parser.parse_args(argv)
+
+    with open(args.config) as f:
+        config = json.load(f)
+    transit_dir = config['mjolnir']['transit_dir']
+    tiles = local_level(config)
+
+    if args.restart:
+        for name in (DONE_LOG, KEYS_LOG):
+            if os.path.exists(os.path.join(transit_dir, name)):
+                os.remove(os.path.join(transit_dir, name))
+
+    print('Start time: {}'.format(time.strftime('%c')))
+    api = args.url.rstrip('/') + '/api/v1'
+    client = Client(args.api_key)
+    if args.bbox:
+        bboxes = [tuple(float(c) for c in bbox.split(',')) for bbox in args.bbox]
+    else:
+        bboxes = feed_bboxes(client, api + '/feeds.geojson')
+    written = fetch(transit_dir, tiles, bboxes, client, api, args.per_page, args.workers)
+    print('Wrote {} tiles to {}'.format(written, transit_dir))
+    print('End time: {}'.format(time.strftime('%c')))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
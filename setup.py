@@ -226,6 +226,7 @@ setup(
     ext_modules=[CMakeExtension('valhalla')],
     packages=find_packages(),
     python_requires=">=3.7",
+    extras_require={"numpy": ["numpy"]},
     cmdclass=dict(
         build_ext=CMakeBuild,
         install_data=InstallCMakeLibsData,
@@ -39,8 +39,27 @@ GraphReader::tile_extract_t::tile_extract_t(const boost::property_tree::ptree& p
   // if you really meant to load it
   if (pt.get_optional<std::string>("tile_extract")) {
     try {
+      // extracts written with an index.bin in front map their tiles from the index, so that the
+      // whole tar doesn't need to be scanned
+      auto from_index = [this](const std::string& name, const char* index, size_t size,
+                               const char* archive, size_t archive_size) {
+        using entry_t = midgard::tar::tile_index_entry;
+        if (name != "index.bin" || size % sizeof(entry_t) != 0) {
+          return false;
+        }
+        const auto* entry = static_cast<const entry_t*>(static_cast<const void*>(index));
+        for (const auto* end = entry + size / sizeof(entry_t); entry < end; ++entry) {
+          if (entry->offset + entry->size > archive_size) {
+            tiles.clear();
+            return false;
+          }
+          tiles[entry->tile_id] =
+              std::make_pair(const_cast<char*>(archive + entry->offset), entry->size);
+        }
+        return true;
+      };
       // load the tar
-      archive.reset(new midgard::tar(pt.get<std::string>("tile_extract")));
+      archive.reset(new midgard::tar(pt.get<std::string>("tile_extract"), true, from_index));
       // map files to graph ids
       for (auto& c : archive->contents) {
         try {
@@ -141,6 +160,11 @@ bool FlatTileCache::OverCommitted() const {
   return cache_size_ > max_cache_size_;
 }
 
+// Returns the memory the cached tiles take.
+size_t FlatTileCache::Size() const {
+  return cache_size_;
+}
+
 // Clears the cache.
 void FlatTileCache::Clear() {
   cache_size_ = 0;
@@ -197,6 +221,11 @@ bool SimpleTileCache::OverCommitted() const {
   return cache_size_ > max_cache_size_;
 }
 
+// Returns the memory the cached tiles take.
+size_t SimpleTileCache::Size() const {
+  return cache_size_;
+}
+
 // Clears the cache.
 void SimpleTileCache::Clear() {
   cache_size_ = 0;
@@ -246,6 +275,11 @@ bool TileCacheLRU::OverCommitted() const {
   return cache_size_ > max_cache_size_;
 }
 
+// Returns the memory the cached tiles take.
+size_t TileCacheLRU::Size() const {
+  return cache_size_;
+}
+
 void TileCacheLRU::Clear() {
   cache_size_ = 0;
   cache_.clear();
@@ -354,6 +388,12 @@ bool SynchronizedTileCache::OverCommitted() const {
   return cache_.OverCommitted();
 }
 
+// Returns the memory the cached tiles take.
+size_t SynchronizedTileCache::Size() const {
+  std::lock_guard<std::mutex> lock(mutex_ref_);
+  return cache_.Size();
+}
+
 // Clears the cache.
 void SynchronizedTileCache::Clear() {
   std::lock_guard<std::mutex> lock(mutex_ref_);
@@ -520,15 +560,25 @@ graph_tile_ptr GraphReader::GetGraphTile(const GraphId& graphid) {
       // LOG_DEBUG("Memory map cache miss " + GraphTile::FileSuffix(base));
       return nullptr;
     }
-    auto memory = std::make_unique<TarballGraphMemory>(tile_extract_->archive, t->second);
-
     auto traffic_ptr = tile_extract_->traffic_tiles.find(base);
     auto traffic_memory = traffic_ptr != tile_extract_->traffic_tiles.end()
                               ? std::make_unique<TarballGraphMemory>(tile_extract_->traffic_archive,
                                                                      traffic_ptr->second)
                               : nullptr;
 
+    // Extracts can hold gzipped tiles, these are inflated into memory and cached with their size
+    if (GraphTile::IsCompressed(t->second.first, t->second.second)) {
+      auto tile = GraphTile::DecompressTile(base, t->second.first, t->second.second,
+                                            std::move(traffic_memory));
+      if (!tile || !tile->header()) {
+        return nullptr;
+      }
+      const size_t size = tile->header()->end_offset();
+      return cache_->Put(base, std::move(tile), size);
+    }
+
     // This initializes the tile from mmap
+    auto memory = std::make_unique<TarballGraphMemory>(tile_extract_->archive, t->second);
     auto tile = GraphTile::Create(base, std::move(memory), std::move(traffic_memory));
     if (!tile) {
       // LOG_DEBUG("Memory map cache miss " + GraphTile::FileSuffix(base));
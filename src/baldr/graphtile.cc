@@ -64,17 +64,18 @@ private:
 };
 
 graph_tile_ptr GraphTile::DecompressTile(const GraphId& graphid,
-                                         const std::vector<char>& compressed) {
+                                         const char* compressed,
+                                         size_t size,
+                                         std::unique_ptr<const GraphMemory>&& traffic_memory) {
   // for setting where to read compressed data from
-  auto src_func = [&compressed](z_stream& s) -> void {
-    s.next_in =
-        const_cast<Byte*>(static_cast<const Byte*>(static_cast<const void*>(compressed.data())));
-    s.avail_in = static_cast<unsigned int>(compressed.size());
+  auto src_func = [compressed, size](z_stream& s) -> void {
+    s.next_in = const_cast<Byte*>(static_cast<const Byte*>(static_cast<const void*>(compressed)));
+    s.avail_in = static_cast<unsigned int>(size);
   };
 
   // for setting where to write the uncompressed data to
   std::vector<char> data;
-  auto dst_func = [&data, &compressed](z_stream& s) -> int {
+  auto dst_func = [&data, compressed_size = size](z_stream& s) -> int {
     // if the whole buffer wasn't used we are done
     auto size = data.size();
     if (s.total_out < size)
@@ -82,10 +83,10 @@ graph_tile_ptr GraphTile::DecompressTile(const GraphId& graphid,
     // we need more space
     else {
       // assume we need 3.5x the space
-      data.resize(size + (compressed.size() * COMPRESSION_HINT));
+      data.resize(size + (compressed_size * COMPRESSION_HINT));
       // set the pointer to the next spot
       s.next_out = static_cast<Byte*>(static_cast<void*>(data.data() + size));
-      s.avail_out = compressed.size() * COMPRESSION_HINT;
+      s.avail_out = compressed_size * COMPRESSION_HINT;
     }
     return Z_NO_FLUSH;
   };
@@ -96,8 +97,9 @@ graph_tile_ptr GraphTile::DecompressTile(const GraphId& graphid,
     return nullptr;
   }
 
-  return graph_tile_ptr{
-      new GraphTile(graphid, std::make_unique<const VectorGraphMemory>(std::move(data)))};
+  return graph_tile_ptr{new GraphTile(graphid,
+                                      std::make_unique<const VectorGraphMemory>(std::move(data)),
+                                      std::move(traffic_memory))};
 }
 
 // Constructor given a filename. Reads the graph data into memory.
@@ -136,7 +138,7 @@ graph_tile_ptr GraphTile::Create(const std::string& tile_dir,
     std::vector<char> compressed(filesize);
     gz_file.read(&compressed[0], filesize);
     gz_file.close();
-    return DecompressTile(graphid, std::move(compressed));
+    return DecompressTile(graphid, compressed.data(), compressed.size(), std::move(traffic_memory));
   }
 
   // Nothing to load anywhere
@@ -230,7 +232,7 @@ graph_tile_ptr GraphTile::CacheTileURL(const std::string& tile_url,
 
   // turn the memory into a tile
   if (tile_getter->gzipped()) {
-    return DecompressTile(graphid, result.bytes_);
+    return DecompressTile(graphid, result.bytes_.data(), result.bytes_.size());
   }
 
   return graph_tile_ptr{
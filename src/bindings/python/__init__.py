@@ -1,3 +1,9 @@
-from .python_valhalla import Configure
+from .python_valhalla import cleanup, CancellationToken, Interrupted, Timeout, ResponseDict, ResponseList
 from ._actions import *
+from .config import Configure, Config
 from .buildtiles import BuildTiles
+from .largematrix import LargeMatrix, MatrixBlock
+from .extract import swap_extract, warmup
+from .responsecache import set_response_cache, response_cache_info, clear_response_cache
+from .monitoring import metrics, PrometheusCollector
+from . import aio
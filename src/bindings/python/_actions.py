@@ -1,65 +1,154 @@
 
-__all__ = ['Route', 'Locate', 'OptimizedRoute', 'Matrix', 'Isochrone', 'TraceRoute', 'TraceAttributes' , 'Height', 'TransitAvailable', 'Expansion', 'Centroid']
+__all__ = ['Route', 'Locate', 'OptimizedRoute', 'Matrix', 'Isochrone', 'TraceRoute', 'TraceAttributes' , 'Height', 'TransitAvailable', 'Expansion', 'Centroid', 'RouteMany', 'MatrixMany']
 
-import json
-from typing import Union, Callable
+import time
+from collections.abc import Mapping, Sequence
+from typing import Union, Callable, Iterable, Iterator, List, Optional, Tuple
 
 try:
-    from .python_valhalla import _Route, _Locate, _OptimizedRoute, _Matrix, _Isochrone, _TraceRoute, _TraceAttributes, _Height, _TransitAvailable, _Expansion, _Centroid
+    from .python_valhalla import _Route, _Locate, _OptimizedRoute, _Matrix, _Isochrone, _TraceRoute, _TraceAttributes, _Height, _TransitAvailable, _Expansion, _Centroid, _MatrixArrays, _Batch, _Interrupt, _to_json, _from_json, CancellationToken, ResponseDict, ResponseList
 except ModuleNotFoundError:
-    from python_valhalla import _Route, _Locate, _OptimizedRoute, _Matrix, _Isochrone, _TraceRoute, _TraceAttributes, _Height, _TransitAvailable, _Expansion, _Centroid
+    from python_valhalla import _Route, _Locate, _OptimizedRoute, _Matrix, _Isochrone, _TraceRoute, _TraceAttributes, _Height, _TransitAvailable, _Expansion, _Centroid, _MatrixArrays, _Batch, _Interrupt, _to_json, _from_json, CancellationToken, ResponseDict, ResponseList
 
+# the lazy responses behave like the dict and list they stand for
+Mapping.register(ResponseDict)
+Sequence.register(ResponseList)
 
-def _wrapper(func: Callable, req: Union[str, dict]) -> Union[str, dict]:
-    # return the type being passed, str -> str, dict -> dict
-    if isinstance(req, dict):
-        return json.loads(func(json.dumps(req)))
-    elif not isinstance(req, str):
+_FORMATS = ('json', 'pbf')
+_OUTPUTS = ('json', 'numpy')
+
+
+def _remaining(timeout: Optional[float], deadline: Optional[float]) -> float:
+    # seconds the request may take from now on, negative for no limit, the deadline is a time.monotonic()
+    limits = [t for t in (timeout, None if deadline is None else deadline - time.monotonic()) if t is not None]
+    return max(min(limits), 0.) if limits else -1.
+
+
+def _interrupt(timeout: Optional[float], deadline: Optional[float], token: Optional[CancellationToken]) -> Optional[_Interrupt]:
+    if timeout is None and deadline is None and token is None:
+        return None
+    return _Interrupt(token, _remaining(timeout, deadline))
+
+
+def _pbf(format: str) -> bool:
+    # 'pbf' returns the serialized valhalla.Api message as bytes instead of the JSON response
+    if format not in _FORMATS:
+        raise ValueError("format must be one of {}".format(", ".join(_FORMATS)))
+    return format == 'pbf'
+
+
+def _numpy(output: str) -> bool:
+    # 'numpy' fills the durations and distances into arrays natively instead of nested lists of dicts
+    if output not in _OUTPUTS:
+        raise ValueError("output must be one of {}".format(", ".join(_OUTPUTS)))
+    return output == 'numpy'
+
+
+def _wrapper(func: Callable, req: Union[str, dict], timeout: float = None, deadline: float = None, token: CancellationToken = None, **kwargs) -> Union[str, dict, bytes, ResponseDict]:
+    # return the type being passed, str -> str, dict -> dict, dicts are converted natively
+    # with lazy=True both get a ResponseDict which converts the response only where it's accessed
+    # the request raises Timeout once it exceeds timeout seconds or time.monotonic() passes deadline
+    # and Interrupted when the token is cancelled
+    # report is called with the seconds the request spent in total and in loki, thor, odin and tyr,
+    # the edge labels thor expanded, the tiles loaded and whether it was cached
+    if not isinstance(req, (str, dict)):
         raise ValueError("Request must be either of type str or dict")
 
-    return func(req)
+    return func(req, _interrupt(timeout, deadline, token), **kwargs)
+
+
+def _batch_result(req: Union[str, dict], resp: Union[str, bytes], error: RuntimeError) -> Union[str, dict, bytes, RuntimeError]:
+    if error is not None:
+        return error
+    return _from_json(resp) if isinstance(req, dict) and isinstance(resp, str) else resp
+
+
+def _many(action: str, reqs: Iterable[Union[str, dict]], workers: int, ordered: bool, timeout: Optional[float], deadline: Optional[float], token: Optional[CancellationToken], format: str = 'json', report: Optional[Callable[[dict], None]] = None):
+    # every item keeps its own type, str -> str, dict -> dict, failed items come back as RuntimeError
+    # the timeout applies to each request, the deadline to the whole batch
+    # report gets the timing of every successful request with its index
+    reqs = list(reqs)
+    if not all(isinstance(req, (str, dict)) for req in reqs):
+        raise ValueError("Requests must be either of type str or dict")
+
+    batch = _Batch(
+        action,
+        [_to_json(req) if isinstance(req, dict) else req for req in reqs],
+        workers,
+        token,
+        -1. if timeout is None else timeout,
+        _remaining(None, deadline),
+        'pbf' if _pbf(format) else 'json',
+        report
+    )
+    results = ((index, _batch_result(reqs[index], resp, error)) for index, resp, error in batch)
+    if not ordered:
+        return results
+
+    ordered_results = [None] * len(reqs)
+    for index, result in results:
+        ordered_results[index] = result
+    return ordered_results
 
 
-def Route(req: Union[str, dict]) -> Union[str, dict]:
+def Route(req: Union[str, dict], timeout: float = None, deadline: float = None, token: CancellationToken = None, format: str = 'json', lazy: bool = False, report: Callable[[dict], None] = None) -> Union[str, dict, bytes, ResponseDict]:
     """Calculates a route."""
-    return _wrapper(_Route, req)
+    return _wrapper(_Route, req, timeout, deadline, token, pbf=_pbf(format), lazy=lazy, report=report)
 
-def Locate(req: Union[str, dict]) -> Union[str, dict]:
+def Locate(req: Union[str, dict], timeout: float = None, deadline: float = None, token: CancellationToken = None, lazy: bool = False, report: Callable[[dict], None] = None) -> Union[str, dict, ResponseDict]:
     """Provides information about nodes and edges."""
-    return _wrapper(_Locate, req)
+    return _wrapper(_Locate, req, timeout, deadline, token, lazy=lazy, report=report)
 
-def OptimizedRoute(req: Union[str, dict]) -> Union[str, dict]:
+def OptimizedRoute(req: Union[str, dict], timeout: float = None, deadline: float = None, token: CancellationToken = None, format: str = 'json', lazy: bool = False, report: Callable[[dict], None] = None) -> Union[str, dict, bytes, ResponseDict]:
     """Optimizes the order of a set of waypoints by time."""
-    return _wrapper(_OptimizedRoute, req)
+    return _wrapper(_OptimizedRoute, req, timeout, deadline, token, pbf=_pbf(format), lazy=lazy, report=report)
 
-def Matrix(req: Union[str, dict]) -> Union[str, dict]:
-    """Computes the time and distance between a set of locations and returns them as a matrix table."""
-    return _wrapper(_Matrix, req)
+def Matrix(req: Union[str, dict], timeout: float = None, deadline: float = None, token: CancellationToken = None, output: str = 'json', lazy: bool = False, report: Callable[[dict], None] = None) -> Union[str, dict, ResponseDict]:
+    """Computes the time and distance between a set of locations and returns them as a matrix table.
+    With ``output="numpy"`` the response is a dict with ``durations`` (int32, -1 if unreachable) and
+    ``distances`` (float32, NaN if unreachable) arrays of shape (sources, targets) instead."""
+    if _numpy(output):
+        return _wrapper(_MatrixArrays, req, timeout, deadline, token, report=report)
+    return _wrapper(_Matrix, req, timeout, deadline, token, lazy=lazy, report=report)
 
-def Isochrone(req: Union[str, dict]) -> Union[str, dict]:
+def Isochrone(req: Union[str, dict], timeout: float = None, deadline: float = None, token: CancellationToken = None, lazy: bool = False, report: Callable[[dict], None] = None) -> Union[str, dict, ResponseDict]:
     """Calculates isochrones and isodistances."""
-    return _wrapper(_Isochrone, req)
+    return _wrapper(_Isochrone, req, timeout, deadline, token, lazy=lazy, report=report)
 
-def TraceRoute(req: Union[str, dict]) -> Union[str, dict]:
+def TraceRoute(req: Union[str, dict], timeout: float = None, deadline: float = None, token: CancellationToken = None, format: str = 'json', lazy: bool = False, report: Callable[[dict], None] = None) -> Union[str, dict, bytes, ResponseDict]:
     """Map-matching for a set of input locations, e.g. from a GPS."""
-    return _wrapper(_TraceRoute, req)
+    return _wrapper(_TraceRoute, req, timeout, deadline, token, pbf=_pbf(format), lazy=lazy, report=report)
 
-def TraceAttributes(req: Union[str, dict]) -> Union[str, dict]:
+def TraceAttributes(req: Union[str, dict], timeout: float = None, deadline: float = None, token: CancellationToken = None, format: str = 'json', lazy: bool = False, report: Callable[[dict], None] = None) -> Union[str, dict, bytes, ResponseDict]:
     """Returns detailed attribution along each portion of a route calculated from a set of input locations, e.g. from a GPS trace."""
-    return _wrapper(_TraceAttributes, req)
+    return _wrapper(_TraceAttributes, req, timeout, deadline, token, pbf=_pbf(format), lazy=lazy, report=report)
 
-def Height(req: Union[str, dict]) -> Union[str, dict]:
+def Height(req: Union[str, dict], timeout: float = None, deadline: float = None, token: CancellationToken = None, lazy: bool = False, report: Callable[[dict], None] = None) -> Union[str, dict, ResponseDict]:
     """Provides elevation data for a set of input geometries."""
-    return _wrapper(_Height, req)
+    return _wrapper(_Height, req, timeout, deadline, token, lazy=lazy, report=report)
 
-def TransitAvailable(req: Union[str, dict]) -> Union[str, dict]:
+def TransitAvailable(req: Union[str, dict], timeout: float = None, deadline: float = None, token: CancellationToken = None, lazy: bool = False, report: Callable[[dict], None] = None) -> Union[str, dict, ResponseDict]:
     """Lookup if transit stops are available in a defined radius around a set of input locations."""
-    return _wrapper(_TransitAvailable, req)
+    return _wrapper(_TransitAvailable, req, timeout, deadline, token, lazy=lazy, report=report)
 
-def Expansion(req: Union[str, dict]) -> Union[str, dict]:
+def Expansion(req: Union[str, dict], timeout: float = None, deadline: float = None, token: CancellationToken = None, lazy: bool = False, report: Callable[[dict], None] = None) -> Union[str, dict, ResponseDict]:
     """Returns all road segments which were touched by the routing algorithm during the graph traversal."""
-    return _wrapper(_Expansion, req)
+    return _wrapper(_Expansion, req, timeout, deadline, token, lazy=lazy, report=report)
 
-def Centroid(req: Union[str, dict]) -> Union[str, dict]:
+def Centroid(req: Union[str, dict], timeout: float = None, deadline: float = None, token: CancellationToken = None, format: str = 'json', lazy: bool = False, report: Callable[[dict], None] = None) -> Union[str, dict, bytes, ResponseDict]:
     """Determines the ideal meeting point (centroid) for a list of locations."""
-    return _wrapper(_Centroid, req)
+    return _wrapper(_Centroid, req, timeout, deadline, token, pbf=_pbf(format), lazy=lazy, report=report)
+
+def RouteMany(reqs: Iterable[Union[str, dict]], workers: int = 0, ordered: bool = True, timeout: float = None, deadline: float = None, token: CancellationToken = None, format: str = 'json', report: Callable[[dict], None] = None) -> Union[List[Union[str, dict, bytes, RuntimeError]], Iterator[Tuple[int, Union[str, dict, bytes, RuntimeError]]]]:
+    """Calculates routes for all ``reqs`` on ``workers`` native threads, by default as many as the ``pool_size``.
+    Returns the results in the order of ``reqs`` or, if not ``ordered``, yields ``(index, result)`` tuples as
+    soon as they're finished. A failed request's result is a ``RuntimeError`` instead of raising, ``timeout``
+    limits every request and ``deadline`` the whole batch."""
+    return _many('route', reqs, workers, ordered, timeout, deadline, token, format, report)
+
+def MatrixMany(reqs: Iterable[Union[str, dict]], workers: int = 0, ordered: bool = True, timeout: float = None, deadline: float = None, token: CancellationToken = None, report: Callable[[dict], None] = None) -> Union[List[Union[str, dict, RuntimeError]], Iterator[Tuple[int, Union[str, dict, RuntimeError]]]]:
+    """Computes the matrices for all ``reqs`` on ``workers`` native threads, by default as many as the ``pool_size``.
+    Returns the results in the order of ``reqs`` or, if not ``ordered``, yields ``(index, result)`` tuples as
+    soon as they're finished. A failed request's result is a ``RuntimeError`` instead of raising, ``timeout``
+    limits every request and ``deadline`` the whole batch."""
+    return _many('sources_to_targets', reqs, workers, ordered, timeout, deadline, token, report=report)
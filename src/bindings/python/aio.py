@@ -0,0 +1,89 @@
+
+__all__ = ['Route', 'Locate', 'OptimizedRoute', 'Matrix', 'Isochrone', 'TraceRoute', 'TraceAttributes' , 'Height', 'TransitAvailable', 'Expansion', 'Centroid']
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Union, Callable
+
+from ._actions import _remaining, _pbf, _numpy
+try:
+    from .python_valhalla import _Route, _Locate, _OptimizedRoute, _Matrix, _Isochrone, _TraceRoute, _TraceAttributes, _Height, _TransitAvailable, _Expansion, _Centroid, _MatrixArrays, _Interrupt, CancellationToken, ResponseDict
+except ModuleNotFoundError:
+    from python_valhalla import _Route, _Locate, _OptimizedRoute, _Matrix, _Isochrone, _TraceRoute, _TraceAttributes, _Height, _TransitAvailable, _Expansion, _Centroid, _MatrixArrays, _Interrupt, CancellationToken, ResponseDict
+
+_executor = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    # the threads only wait for the actors, which compute the requests without holding the GIL
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(thread_name_prefix='valhalla')
+    return _executor
+
+
+async def _run(func: Callable, req: Union[str, dict], timeout: float, deadline: float, token: CancellationToken, **kwargs) -> Union[str, dict, bytes, ResponseDict]:
+    interrupt = _Interrupt(token, _remaining(timeout, deadline))
+    future = asyncio.get_running_loop().run_in_executor(_get_executor(), partial(func, req, interrupt, **kwargs))
+    try:
+        return await future
+    except asyncio.CancelledError:
+        # stops the graph search at its next interrupt check
+        interrupt.cancel()
+        raise
+
+
+async def _wrapper(func: Callable, req: Union[str, dict], timeout: float = None, deadline: float = None, token: CancellationToken = None, **kwargs) -> Union[str, dict, bytes, ResponseDict]:
+    # return the type being passed, str -> str, dict -> dict, dicts are converted natively
+    if not isinstance(req, (str, dict)):
+        raise ValueError("Request must be either of type str or dict")
+
+    return await _run(func, req, timeout, deadline, token, **kwargs)
+
+
+async def Route(req: Union[str, dict], timeout: float = None, deadline: float = None, token: CancellationToken = None, format: str = 'json', lazy: bool = False, report: Callable[[dict], None] = None) -> Union[str, dict, bytes, ResponseDict]:
+    """Calculates a route."""
+    return await _wrapper(_Route, req, timeout, deadline, token, pbf=_pbf(format), lazy=lazy, report=report)
+
+async def Locate(req: Union[str, dict], timeout: float = None, deadline: float = None, token: CancellationToken = None, lazy: bool = False, report: Callable[[dict], None] = None) -> Union[str, dict, ResponseDict]:
+    """Provides information about nodes and edges."""
+    return await _wrapper(_Locate, req, timeout, deadline, token, lazy=lazy, report=report)
+
+async def OptimizedRoute(req: Union[str, dict], timeout: float = None, deadline: float = None, token: CancellationToken = None, format: str = 'json', lazy: bool = False, report: Callable[[dict], None] = None) -> Union[str, dict, bytes, ResponseDict]:
+    """Optimizes the order of a set of waypoints by time."""
+    return await _wrapper(_OptimizedRoute, req, timeout, deadline, token, pbf=_pbf(format), lazy=lazy, report=report)
+
+async def Matrix(req: Union[str, dict], timeout: float = None, deadline: float = None, token: CancellationToken = None, output: str = 'json', lazy: bool = False, report: Callable[[dict], None] = None) -> Union[str, dict, ResponseDict]:
+    """Computes the time and distance between a set of locations and returns them as a matrix table."""
+    if _numpy(output):
+        return await _wrapper(_MatrixArrays, req, timeout, deadline, token, report=report)
+    return await _wrapper(_Matrix, req, timeout, deadline, token, lazy=lazy, report=report)
+
+async def Isochrone(req: Union[str, dict], timeout: float = None, deadline: float = None, token: CancellationToken = None, lazy: bool = False, report: Callable[[dict], None] = None) -> Union[str, dict, ResponseDict]:
+    """Calculates isochrones and isodistances."""
+    return await _wrapper(_Isochrone, req, timeout, deadline, token, lazy=lazy, report=report)
+
+async def TraceRoute(req: Union[str, dict], timeout: float = None, deadline: float = None, token: CancellationToken = None, format: str = 'json', lazy: bool = False, report: Callable[[dict], None] = None) -> Union[str, dict, bytes, ResponseDict]:
+    """Map-matching for a set of input locations, e.g. from a GPS."""
+    return await _wrapper(_TraceRoute, req, timeout, deadline, token, pbf=_pbf(format), lazy=lazy, report=report)
+
+async def TraceAttributes(req: Union[str, dict], timeout: float = None, deadline: float = None, token: CancellationToken = None, format: str = 'json', lazy: bool = False, report: Callable[[dict], None] = None) -> Union[str, dict, bytes, ResponseDict]:
+    """Returns detailed attribution along each portion of a route calculated from a set of input locations, e.g. from a GPS trace."""
+    return await _wrapper(_TraceAttributes, req, timeout, deadline, token, pbf=_pbf(format), lazy=lazy, report=report)
+
+async def Height(req: Union[str, dict], timeout: float = None, deadline: float = None, token: CancellationToken = None, lazy: bool = False, report: Callable[[dict], None] = None) -> Union[str, dict, ResponseDict]:
+    """Provides elevation data for a set of input geometries."""
+    return await _wrapper(_Height, req, timeout, deadline, token, lazy=lazy, report=report)
+
+async def TransitAvailable(req: Union[str, dict], timeout: float = None, deadline: float = None, token: CancellationToken = None, lazy: bool = False, report: Callable[[dict], None] = None) -> Union[str, dict, ResponseDict]:
+    """Lookup if transit stops are available in a defined radius around a set of input locations."""
+    return await _wrapper(_TransitAvailable, req, timeout, deadline, token, lazy=lazy, report=report)
+
+async def Expansion(req: Union[str, dict], timeout: float = None, deadline: float = None, token: CancellationToken = None, lazy: bool = False, report: Callable[[dict], None] = None) -> Union[str, dict, ResponseDict]:
+    """Returns all road segments which were touched by the routing algorithm during the graph traversal."""
+    return await _wrapper(_Expansion, req, timeout, deadline, token, lazy=lazy, report=report)
+
+async def Centroid(req: Union[str, dict], timeout: float = None, deadline: float = None, token: CancellationToken = None, format: str = 'json', lazy: bool = False, report: Callable[[dict], None] = None) -> Union[str, dict, bytes, ResponseDict]:
+    """Determines the ideal meeting point (centroid) for a list of locations."""
+    return await _wrapper(_Centroid, req, timeout, deadline, token, pbf=_pbf(format), lazy=lazy, report=report)
@@ -0,0 +1,292 @@
+"""
+Benchmarks the bindings on a fixed extract with seeded request mixes, e.g.
+
+    python -m valhalla.bench --pbf test/data/nyc.osm.pbf --bbox -74.01 40.733 -74.0 40.75 --compare .benchmarks/<previous>.json
+
+Every action runs its requests with every cache mode on every number of threads and reports the
+throughput, the p50 and p99 latency and the RSS. The reports are saved as JSON to compare commits.
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Iterable, List, Optional, Sequence
+
+from . import _actions
+from .buildtiles import BuildTiles
+from .config import Configure, get_default
+from .python_valhalla import cleanup
+from .responsecache import clear_response_cache, set_response_cache
+from .utils import decode_polyline
+
+ACTIONS = ('route', 'matrix', 'isochrone', 'trace_route', 'height')
+
+# cold empties the tile caches first, warm runs the requests once before they're timed and response
+# does the same with the response cache enabled, so that the timed requests are all cache hits
+CACHE_MODES = ('cold', 'warm', 'response')
+
+_FUNCTIONS = {
+    'route': _actions.Route,
+    'matrix': _actions.Matrix,
+    'isochrone': _actions.Isochrone,
+    'trace_route': _actions.TraceRoute,
+    'height': _actions.Height,
+}
+
+
+def build_extract(pbfs: List[str], directory: str, pool_size: int = 1) -> str:
+    """
+    Configures the service with the default config and ``pool_size`` actors for the extract in
+    ``directory``, which is built from ``pbfs`` unless the directory has one already.
+    Returns the path of the extract.
+    """
+    directory = Path(directory)
+    tile_dir = directory / 'tiles'
+    tile_dir.mkdir(parents=True, exist_ok=True)
+    tar_path = directory / 'valhalla_tiles.tar'
+
+    conf = get_default()
+    conf['mjolnir'] = dict(conf['mjolnir'], tile_dir=str(tile_dir))
+    Configure(str(directory / 'valhalla.json'), str(tar_path), conf, False, pool_size)
+    if not tar_path.is_file():
+        BuildTiles(pbfs)
+
+    return str(tar_path.resolve())
+
+
+def requests(action: str, bbox: Sequence[float], count: int, seed: int = 0) -> List[dict]:
+    """
+    Generates ``count`` requests of ``action`` with locations in ``bbox`` (min_lon, min_lat, max_lon,
+    max_lat), the same ``seed`` generates the same requests. The traces of trace_route follow the
+    routes between the locations, so they need the configured extract.
+    """
+    if action not in ACTIONS:
+        raise ValueError("action must be one of {}".format(", ".join(ACTIONS)))
+
+    rnd = random.Random('{}:{}'.format(seed, action))
+    min_lon, min_lat, max_lon, max_lat = bbox
+
+    def location() -> dict:
+        return {'lat': round(rnd.uniform(min_lat, max_lat), 6), 'lon': round(rnd.uniform(min_lon, max_lon), 6)}
+
+    if action == 'route':
+        return [{'locations': [location(), location()], 'costing': rnd.choice(('auto', 'bicycle', 'pedestrian'))} for _ in range(count)]
+    if action == 'matrix':
+        return [{'sources': [location() for _ in range(5)], 'targets': [location() for _ in range(5)], 'costing': rnd.choice(('auto', 'pedestrian'))} for _ in range(count)]
+    if action == 'isochrone':
+        return [{'locations': [location()], 'costing': rnd.choice(('auto', 'pedestrian')), 'contours': [{'time': 5}, {'time': 10}]} for _ in range(count)]
+    if action == 'height':
+        return [{'shape': [location() for _ in range(20)], 'range': True} for _ in range(count)]
+
+    # every third point of the shape of a route, routes which aren't found are replaced by others
+    traces = []
+    for _ in range(count * 10):
+        if len(traces) == count:
+            return traces
+        try:
+            route = _actions.Route({'locations': [location(), location()], 'costing': 'auto'})
+        except RuntimeError:
+            continue
+        shape = decode_polyline(route['trip']['legs'][0]['shape'])[::3]
+        if len(shape) > 1:
+            traces.append({'shape': [{'lon': lon, 'lat': lat} for lon, lat in shape], 'costing': 'auto', 'shape_match': 'map_snap'})
+    raise RuntimeError("Found only {} of {} routes to trace in {}".format(len(traces), count, bbox))
+
+
+def run(action: str, reqs: List[dict], threads: int = 1, cache: str = 'warm') -> dict:
+    """
+    Runs ``reqs`` of ``action`` on ``threads`` threads in the cache mode ``cache``, see ``CACHE_MODES``.
+    Returns the number of ``requests`` and ``errors``, the ``seconds`` they took, their ``throughput``
+    per second, the ``p50`` and ``p99`` of their latencies in seconds and the ``rss`` in bytes after.
+    """
+    if cache not in CACHE_MODES:
+        raise ValueError("cache must be one of {}".format(", ".join(CACHE_MODES)))
+
+    func = _FUNCTIONS[action]
+    payloads = [json.dumps(req) for req in reqs]
+    set_response_cache(64 << 20 if cache == 'response' else 0)
+    clear_response_cache()
+    cleanup()
+    try:
+        if cache != 'cold':
+            _execute(func, payloads, threads)
+        started = time.perf_counter()
+        latencies = _execute(func, payloads, threads)
+        seconds = time.perf_counter() - started
+    finally:
+        set_response_cache(0)
+
+    succeeded = sorted(latency for latency in latencies if latency is not None)
+    return {
+        'action': action,
+        'threads': threads,
+        'cache': cache,
+        'requests': len(latencies),
+        'errors': len(latencies) - len(succeeded),
+        'seconds': seconds,
+        'throughput': len(latencies) / seconds if seconds else 0.,
+        'p50': _percentile(succeeded, 50),
+        'p99': _percentile(succeeded, 99),
+        'rss': _rss(),
+    }
+
+
+def benchmark(pbfs: List[str], directory: str, bbox: Sequence[float], actions: Iterable[str] = ACTIONS, threads: Iterable[int] = (1, 2, 4), caches: Iterable[str] = CACHE_MODES, count: int = 100, seed: int = 0, progress: Callable[[dict], None] = None) -> dict:
+    """
+    Builds the extract of ``pbfs`` in ``directory`` and runs ``count`` requests with locations in
+    ``bbox`` of every one of ``actions`` with every cache mode of ``caches`` on every number of ``threads``.
+    ``progress`` is called with the result of every run. Returns the report of all runs, see ``make_report``.
+    """
+    threads = list(threads)
+    if not threads or min(threads) < 1:
+        raise ValueError("threads must be positive.")
+
+    build_extract(pbfs, directory, max(threads))
+    results = []
+    for action in actions:
+        reqs = requests(action, bbox, count, seed)
+        for cache in caches:
+            for n in threads:
+                result = run(action, reqs, n, cache)
+                results.append(result)
+                if progress is not None:
+                    progress(result)
+
+    return make_report(results, pbfs, bbox, count, seed)
+
+
+def make_report(results: List[dict], pbfs: List[str], bbox: Sequence[float], count: int, seed: int) -> dict:
+    """The report of the ``results`` of ``run``, with the ``commit`` of the working directory and what ran them."""
+    return {
+        'commit': _commit(),
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+        'python': platform.python_version(),
+        'pbfs': [Path(pbf).name for pbf in pbfs],
+        'bbox': list(bbox),
+        'count': count,
+        'seed': seed,
+        'results': results,
+    }
+
+
+def save(report: dict, directory: str = '.benchmarks') -> str:
+    """Saves ``report`` as ``<created>_<commit>.json`` in ``directory``, returns its path."""
+    path = Path(directory) / '{}_{}.json'.format(report['created'].replace(':', ''), report['commit'] or 'unknown')
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+    return str(path)
+
+
+def load(path: str) -> dict:
+    """Loads a report saved by ``save``."""
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(report: dict, baseline: dict, tolerance: float = .1) -> List[dict]:
+    """
+    Compares the results of ``report`` with those of the same action, cache mode and threads of
+    ``baseline``. Returns their ``throughput`` and ``p99`` as (baseline, report) tuples, a run is
+    a ``regression`` if its throughput dropped or its p99 grew by more than ``tolerance``.
+    """
+    previous = {(r['action'], r['cache'], r['threads']): r for r in baseline['results']}
+    compared = []
+    for result in report['results']:
+        before = previous.get((result['action'], result['cache'], result['threads']))
+        if before is None:
+            continue
+        compared.append({
+            'action': result['action'],
+            'cache': result['cache'],
+            'threads': result['threads'],
+            'throughput': (before['throughput'], result['throughput']),
+            'p99': (before['p99'], result['p99']),
+            'regression': result['throughput'] < before['throughput'] * (1 - tolerance) or result['p99'] > before['p99'] * (1 + tolerance),
+        })
+    return compared
+
+
+def _execute(func: Callable, payloads: List[str], threads: int) -> List[Optional[float]]:
+    # the latency of every request, None if it failed
+    def timed(payload: str) -> Optional[float]:
+        started = time.perf_counter()
+        try:
+            func(payload)
+        except RuntimeError:
+            return None
+        return time.perf_counter() - started
+
+    with ThreadPoolExecutor(threads) as executor:
+        return list(executor.map(timed, payloads))
+
+
+def _percentile(values: List[float], percent: float) -> float:
+    # the nearest rank of the sorted values
+    if not values:
+        return float('nan')
+    return values[max(math.ceil(percent / 100 * len(values)), 1) - 1]
+
+
+def _rss() -> int:
+    # the resident memory now, or the peak where /proc isn't available
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def _commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(prog='python -m valhalla.bench', description='Benchmarks the Valhalla bindings with seeded request mixes.')
+    parser.add_argument('--pbf', action='append', required=True, help='The PBF files to build the extract from, repeatable.')
+    parser.add_argument('--bbox', type=float, nargs=4, required=True, metavar=('MIN_LON', 'MIN_LAT', 'MAX_LON', 'MAX_LAT'), help='Where to put the locations of the requests.')
+    parser.add_argument('--dir', default='bench_extract', help='The directory of the extract, it\'s only built if it has none.')
+    parser.add_argument('--actions', nargs='+', default=ACTIONS, choices=ACTIONS)
+    parser.add_argument('--caches', nargs='+', default=CACHE_MODES, choices=CACHE_MODES)
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--count', type=int, default=100, help='The requests per action.')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--save', default='.benchmarks', help='The directory the report is saved to.')
+    parser.add_argument('--compare', help='A saved report to compare with.')
+    parser.add_argument('--tolerance', type=float, default=.1, help='The share throughput and p99 may get worse by.')
+    args = parser.parse_args(argv)
+
+    print('{:<12} {:<9} {:>7} {:>10} {:>9} {:>9} {:>7} {:>8}'.format('action', 'cache', 'threads', 'req/s', 'p50 ms', 'p99 ms', 'errors', 'rss MB'))
+
+    def progress(r: dict):
+        print('{:<12} {:<9} {:>7} {:>10.1f} {:>9.2f} {:>9.2f} {:>7} {:>8.0f}'.format(r['action'], r['cache'], r['threads'], r['throughput'], r['p50'] * 1000, r['p99'] * 1000, r['errors'], r['rss'] / 1e6))
+
+    report = benchmark(args.pbf, args.dir, args.bbox, args.actions, args.threads, args.caches, args.count, args.seed, progress)
+    print('Saved to {}'.format(save(report, args.save)))
+
+    if args.compare:
+        regressions = 0
+        for c in compare(report, load(args.compare), args.tolerance):
+            regressions += c['regression']
+            print('{:<12} {:<9} {:>7} {:>10.1f} -> {:<10.1f} {:>9.2f} -> {:<9.2f}{}'.format(
+                c['action'], c['cache'], c['threads'], *c['throughput'], c['p99'][0] * 1000, c['p99'][1] * 1000, '  REGRESSION' if c['regression'] else ''))
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,25 +1,50 @@
-from typing import List
-import tarfile
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, List, Tuple
 from pathlib import Path
 from shutil import rmtree
 
-from .python_valhalla import _BuildTiles, _reset_actor
+from .python_valhalla import _BuildTiles, _build_tile_part, _init_tile_part_worker, _prepare_tile_parts, _reset_actor, _write_extract
 
+# the stages in the order they're built, the parse stages share their data in memory and only run together
+STAGES = ('initialize', 'parse', 'constructedges', 'build', 'enhance', 'filter', 'transit', 'bss', 'hierarchy', 'shortcuts', 'elevation', 'restrictions', 'validate', 'cleanup')
 
-def BuildTiles(input_pbfs: List[str], cleanup: bool = True) -> str:
+_STATE_FILE = 'build_state.json'
+
+# the stages which can run on parts of the tiles in separate processes
+_PART_STAGES = ('build', 'enhance')
+
+# the parts every process gets, more than one so that a process done early takes over some work
+_PARTS_PER_PROCESS = 4
+
+
+def BuildTiles(input_pbfs: List[str], cleanup: bool = True, compress: bool = False, workers: int = 0, start: str = 'initialize', end: str = 'cleanup', resume: bool = False, report: Callable[[str, float, int], None] = None, processes: int = 1, progress: Callable[[str, int, int], None] = None) -> str:
     """
     Builds and tars the routing tiles from ``input_pbfs`` according to the config.
     ``cleanup`` will remove the untarred tile files from mjolnir.tile_dir.
-    Returns the path of the tar file.
+    ``compress`` gzips every tile in the tar, ``workers`` threads read and compress
+    the tiles, by default one per CPU. Any GraphReader inflates the gzipped tiles.
+    Only the stages from ``start`` to ``end`` are built, see ``valhalla.buildtiles.STAGES``.
+    Every finished stage is checkpointed in mjolnir.tile_dir, with ``resume`` the stages finished
+    by an earlier build of the same ``input_pbfs`` are skipped, rebuilding a stage rebuilds all later ones.
+    ``report`` is called with the stage, its seconds and its peak RSS in bytes after every stage.
+    With more than one of ``processes`` the build and enhance stages run in parts in a pool of
+    processes, each with ``mjolnir.concurrency=1``, and ``progress`` is called with the stage, the
+    finished and the total tiles after every part, a few contiguous parts per process. Every process reads its own copy of the
+    OSM data which isn't memory mapped, so that part of the peak memory grows about ``processes`` + 1 times.
+    Returns the path of the tar file, or of mjolnir.tile_dir if the build ends before cleanup.
     """
     from .config import _global_config
 
-    if not input_pbfs:
+    if processes < 1:
+        raise ValueError("processes must be positive.")
+    stages = _stages(start, end)
+    if 'parse' in stages and not input_pbfs:
         raise ValueError("No PBF files specified.")
-
-    result = _BuildTiles(input_pbfs)
-    if result is False:
-        raise RuntimeError("Building tiles failed.")
+    if not _global_config:
+        raise RuntimeError("The service was not configured")
 
     # Get the paths for the tiles
     tile_dir = Path(_global_config['mjolnir']['tile_dir'])
@@ -27,19 +52,106 @@ def BuildTiles(input_pbfs: List[str], cleanup: bool = True) -> str:
     if not tile_extract.parent.exists():
         raise ValueError("mjolnir.tile_extract={} is not inside an existing directory.".format(tile_extract.resolve()))
 
-    tar_path = _tar_tiles(tile_dir, tile_extract, cleanup)
+    state_path = tile_dir / _STATE_FILE
+    state = _read_state(state_path)
+    inputs = [_input(pbf) for pbf in input_pbfs]
+    if 'parse' in stages and state['input_pbfs'] != inputs:
+        # parsing other input files starts a new build
+        state = {'input_pbfs': inputs, 'stages': {}}
+
+    for stage in stages:
+        if resume and stage in state['stages']:
+            continue
+        for later in STAGES[STAGES.index(stage):]:
+            state['stages'].pop(later, None)
+        _write_state(state_path, state)
+
+        if processes > 1 and stage in _PART_STAGES:
+            seconds, peak_rss = _build_parts(stage, processes, progress)
+        else:
+            seconds, peak_rss = _BuildTiles(input_pbfs, stage)
+
+        state['stages'][stage] = {'seconds': seconds, 'peak_rss': peak_rss}
+        _write_state(state_path, state)
+        if report is not None:
+            report(stage, seconds, peak_rss)
+
+    if end != STAGES[-1]:
+        return str(tile_dir.resolve())
+
+    tar_path = _tar_tiles(tile_dir, tile_extract, cleanup, compress, workers)
 
     _reset_actor()
 
     return tar_path
 
 
-def _tar_tiles(tile_dir: Path, tile_extract: Path, cleanup: bool):
-    """Create a TAR ball at mjolnir.tile_extract from mjolnir.tile_dir"""
+def _build_parts(stage: str, processes: int, progress: Callable[[str, int, int], None] = None) -> Tuple[float, int]:
+    # every process reads the OSM data once, a part opens the admin and timezone databases, the
+    # access file and a GraphReader for all of its tiles, so the tiles are split into a few
+    # contiguous parts per process rather than one task per tile
+    from .config import _global_config
+
+    started = time.monotonic()
+    tiles, peak_rss = _prepare_tile_parts(stage)
+    count = min(len(tiles), processes * _PARTS_PER_PROCESS) or 1
+    parts = [tiles[len(tiles) * i // count:len(tiles) * (i + 1) // count] for i in range(count)]
+    with ProcessPoolExecutor(processes, initializer=_init_tile_part_worker, initargs=(json.dumps(_global_config), stage)) as executor:
+        futures = {executor.submit(_build_tile_part, part): len(part) for part in parts if part}
+        done = 0
+        try:
+            for future in as_completed(futures):
+                peak_rss = max(peak_rss, future.result())
+                done += futures[future]
+                if progress is not None:
+                    progress(stage, done, len(tiles))
+        except BaseException:
+            # don't wait for the parts which haven't started yet
+            for future in futures:
+                future.cancel()
+            raise
+
+    return time.monotonic() - started, peak_rss
+
+
+def _stages(start: str, end: str) -> List[str]:
+    for stage in (start, end):
+        if stage not in STAGES:
+            raise ValueError("Build stages must be one of {}".format(", ".join(STAGES)))
+    if STAGES.index(start) > STAGES.index(end):
+        raise ValueError("The start stage {} comes after the end stage {}.".format(start, end))
+
+    return list(STAGES[STAGES.index(start):STAGES.index(end) + 1])
+
+
+def _input(pbf: str) -> list:
+    # a changed input file invalidates the checkpoint, as far as its size and time tell
+    stat = os.stat(pbf) if os.path.isfile(pbf) else None
+    return [str(Path(pbf).resolve()), stat and stat.st_size, stat and stat.st_mtime_ns]
+
+
+def _read_state(state_path: Path) -> dict:
+    try:
+        with open(state_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {'input_pbfs': None, 'stages': {}}
+
+
+def _write_state(state_path: Path, state: dict):
+    # replaced atomically, a crash mid-write doesn't lose the finished stages
+    state_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = state_path.with_name(state_path.name + '.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, state_path)
+
+
+def _tar_tiles(tile_dir: Path, tile_extract: Path, cleanup: bool, compress: bool = False, workers: int = 0):
+    """Create a TAR ball at mjolnir.tile_extract from mjolnir.tile_dir, sorted by tile id with an index.bin"""
     tile_dir_str = str(tile_dir.resolve())
 
-    with tarfile.open(tile_extract, 'w') as tar:
-        tar.add(tile_dir_str, arcname=tile_dir.name)
+    _write_extract(tile_dir_str, str(tile_extract), compress, workers)
 
     if cleanup:
         rmtree(tile_dir_str)
@@ -1,11 +1,18 @@
+import copy
 import json
 import os
 from pathlib import Path
 from tempfile import TemporaryDirectory
+from typing import Optional
 
-from .python_valhalla import _reset_actor
+from .python_valhalla import _configure as _configure_native
 
 _global_config = dict()
+_pool_size = 1
+# the tile_dir of the configs without one, kept for the lifetime of the process
+_temp_tile_dir = None
+
+_CACHE_POLICIES = ('lru', 'config')
 
 
 def get_default() -> dict:
@@ -29,25 +36,96 @@ def get_help() -> dict:
     return _help_text
 
 
-def _create_config(path: str, tile_extract: str, c: dict, verbose: bool):
+class Config(dict):
+    """
+    A Valhalla config, a copy of ``config`` or else of ``get_default()``, which ``apply`` configures
+    the service with in memory, without a config file. Changes to the ``service_limits``,
+    ``loki.service_defaults``, ``meili`` (except its ``grid``), ``statsd`` and the logging are applied
+    to the running actors, their tile caches stay warm. Any other change starts new actors, which
+    reopen the tile extract.
+    """
+
+    def __init__(self, config: dict = None):
+        super().__init__(copy.deepcopy(get_default() if config is None else config))
+
+    @classmethod
+    def from_file(cls, path: str) -> 'Config':
+        """Reads the config from the JSON file at ``path``."""
+        with open(path) as f:
+            return cls(json.load(f))
+
+    def to_file(self, path: str):
+        """Writes the config to the JSON file at ``path``."""
+        with open(path, 'w') as f:
+            json.dump(self, f, indent=2)
+
+    def apply(self, tile_extract: str = None, verbose: bool = True, pool_size: int = None, cache_policy: str = 'lru') -> bool:
+        """
+        Configures the service like ``Configure`` does, by default with the ``mjolnir.tile_extract``
+        of the config and the ``pool_size`` of the current configuration.
+        Returns whether new actors were started.
+        """
+        return _configure(None, tile_extract, self, verbose, pool_size, cache_policy)
+
+
+def Configure(config_file: Optional[str], tile_extract: str, config: dict = None, verbose: bool = True, pool_size: int = 1, cache_policy: str = 'lru'):
+    """
+    Configure Valhalla with the path to a ``config_file`` JSON.
+    If the file path doesn't exist one will be created at the specified path, either with the
+    ``config`` dict or, if no ``config`` specified, the default config from ``valhalla.config.get_default()``.
+    If you pass a ``config`` dict and the file path exists, the file will be overwritten.
+    Without a ``config_file`` nothing is read from or written to disk, see ``valhalla.Config``.
+    ``tile_extract`` is the path to an existing valhalla_tiles.tar graph or the path
+    ``valhalla.BuildTiles()`` will put the tarred graph to.
+    ``verbose`` prints Valhalla's log.
+    ``pool_size`` is the number of actors serving requests concurrently, each with its own tile cache
+    of ``mjolnir.max_cache_size``.
+    ``cache_policy`` is either ``lru`` to keep the tile caches warm across requests and only evict the
+    least recently used tiles, or ``config`` to use the tile cache as configured in ``mjolnir``.
+    If only the runtime sections of the config changed since the last call, see ``valhalla.Config``,
+    they're applied to the running actors.
+    """
+    _configure(config_file, tile_extract, config, verbose, pool_size, cache_policy)
+
+
+def _configure(config_file: Optional[str], tile_extract: Optional[str], config: Optional[dict], verbose: bool, pool_size: Optional[int], cache_policy: str) -> bool:
+    global _pool_size
+    if pool_size is None:
+        pool_size = _pool_size
+    if pool_size < 1:
+        raise ValueError("pool_size must be positive.")
+
+    conf = _create_config(config_file, tile_extract, config or {}, verbose, cache_policy)
+    replaced = _configure_native(json.dumps(conf), pool_size)
+    _pool_size = pool_size
+
+    return replaced
+
+
+def _create_config(path: Optional[str], tile_extract: Optional[str], c: dict, verbose: bool, cache_policy: str = 'lru') -> dict:
     # set a global config so that other modules can work with it
-    global _global_config
-    conf = c.copy()
+    global _global_config, _temp_tile_dir
+    if cache_policy not in _CACHE_POLICIES:
+        raise ValueError("cache_policy={} must be one of {}".format(cache_policy, ', '.join(_CACHE_POLICIES)))
+    conf = copy.deepcopy(c)
 
-    if os.path.exists(path) and not conf:
+    if path and os.path.exists(path) and not conf:
         # use the existing file if one exists and no config was passed
         with open(path) as f:
             conf = json.load(f)
     elif not conf:
         # if the file doesn't exist, create it and get the default config
-        conf = get_default()
-        os.makedirs(os.path.dirname(path), exist_ok=True)
+        conf = copy.deepcopy(get_default())
+        if path:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
 
-    # Check if the tile_dir exists and create a temp dir if not
+    # Check if the tile_dir exists and use a temp dir if not, the same one every time, so that
+    # applying the config again doesn't need new actors
     tile_dir = conf['mjolnir']['tile_dir']
     if not tile_dir or not Path(tile_dir).exists():
-        temp_dir = TemporaryDirectory()  # needs to be created explicitly
-        tile_dir = Path(temp_dir.name)
+        if _temp_tile_dir is None:
+            _temp_tile_dir = TemporaryDirectory()  # needs to be created explicitly
+        tile_dir = _temp_tile_dir.name
     tile_dir = Path(tile_dir)
     if not tile_dir.is_dir():
         raise ValueError("mjolnir.tile_dir={} is not a directory".format(tile_dir.resolve()))
@@ -57,13 +135,17 @@ def _create_config(path: str, tile_extract: str, c: dict, verbose: bool):
     conf["loki"]["logging"]["type"] = "std_out" if verbose is True else ""
     # If the tile extract path does not exist, raise
     if not tile_extract:
-        tile_extract = 'valhalla_tiles.tar'
+        tile_extract = conf['mjolnir'].get('tile_extract') or 'valhalla_tiles.tar'
     conf["mjolnir"]["tile_extract"] = str(Path(tile_extract).resolve())
+    # keep the tile caches warm across requests, evicting only the least recently used tiles
+    if cache_policy == 'lru':
+        conf["mjolnir"]["use_lru_mem_cache"] = True
 
-    # Finally write the config to the filesystem
-    with open(path, 'w') as f:
-        json.dump(conf, f, indent=2)
+    # Finally write the config to the filesystem, if there's a file
+    if path:
+        with open(path, 'w') as f:
+            json.dump(conf, f, indent=2)
 
     _global_config = conf
 
-    return
+    return conf
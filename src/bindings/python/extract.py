@@ -0,0 +1,53 @@
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Dict, Iterable, List, Sequence, Tuple, Union
+
+from .python_valhalla import _swap_extract, _warmup
+from .tiles import TileHierarchy
+
+
+def swap_extract(tile_extract: str):
+    """
+    Switches the service to the tile extract at ``tile_extract`` without downtime. The new tar
+    is mapped and read ahead by a new pool of actors, then new requests go to the new pool while
+    the requests in flight finish on the old one, which is released with its tar afterwards.
+    Unlike ``Configure`` this doesn't rewrite the config file.
+    """
+    from .config import _global_config
+
+    path = Path(tile_extract)
+    if not path.is_file():
+        raise ValueError("tile_extract={} is not a file.".format(path.resolve()))
+
+    _swap_extract(str(path.resolve()))
+
+    _global_config['mjolnir']['tile_extract'] = str(path.resolve())
+
+
+def warmup(bbox: Sequence[float] = None, levels: Iterable[int] = (0, 1, 2), tile_ids: Union[Iterable[Tuple[int, int]], Dict[int, List[int]]] = None, workers: int = 0) -> dict:
+    """
+    Pages the tiles of the tile extract in, so that the first requests don't have to wait for
+    them. Either the tiles of ``levels`` covering ``bbox`` (min_lon, min_lat, max_lon, max_lat),
+    which may cross the antimeridian, or the ``(level, tile_id)`` tuples of ``tile_ids``, which can
+    also be a ``{level: [tile_id]}`` dict. The tiles are read on ``workers`` threads, by default
+    one per CPU. The tiles of an extract written with ``compress=True`` are also inflated into the
+    tile cache of every actor, paging in the gzipped bytes alone would leave the inflating to the
+    first requests.
+    Returns the number of ``tiles`` found in the extract, their ``bytes``, ``resident_bytes`` and
+    the ``cached_tiles`` inflated into every tile cache, 0 for uncompressed extracts.
+    """
+    if (bbox is None) == (tile_ids is None):
+        raise ValueError("Either bbox or tile_ids must be specified.")
+
+    if tile_ids is None:
+        levels = list(levels)
+        if not set(levels) <= set(TileHierarchy.levels):
+            raise ValueError("levels must be some of {}".format(", ".join(map(str, TileHierarchy.levels))))
+        tiles = TileHierarchy.bbox_tiles(bbox, levels)
+    elif isinstance(tile_ids, Mapping):
+        tiles = [(level, tile_id) for level, ids in tile_ids.items() for tile_id in ids]
+    else:
+        tiles = [(level, tile_id) for level, tile_id in tile_ids]
+
+    return _warmup(tiles, workers)
+
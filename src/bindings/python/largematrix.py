@@ -0,0 +1,77 @@
+from typing import Any, Iterable, Iterator, NamedTuple, Tuple, Union
+
+from ._actions import _remaining
+from .python_valhalla import _Batch, _to_json, CancellationToken
+
+
+class MatrixBlock(NamedTuple):
+    """A finished block of a ``LargeMatrix``, its first row is the source at ``source_offset``
+    and its first column the target at ``target_offset``."""
+    source_offset: int
+    target_offset: int
+    durations: Any
+    distances: Any
+
+
+def _block_size(costing: str) -> int:
+    # as many locations as a single matrix request may have for the costing
+    from .config import _global_config
+
+    limits = _global_config.get('service_limits', {}).get(costing, {})
+    return int(limits.get('max_matrix_locations', 50))
+
+
+def LargeMatrix(sources: Iterable[dict], targets: Iterable[dict], costing: str, block_size: Union[int, Tuple[int, int]] = None, workers: int = 0, options: dict = None, durations=None, distances=None, timeout: float = None, deadline: float = None, token: CancellationToken = None) -> Iterator[MatrixBlock]:
+    """
+    Computes the matrix of all ``sources`` to all ``targets`` in blocks of ``block_size`` sources by
+    ``block_size`` targets (or a ``(sources, targets)`` tuple), by default the costing's
+    ``service_limits.max_matrix_locations``. The blocks are computed on ``workers`` native threads, by
+    default as many as the ``pool_size``, which keep their tile caches warm from one block to the next.
+    Yields every ``MatrixBlock`` as soon as it's finished, with NumPy ``durations`` (int32, -1 if
+    unreachable) and ``distances`` (float32, NaN if unreachable). If given, the ``durations`` and
+    ``distances`` arrays of shape (sources, targets), e.g. memory-mapped with ``numpy.lib.format.open_memmap``,
+    are filled with every block yielded. ``options`` are added to every request, ``timeout`` limits
+    every block and ``deadline`` the whole matrix. A failed block raises and stops the remaining ones.
+    """
+    sources, targets = list(sources), list(targets)
+    if not sources or not targets:
+        raise ValueError("At least one source and one target are needed.")
+
+    source_block, target_block = (block_size, block_size) if isinstance(block_size, int) or block_size is None else block_size
+    source_block = source_block or _block_size(costing)
+    target_block = target_block or _block_size(costing)
+    if source_block < 1 or target_block < 1:
+        raise ValueError("block_size must be positive.")
+
+    shape = (len(sources), len(targets))
+    for out in (durations, distances):
+        if out is not None and tuple(out.shape) != shape:
+            raise ValueError("The output arrays must have the shape {}.".format(shape))
+
+    offsets = [(i, j) for i in range(0, len(sources), source_block) for j in range(0, len(targets), target_block)]
+    requests = [_to_json(dict(options or {}, sources=sources[i:i + source_block], targets=targets[j:j + target_block], costing=costing)) for i, j in offsets]
+    batch = _Batch(
+        'sources_to_targets',
+        requests,
+        workers,
+        token,
+        -1. if timeout is None else timeout,
+        _remaining(None, deadline),
+        'numpy'
+    )
+    return _blocks(batch, offsets, durations, distances)
+
+
+def _blocks(batch: _Batch, offsets: list, durations, distances) -> Iterator[MatrixBlock]:
+    # closing the generator early abandons the blocks which haven't started yet
+    for index, arrays, error in batch:
+        if error is not None:
+            raise error
+        i, j = offsets[index]
+        block = MatrixBlock(i, j, *arrays)
+        rows, columns = block.durations.shape
+        if durations is not None:
+            durations[i:i + rows, j:j + columns] = block.durations
+        if distances is not None:
+            distances[i:i + rows, j:j + columns] = block.distances
+        yield block
@@ -0,0 +1,60 @@
+import math
+
+from .python_valhalla import _metrics
+
+
+def metrics() -> dict:
+    """
+    Returns what the requests did since the module was loaded: ``requests`` is a list with the
+    ``requests``, ``cached`` responses, ``errors`` by kind, the latency histogram as cumulative
+    ``buckets`` of (upper bound in seconds, requests) with their total ``seconds``, the seconds in
+    ``loki``, ``thor``, ``odin`` and ``tyr`` and the ``expanded_labels`` and ``tiles_loaded`` of
+    each ``action`` and ``costing``. ``response_cache`` has the hits, misses, entries and bytes of
+    the response cache, ``tile_cache`` the ``bytes`` of the tiles cached by its ``actors``.
+    Set ``statsd.host`` in the config to have every request pushed to statsd as well.
+    """
+    return _metrics()
+
+
+class PrometheusCollector:
+    """
+    Collects ``metrics()`` for the ``prometheus_client`` package, register it with
+    ``prometheus_client.REGISTRY.register(PrometheusCollector())``.
+    """
+
+    def __init__(self, namespace: str = 'valhalla'):
+        self.namespace = namespace
+
+    def collect(self):
+        from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily, HistogramMetricFamily
+
+        snapshot = metrics()
+        name = self.namespace + '_'
+        labels = ['action', 'costing']
+
+        requests = CounterMetricFamily(name + 'requests', 'The requests by action and costing.', labels=labels)
+        cached = CounterMetricFamily(name + 'cached_responses', 'The requests answered from the response cache.', labels=labels)
+        errors = CounterMetricFamily(name + 'errors', 'The failed requests by kind.', labels=labels + ['error'])
+        seconds = HistogramMetricFamily(name + 'request_seconds', 'The latency of the requests.', labels=labels)
+        stages = CounterMetricFamily(name + 'stage_seconds', 'The seconds the requests spent in loki, thor, odin and tyr.', labels=labels + ['stage'])
+        expanded = CounterMetricFamily(name + 'expanded_labels', 'The edge labels thor expanded.', labels=labels)
+        tiles = CounterMetricFamily(name + 'tiles_loaded', 'The tiles loaded into the tile caches.', labels=labels)
+        for series in snapshot['requests']:
+            values = [series['action'], series['costing']]
+            requests.add_metric(values, series['requests'])
+            cached.add_metric(values, series['cached'])
+            for error, count in series['errors'].items():
+                errors.add_metric(values + [error], count)
+            buckets = [('+Inf' if math.isinf(bound) else str(bound), count) for bound, count in series['buckets']]
+            seconds.add_metric(values, buckets, series['seconds'])
+            for stage in ('loki', 'thor', 'odin', 'tyr'):
+                stages.add_metric(values + [stage], series[stage])
+            expanded.add_metric(values, series['expanded_labels'])
+            tiles.add_metric(values, series['tiles_loaded'])
+        yield from (requests, cached, errors, seconds, stages, expanded, tiles)
+
+        response_cache = snapshot['response_cache']
+        yield CounterMetricFamily(name + 'response_cache_hits', 'The requests found in the response cache.', value=response_cache['hits'])
+        yield CounterMetricFamily(name + 'response_cache_misses', 'The requests not found in the response cache.', value=response_cache['misses'])
+        yield GaugeMetricFamily(name + 'response_cache_bytes', 'The memory of the cached responses.', value=response_cache['bytes'])
+        yield GaugeMetricFamily(name + 'tile_cache_bytes', 'The memory of the cached tiles of all actors.', value=snapshot['tile_cache']['bytes'])
@@ -1,116 +1,2509 @@
+#include <pybind11/numpy.h>
 #include <pybind11/pybind11.h>
 #include <pybind11/stl.h>
 
 #include <boost/noncopyable.hpp>
 #include <boost/optional.hpp>
 #include <boost/property_tree/ptree.hpp>
+#include <algorithm>
+#include <array>
+#include <atomic>
+#include <chrono>
+#include <cmath>
+#include <condition_variable>
+#include <cstdio>
+#include <ctime>
+#include <deque>
+#include <fstream>
+#include <functional>
+#include <limits>
+#include <list>
+#include <map>
+#include <memory>
+#include <mutex>
+#include <numeric>
 #include <sstream>
 #include <string>
+#include <thread>
+#include <unordered_map>
+#include <vector>
 
+#include <cpp-statsd-client/StatsdClient.hpp>
+
+#include "baldr/compression_utils.h"
+#include "baldr/graphmemory.h"
 #include "baldr/graphreader.h"
+#include "filesystem.h"
 #include "baldr/rapidjson_utils.h"
 #include "midgard/logging.h"
 #include "midgard/util.h"
+#include "mjolnir/osmdata.h"
 #include "mjolnir/util.h"
+#include "proto_conversions.h"
 #include "tyr/actor.h"
+#include "worker.h"
+
+#ifndef _WIN32
+#include <sys/mman.h>
+#include <sys/resource.h>
+#include <unistd.h>
+#endif
 
 namespace vm = valhalla::mjolnir;
 namespace vb = valhalla::baldr;
 namespace py = pybind11;
 
 namespace {
-static std::unique_ptr<valhalla::tyr::actor_t> actor = nullptr;
-
-// statically set the config file and configure logging, throw if you never configured
-// configuring multiple times is possible, e.g. to change service_limits
-const boost::property_tree::ptree& configure(const std::string& config_path = "",
-                                             const std::string& tile_extract = "",
-                                             py::dict config = {},
-                                             bool verbose = true) {
-  static boost::property_tree::ptree pt;
-
-  // only build config when called from binding's Configure!
-  if (!config_path.empty()) {
-    // create the config JSON on the filesystem via python and read it with rapidjson from file
-    py::object create_config = py::module_::import("valhalla.config").attr("_create_config");
-    create_config(config_path, tile_extract, config, verbose).cast<bool>();
+// all actions share the same signature on the actor
+using action_t = std::string (valhalla::tyr::actor_t::*)(const std::string&,
+                                                         const std::function<void()>*,
+                                                         valhalla::Api*);
+
+// raised when a request was stopped through its interrupt
+struct interrupted_error_t : public std::runtime_error {
+  using std::runtime_error::runtime_error;
+};
+
+// raised when a request was stopped because it ran out of time
+struct timeout_error_t : public interrupted_error_t {
+  using interrupted_error_t::interrupted_error_t;
+};
+
+// can be shared by any number of requests to cancel them all at once
+class cancellation_token_t {
+public:
+  void cancel() {
+    cancelled_ = true;
+  }
+  bool cancelled() const {
+    return cancelled_;
+  }
+
+private:
+  std::atomic<bool> cancelled_{false};
+};
+
+// handed to the actor's interrupt hook which the algorithms call periodically while expanding,
+// cancelling it, cancelling its token or passing its deadline stops the request at the next check
+class interrupt_t {
+public:
+  // a negative timeout in seconds means the request may take as long as it takes
+  interrupt_t(std::shared_ptr<cancellation_token_t> token = nullptr, double timeout = -1)
+      : token_(std::move(token)), deadline_(std::chrono::steady_clock::time_point::max()) {
+    if (timeout >= 0) {
+      deadline_ = std::chrono::steady_clock::now() +
+                  std::chrono::duration_cast<std::chrono::steady_clock::duration>(
+                      std::chrono::duration<double>(timeout));
+    }
+  }
+  void cancel() {
+    cancelled_ = true;
+  }
+  bool triggered() const {
+    return cancelled_ || (token_ && token_->cancelled()) || timed_out();
+  }
+  void operator()() const {
+    if (cancelled_ || (token_ && token_->cancelled())) {
+      throw interrupted_error_t("Request was cancelled");
+    }
+    if (timed_out()) {
+      throw timeout_error_t("Request timed out");
+    }
+  }
+
+private:
+  bool timed_out() const {
+    return deadline_ != std::chrono::steady_clock::time_point::max() &&
+           std::chrono::steady_clock::now() > deadline_;
+  }
+
+  std::shared_ptr<cancellation_token_t> token_;
+  std::chrono::steady_clock::time_point deadline_;
+  std::atomic<bool> cancelled_{false};
+};
+
+std::string gzip(const std::string& data, int level) {
+  auto src_func = [&data](z_stream& s) {
+    s.next_in = static_cast<Byte*>(static_cast<void*>(const_cast<char*>(data.data())));
+    s.avail_in = static_cast<unsigned int>(data.size());
+    return Z_FINISH;
+  };
+  std::string compressed;
+  size_t written = 0;
+  auto dst_func = [&compressed, &written, &data](z_stream& s) {
+    written = s.total_out;
+    if (written >= compressed.size()) {
+      // tiles usually shrink to less than half
+      size_t more = std::max<size_t>(data.size() / 2, 4096);
+      compressed.resize(written + more);
+      s.next_out = static_cast<Byte*>(static_cast<void*>(&compressed[written]));
+      s.avail_out = static_cast<unsigned int>(more);
+    }
+  };
+  if (!vb::deflate(src_func, dst_func, level, true)) {
+    throw std::runtime_error("Failed to gzip a tile");
+  }
+  compressed.resize(written);
+  return compressed;
+}
+
+// a GraphReader which can share the memory mapped tile extract of another reader, so that
+// every actor in the pool has its own tile cache but the tar is only indexed and mapped once
+class pool_reader_t : public vb::GraphReader {
+public:
+  explicit pool_reader_t(const boost::property_tree::ptree& pt) : vb::GraphReader(pt) {
+  }
+  pool_reader_t(const boost::property_tree::ptree& pt, const pool_reader_t& other)
+      : vb::GraphReader(without_extract(pt)) {
+    tile_extract_ = other.tile_extract_;
+  }
+
+  // counts the tiles loaded into the cache from the tile extract or the tile_dir, missing tiles
+  // aren't cached and aren't counted. the GraphReader inflates the gzipped tiles of extracts
+  // written with compress=True
+  vb::graph_tile_ptr GetGraphTile(const vb::GraphId& graphid) override {
+    if (!graphid.Is_Valid()) {
+      return nullptr;
+    }
+    if (const auto& cached = cache_->Get(graphid.Tile_Base())) {
+      return cached;
+    }
+    auto tile = vb::GraphReader::GetGraphTile(graphid);
+    if (tile) {
+      ++tiles_loaded;
+    }
+    return tile;
+  }
+
+  size_t extract_tiles() const {
+    return tile_extract_->tiles.size();
+  }
+
+  // whether the tiles of the extract are gzipped, BuildTiles compresses all of them or none
+  bool compressed_extract() const {
+    const auto& tiles = tile_extract_->tiles;
+    return !tiles.empty() && vb::GraphTile::IsCompressed(tiles.cbegin()->second.first,
+                                                         tiles.cbegin()->second.second);
+  }
+
+  // the tiles loaded into the cache by any reader on this thread, an actor runs a request on the
+  // calling thread
+  static thread_local size_t tiles_loaded;
+
+  // asks the kernel to read the whole tile extract into the page cache in the background
+  void prefetch() const {
+#ifndef _WIN32
+    for (const auto& archive : {tile_extract_->archive, tile_extract_->traffic_archive}) {
+      if (archive && archive->mm.get()) {
+        posix_madvise(archive->mm.get(), archive->mm.size(), POSIX_MADV_WILLNEED);
+      }
+    }
+#endif
+  }
+
+  // the memory of the given tiles and their traffic in the tile extracts, missing tiles are skipped
+  std::vector<std::pair<const char*, size_t>> extract_memory(const std::vector<vb::GraphId>& tiles,
+                                                             size_t& found) const {
+    std::vector<std::pair<const char*, size_t>> memory;
+    found = 0;
+    for (const auto& tile : tiles) {
+      auto graph = tile_extract_->tiles.find(tile.value);
+      if (graph == tile_extract_->tiles.cend()) {
+        continue;
+      }
+      ++found;
+      memory.emplace_back(graph->second.first, graph->second.second);
+      auto traffic = tile_extract_->traffic_tiles.find(tile.value);
+      if (traffic != tile_extract_->traffic_tiles.cend()) {
+        memory.emplace_back(traffic->second.first, traffic->second.second);
+      }
+    }
+    return memory;
+  }
+
+private:
+  static boost::property_tree::ptree without_extract(boost::property_tree::ptree pt) {
+    pt.erase("tile_extract");
+    pt.erase("traffic_extract");
+    return pt;
+  }
+};
+
+// the responses of repeated requests by their cache key, the least recently used ones are evicted
+// once they take more than max_bytes and any once they're older than ttl seconds (unless it's 0),
+// a max_bytes of 0 caches nothing
+class response_cache_t {
+public:
+  void limit(size_t max_bytes, double ttl) {
+    std::lock_guard<std::mutex> lock(mutex_);
+    max_bytes_ = max_bytes;
+    ttl_ = std::chrono::duration_cast<std::chrono::steady_clock::duration>(
+        std::chrono::duration<double>(ttl));
+    evict();
+  }
+
+  bool enabled() const {
+    return max_bytes_ > 0;
+  }
+
+  std::shared_ptr<const std::string> get(const std::string& key) {
+    std::lock_guard<std::mutex> lock(mutex_);
+    auto found = index_.find(key);
+    if (found == index_.end() || expired(*found->second)) {
+      if (found != index_.end()) {
+        erase(found->second);
+      }
+      ++misses;
+      return nullptr;
+    }
+    entries_.splice(entries_.begin(), entries_, found->second);
+    ++hits;
+    return found->second->response;
+  }
+
+  void put(std::string key, std::shared_ptr<const std::string> response) {
+    std::lock_guard<std::mutex> lock(mutex_);
+    size_t bytes = key.size() + response->size();
+    if (bytes > max_bytes_) {
+      return;
+    }
+    // a concurrent request for the same key may have put it already
+    auto inserted = index_.emplace(std::move(key), entries_.end());
+    if (!inserted.second) {
+      return;
+    }
+    entries_.push_front({&inserted.first->first, std::move(response),
+                         std::chrono::steady_clock::now(), bytes});
+    inserted.first->second = entries_.begin();
+    bytes_ += bytes;
+    evict();
+  }
+
+  void clear() {
+    std::lock_guard<std::mutex> lock(mutex_);
+    entries_.clear();
+    index_.clear();
+    bytes_ = 0;
+  }
+
+  std::pair<size_t, size_t> size() {
+    std::lock_guard<std::mutex> lock(mutex_);
+    return {entries_.size(), bytes_};
+  }
+
+  // counted across all pools since the module was loaded
+  static std::atomic<uint64_t> hits;
+  static std::atomic<uint64_t> misses;
+
+private:
+  struct entry_t {
+    // the key in the index, which doesn't move while the entry exists
+    const std::string* key;
+    std::shared_ptr<const std::string> response;
+    std::chrono::steady_clock::time_point created;
+    size_t bytes;
+  };
+
+  bool expired(const entry_t& entry) const {
+    return ttl_.count() > 0 && std::chrono::steady_clock::now() - entry.created > ttl_;
+  }
+
+  void erase(std::list<entry_t>::iterator entry) {
+    bytes_ -= entry->bytes;
+    auto key = entry->key;
+    entries_.erase(entry);
+    index_.erase(*key);
+  }
+
+  void evict() {
+    while (!entries_.empty() && (bytes_ > max_bytes_ || expired(entries_.back()))) {
+      erase(std::prev(entries_.end()));
+    }
+  }
+
+  // the most recently used first
+  std::list<entry_t> entries_;
+  std::unordered_map<std::string, std::list<entry_t>::iterator> index_;
+  std::atomic<size_t> max_bytes_{0};
+  std::chrono::steady_clock::duration ttl_{0};
+  size_t bytes_ = 0;
+  std::mutex mutex_;
+};
+
+std::atomic<uint64_t> response_cache_t::hits{0};
+std::atomic<uint64_t> response_cache_t::misses{0};
+
+thread_local size_t pool_reader_t::tiles_loaded = 0;
+
+// a fixed number of actors, every request checks one out exclusively so that concurrent
+// callers never share the graph reader or the algorithm state
+class actor_pool_t {
+public:
+  actor_pool_t(const boost::property_tree::ptree& config, size_t size) {
+    const auto& mjolnir = config.get_child("mjolnir");
+    // the workers time their serialization for the timing_t of the requests, and don't send
+    // anything to statsd themselves, the metrics_t pushes the requests under its own keys
+    auto actor_config = config;
+    actor_config.put("statsd.serialization_timing", true);
+    actor_config.put("statsd.host", "");
+    for (size_t i = 0; i < std::max<size_t>(size, 1); ++i) {
+      readers_.emplace_back(readers_.empty() ? new pool_reader_t(mjolnir)
+                                             : new pool_reader_t(mjolnir, *readers_.front()));
+      actors_.emplace_back(new valhalla::tyr::actor_t(actor_config, *readers_.back()));
+      idle_.push_back(actors_.back().get());
+    }
+    cache_bytes_.resize(actors_.size(), 0);
+  }
+
+  // runs the function with an actor from the pool, blocks until one is idle
+  template <typename function_t> std::string run(const function_t& function) {
+    auto* actor = checkout();
     try {
-      // parse the config
-      boost::property_tree::ptree temp_pt;
-      rapidjson::read_json(config_path, temp_pt);
-      pt = temp_pt;
-
-      // configure logging
-      boost::optional<boost::property_tree::ptree&> logging_subtree =
-          pt.get_child_optional("loki.logging");
-      if (logging_subtree) {
-        auto logging_config = valhalla::midgard::ToMap<const boost::property_tree::ptree&,
-                                                       std::unordered_map<std::string, std::string>>(
-            logging_subtree.get());
-        valhalla::midgard::logging::Configure(logging_config);
-      }
-    } catch (...) { throw std::runtime_error("Failed to load config from: " + config_path); }
-    // reset the actor
-    actor.reset(new valhalla::tyr::actor_t(pt, true));
-  }
-
-  // if it turned out no one ever configured us we throw
-  if (pt.empty()) {
+      auto result = function(*actor);
+      checkin(actor);
+      return result;
+    } catch (...) {
+      checkin(actor);
+      throw;
+    }
+  }
+
+  size_t size() const {
+    return actors_.size();
+  }
+
+  // all readers share the first one's tile extract
+  const pool_reader_t& reader() const {
+    return *readers_.front();
+  }
+
+  // the responses of this pool, they go with its tiles and config when it's replaced
+  response_cache_t& cache() {
+    return cache_;
+  }
+
+  // waits for the requests in flight and empties the tile caches of all actors
+  void clear() {
+    {
+      std::unique_lock<std::mutex> lock(mutex_);
+      wait_all_idle(lock);
+      for (auto& reader : readers_) {
+        reader->Clear();
+      }
+      std::fill(cache_bytes_.begin(), cache_bytes_.end(), 0);
+    }
+    idle_condition_.notify_all();
+  }
+
+  // applies the runtime sections of the config to all actors, once the requests in flight finished
+  void configure(const boost::property_tree::ptree& config) {
+    {
+      std::unique_lock<std::mutex> lock(mutex_);
+      wait_all_idle(lock);
+      for (auto& actor : actors_) {
+        actor->configure(config);
+      }
+    }
+    idle_condition_.notify_all();
+  }
+
+  // loads the tiles into the tile caches of all actors on up to ``workers`` threads, once the
+  // requests in flight finished, returns how many of the tiles every cache holds
+  size_t load_tiles(const std::vector<vb::GraphId>& tiles, size_t workers) {
+    std::atomic<size_t> loaded{0};
+    {
+      std::unique_lock<std::mutex> lock(mutex_);
+      wait_all_idle(lock);
+      std::atomic<size_t> next{0};
+      auto load = [&]() {
+        for (size_t i = next++; i < readers_.size(); i = next++) {
+          size_t found = 0;
+          for (const auto& tile : tiles) {
+            found += readers_[i]->GetGraphTile(tile) != nullptr;
+          }
+          cache_bytes_[i] = readers_[i]->GetCacheSize();
+          if (i == 0) {
+            loaded = found;
+          }
+        }
+      };
+      std::vector<std::thread> threads;
+      for (size_t i = 1; i < std::min(std::max<size_t>(workers, 1), readers_.size()); ++i) {
+        threads.emplace_back(load);
+      }
+      load();
+      for (auto& thread : threads) {
+        thread.join();
+      }
+    }
+    idle_condition_.notify_all();
+    return loaded;
+  }
+
+  // the memory of the tiles in the caches of all actors as of their last request
+  size_t tile_cache_bytes() {
+    std::lock_guard<std::mutex> lock(mutex_);
+    return std::accumulate(cache_bytes_.begin(), cache_bytes_.end(), size_t(0));
+  }
+
+private:
+  // waits for the requests in flight to finish, the new ones wait until the caller releases the
+  // lock, a steady stream of requests would never leave all actors idle otherwise
+  void wait_all_idle(std::unique_lock<std::mutex>& lock) {
+    ++waiting_all_idle_;
+    idle_condition_.wait(lock, [this] { return idle_.size() == actors_.size(); });
+    --waiting_all_idle_;
+  }
+
+  valhalla::tyr::actor_t* checkout() {
+    // a thread prefers the actor it used last, its tile cache is the warmest for that thread
+    thread_local const valhalla::tyr::actor_t* last = nullptr;
+    std::unique_lock<std::mutex> lock(mutex_);
+    idle_condition_.wait(lock, [this] { return waiting_all_idle_ == 0 && !idle_.empty(); });
+    auto found = std::find(idle_.begin(), idle_.end(), last);
+    if (found == idle_.end()) {
+      found = std::prev(idle_.end());
+    }
+    auto* actor = *found;
+    idle_.erase(found);
+    last = actor;
+    return actor;
+  }
+
+  void checkin(valhalla::tyr::actor_t* actor) {
+    // the algorithms need their state reset between requests, the tile cache however is only
+    // trimmed once it grows beyond mjolnir.max_cache_size, which mjolnir.use_lru_mem_cache
+    // does by evicting the least recently used tiles rather than all of them
+    actor->cleanup();
+    {
+      std::lock_guard<std::mutex> lock(mutex_);
+      // the reader is only safe to look at while no request uses it
+      auto index = std::find_if(actors_.begin(), actors_.end(),
+                                [actor](const auto& a) { return a.get() == actor; }) -
+                   actors_.begin();
+      cache_bytes_[index] = readers_[index]->GetCacheSize();
+      idle_.push_back(actor);
+    }
+    idle_condition_.notify_all();
+  }
+
+  // the readers need to outlive the actors referencing them
+  std::vector<std::unique_ptr<pool_reader_t>> readers_;
+  std::vector<std::unique_ptr<valhalla::tyr::actor_t>> actors_;
+  std::vector<valhalla::tyr::actor_t*> idle_;
+  std::vector<size_t> cache_bytes_;
+  size_t waiting_all_idle_ = 0;
+  std::mutex mutex_;
+  std::condition_variable idle_condition_;
+  response_cache_t cache_;
+};
+
+// where a request spent its seconds, tyr is the serialization of the response which isn't counted
+// for the worker serializing it, and how many edge labels thor expanded and tiles were loaded
+struct timing_t {
+  double total = 0;
+  double loki = 0;
+  double thor = 0;
+  double odin = 0;
+  double tyr = 0;
+  size_t expanded_labels = 0;
+  size_t tiles_loaded = 0;
+  bool cached = false;
+
+  // reads the statistics the workers recorded, "<action>.info.<worker>.<metric>"
+  void read(const valhalla::Api& api) {
+    // the serialization each worker recorded as "<worker>.tyr", it's part of the worker's time
+    std::map<std::string, double> workers, serializing;
+    for (const auto& stat : api.info().statistics()) {
+      const auto& key = stat.key();
+      auto info = key.find(".info.");
+      auto metric = key.rfind('.');
+      if (info == std::string::npos || metric == std::string::npos || metric < info + 6) {
+        continue;
+      }
+      auto name = key.substr(info + 6, metric - info - 6);
+      if (key.compare(metric + 1, std::string::npos, "expanded_labels") == 0) {
+        expanded_labels += static_cast<size_t>(stat.value());
+        continue;
+      }
+      if (key.compare(metric + 1, std::string::npos, "latency_ms") != 0) {
+        continue;
+      }
+      double seconds = stat.value() / 1000;
+      if (name.size() > 4 && name.compare(name.size() - 4, 4, ".tyr") == 0) {
+        serializing[name.substr(0, name.size() - 4)] += seconds;
+        tyr += seconds;
+      } else {
+        workers[name] += seconds;
+      }
+    }
+    loki += workers["loki"] - serializing["loki"];
+    thor += workers["thor"] - serializing["thor"];
+    odin += workers["odin"] - serializing["odin"];
+  }
+
+  py::dict to_dict() const {
+    py::dict timing;
+    timing["total"] = total;
+    timing["loki"] = loki;
+    timing["thor"] = thor;
+    timing["odin"] = odin;
+    timing["tyr"] = tyr;
+    timing["expanded_labels"] = expanded_labels;
+    timing["tiles_loaded"] = tiles_loaded;
+    timing["cached"] = cached;
+    return timing;
+  }
+};
+
+// the upper bounds in seconds of the latency histograms, the default buckets of prometheus clients
+const std::array<double, 11> latency_buckets{.005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10};
+
+// the requests of one action and costing since the module was loaded
+struct series_t {
+  uint64_t requests = 0;
+  uint64_t cached = 0;
+  // by their statsd key, or "timeout", "interrupted" and "error"
+  std::map<std::string, uint64_t> errors;
+  // the requests which took at most the bucket's seconds, the last one counts them all
+  std::array<uint64_t, latency_buckets.size() + 1> buckets{};
+  double seconds = 0;
+  timing_t stages;
+
+  py::dict to_dict() const {
+    py::dict series;
+    series["requests"] = requests;
+    series["cached"] = cached;
+    series["errors"] = errors;
+    py::list histogram;
+    for (size_t i = 0; i < buckets.size(); ++i) {
+      double bound = i < latency_buckets.size() ? latency_buckets[i]
+                                                : std::numeric_limits<double>::infinity();
+      histogram.append(py::make_tuple(bound, buckets[i]));
+    }
+    series["buckets"] = histogram;
+    series["seconds"] = seconds;
+    series["loki"] = stages.loki;
+    series["thor"] = stages.thor;
+    series["odin"] = stages.odin;
+    series["tyr"] = stages.tyr;
+    series["expanded_labels"] = stages.expanded_labels;
+    series["tiles_loaded"] = stages.tiles_loaded;
+    return series;
+  }
+};
+
+// how often the metrics are sent to statsd
+constexpr int kStatsdSendIntervalMs = 1000;
+
+// counts every request by action and costing and, if the config has a statsd.host, pushes them
+// to statsd like the services do but under "python", "<action>.info.python.<worker>.latency_ms"
+// and so on, so they don't mix with the series of the services
+class metrics_t {
+public:
+  void configure(const boost::property_tree::ptree& config) {
+    std::lock_guard<std::mutex> lock(mutex_);
+    if (statsd_) {
+      // sends what's left of the last batch
+      statsd_->flush();
+    }
+    statsd_.reset();
+    gauge_sent_ = {};
+    tags_.clear();
+    auto host = config.get<std::string>("statsd.host", "");
+    if (host.empty()) {
+      return;
+    }
+    // the client sends the batches over udp on its own thread, the requests only queue their
+    // metrics instead of sending them under the lock like the workers do after every request
+    statsd_.reset(new Statsd::StatsdClient(host, config.get<int>("statsd.port", 8125),
+                                           config.get<std::string>("statsd.prefix", ""),
+                                           config.get<uint64_t>("statsd.batch_size", 500),
+                                           kStatsdSendIntervalMs));
+    if (!statsd_->errorMessage().empty()) {
+      LOG_ERROR(statsd_->errorMessage());
+    }
+    auto tags = config.get_child_optional("statsd.tags");
+    if (tags) {
+      for (const auto& tag : *tags) {
+        tags_.push_back(tag.second.data());
+      }
+    }
+  }
+
+  // an empty error for a successful request
+  void record(const std::string& action,
+              const std::string& costing,
+              const timing_t& timing,
+              const std::string& error,
+              size_t tile_cache_bytes) {
+    std::lock_guard<std::mutex> lock(mutex_);
+    auto& series = series_[{action, costing}];
+    ++series.requests;
+    series.cached += timing.cached;
+    if (!error.empty()) {
+      ++series.errors[error];
+    }
+    size_t bucket = std::lower_bound(latency_buckets.begin(), latency_buckets.end(), timing.total) -
+                    latency_buckets.begin();
+    for (size_t i = bucket; i < series.buckets.size(); ++i) {
+      ++series.buckets[i];
+    }
+    series.seconds += timing.total;
+    series.stages.loki += timing.loki;
+    series.stages.thor += timing.thor;
+    series.stages.odin += timing.odin;
+    series.stages.tyr += timing.tyr;
+    series.stages.expanded_labels += timing.expanded_labels;
+    series.stages.tiles_loaded += timing.tiles_loaded;
+    tile_cache_bytes_ = tile_cache_bytes;
+
+    if (statsd_) {
+      push(action, costing, timing, error);
+    }
+  }
+
+  py::list snapshot() {
+    py::list requests;
+    std::lock_guard<std::mutex> lock(mutex_);
+    for (const auto& series : series_) {
+      auto dict = series.second.to_dict();
+      dict["action"] = series.first.first;
+      dict["costing"] = series.first.second;
+      requests.append(dict);
+    }
+    return requests;
+  }
+
+private:
+  void push(const std::string& action,
+            const std::string& costing,
+            const timing_t& timing,
+            const std::string& error) {
+    auto tags = tags_;
+    if (!costing.empty()) {
+      tags.push_back("costing:" + costing);
+    }
+    auto ms = [](double seconds) { return static_cast<unsigned int>(seconds * 1000 + 0.5); };
+    statsd_->count(action + ".info.python.requests", 1, 1.f, tags);
+    statsd_->timing(action + ".info.python.latency_ms", ms(timing.total), 1.f, tags);
+    if (!error.empty()) {
+      statsd_->count(action + ".error.python." + error, 1, 1.f, tags);
+    } else if (timing.cached) {
+      statsd_->count(action + ".info.python.cache_hit", 1, 1.f, tags);
+    } else {
+      for (const auto& stage : {std::make_pair("loki", timing.loki),
+                                std::make_pair("thor", timing.thor),
+                                std::make_pair("odin", timing.odin),
+                                std::make_pair("tyr", timing.tyr)}) {
+        if (stage.second > 0) {
+          statsd_->timing(action + ".info.python." + stage.first + ".latency_ms", ms(stage.second),
+                          1.f, tags);
+        }
+      }
+      if (timing.expanded_labels) {
+        statsd_->count(action + ".info.python.thor.expanded_labels",
+                       static_cast<int>(timing.expanded_labels), 1.f, tags);
+      }
+      if (timing.tiles_loaded) {
+        statsd_->count(action + ".info.python.tiles_loaded", static_cast<int>(timing.tiles_loaded),
+                       1.f, tags);
+      }
+    }
+    // the memory of the tile caches at most once per batch rather than with every request
+    auto now = std::chrono::steady_clock::now();
+    if (now - gauge_sent_ < std::chrono::milliseconds(kStatsdSendIntervalMs)) {
+      return;
+    }
+    gauge_sent_ = now;
+    statsd_->gauge("none.info.python.tile_cache_kb",
+                   static_cast<unsigned int>(tile_cache_bytes_ / 1024), 1.f, tags_);
+  }
+
+  // by action and costing
+  std::map<std::pair<std::string, std::string>, series_t> series_;
+  size_t tile_cache_bytes_ = 0;
+  std::unique_ptr<Statsd::StatsdClient> statsd_;
+  std::chrono::steady_clock::time_point gauge_sent_;
+  std::vector<std::string> tags_;
+  std::mutex mutex_;
+};
+
+static metrics_t metrics;
+
+// requests in flight keep the pool they started with alive when it's replaced by a new one
+static std::shared_ptr<actor_pool_t> pool = nullptr;
+static std::mutex pool_mutex;
+static size_t configured_pool_size = 1;
+static boost::property_tree::ptree configured;
+// the limits of the response cache of every pool, guarded by the pool_mutex
+static size_t cache_max_bytes = 0;
+static double cache_ttl = 0;
+// serialises the changes of the pool and the configured config, which build the next pool without
+// the GIL, another change waits for the lock without holding the GIL either
+static std::mutex configure_mutex;
+
+std::unique_lock<std::mutex> lock_configure() {
+  std::unique_lock<std::mutex> lock(configure_mutex, std::defer_lock);
+  py::gil_scoped_release release;
+  lock.lock();
+  return lock;
+}
+
+// the next pool serves all new requests, the previous one is released once its requests finished
+void install_pool(std::shared_ptr<actor_pool_t> next) {
+  std::shared_ptr<actor_pool_t> previous;
+  {
+    std::lock_guard<std::mutex> lock(pool_mutex);
+    next->cache().limit(cache_max_bytes, cache_ttl);
+    previous = std::move(pool);
+    pool = std::move(next);
+  }
+}
+
+void reset_pool(const boost::property_tree::ptree pt) {
+  // loading the tile extract doesn't need the GIL, the config is a copy which can't change meanwhile
+  py::gil_scoped_release release;
+  install_pool(std::make_shared<actor_pool_t>(pt, configured_pool_size));
+}
+
+// the config the service was configured with, throw if you never configured
+const boost::property_tree::ptree& configure() {
+  if (configured.empty()) {
     throw std::runtime_error("The service was not configured");
   }
+  return configured;
+}
 
+// the config without the sections the actors apply to their next requests, see actor_t::configure,
+// and those the bindings apply themselves, the logging and statsd
+boost::property_tree::ptree without_runtime(boost::property_tree::ptree pt) {
+  pt.erase("service_limits");
+  pt.erase("statsd");
+  if (auto loki = pt.get_child_optional("loki")) {
+    loki->erase("service_defaults");
+    loki->erase("logging");
+  }
+  // the matchers' candidate grid is only sized when they're constructed
+  if (auto meili = pt.get_child_optional("meili")) {
+    auto grid = meili->get_child_optional("grid");
+    boost::property_tree::ptree kept;
+    if (grid) {
+      kept.add_child("grid", *grid);
+    }
+    *meili = std::move(kept);
+  }
   return pt;
 }
 
-void py_configure(const std::string& config_file,
-                  const std::string& tile_extract,
-                  py::dict config,
-                  bool verbose) {
-  configure(config_file, tile_extract, std::move(config), verbose);
+// configures logging, the metrics and the actors with a JSON config, configuring multiple times is
+// possible, e.g. to change service_limits. The actors only need to be replaced if more than the
+// runtime sections of the config or the pool_size changed, returns whether they were
+bool py_configure(const std::string& config, size_t pool_size) {
+  boost::property_tree::ptree pt;
+  try {
+    std::stringstream stream(config);
+    rapidjson::read_json(stream, pt);
+  } catch (...) { throw std::runtime_error("Failed to load the config"); }
+  auto lock = lock_configure();
+
+  // configure logging
+  boost::optional<boost::property_tree::ptree&> logging_subtree =
+      pt.get_child_optional("loki.logging");
+  if (logging_subtree) {
+    auto logging_config = valhalla::midgard::ToMap<const boost::property_tree::ptree&,
+                                                   std::unordered_map<std::string, std::string>>(
+        logging_subtree.get());
+    valhalla::midgard::logging::Configure(logging_config);
+  }
+
+  std::shared_ptr<actor_pool_t> current;
+  {
+    std::lock_guard<std::mutex> lock(pool_mutex);
+    current = pool;
+  }
+  bool replace = !current || pool_size != configured_pool_size ||
+                 !(without_runtime(pt) == without_runtime(configured));
+  if (replace) {
+    configured_pool_size = pool_size;
+    reset_pool(pt);
+  } else {
+    py::gil_scoped_release release;
+    try {
+      current->configure(pt);
+    } catch (...) {
+      // the actors were fine with the current config
+      current->configure(configured);
+      throw;
+    }
+    // the responses may not be valid with other limits
+    current->cache().clear();
+  }
+  metrics.configure(pt);
+  configured = std::move(pt);
+  return replace;
 }
 
-bool py_build_tiles(const std::vector<std::string>& input_pbfs) {
+// maps and prefetches another tile extract with a new pool of actors, while the current pool keeps
+// serving the requests in flight, it's released with its mapping once they're finished
+void swap_extract(const std::string& tile_extract) {
+  auto lock = lock_configure();
   auto pt = configure();
+  pt.put("mjolnir.tile_extract", tile_extract);
+  {
+    py::gil_scoped_release release;
+    std::shared_ptr<actor_pool_t> next(new actor_pool_t(pt, configured_pool_size));
+    if (!next->reader().extract_tiles()) {
+      throw std::runtime_error("No tiles found in the tile extract " + tile_extract);
+    }
+    next->reader().prefetch();
+    install_pool(std::move(next));
+  }
+  configured = std::move(pt);
+}
+
+// resets the peak resident set size of the process, only linux supports it
+void reset_peak_rss() {
+  std::ofstream clear_refs("/proc/self/clear_refs");
+  if (clear_refs) {
+    clear_refs << "5";
+  }
+}
+
+// the peak resident set size in bytes since the last reset, or since the process started
+size_t peak_rss() {
+  std::ifstream status("/proc/self/status");
+  std::string line;
+  while (std::getline(status, line)) {
+    if (line.compare(0, 6, "VmHWM:") == 0) {
+      return std::stoull(line.substr(6)) * 1024;
+    }
+  }
+#ifdef _WIN32
+  return 0;
+#else
+  struct rusage usage {};
+  getrusage(RUSAGE_SELF, &usage);
+#ifdef __APPLE__
+  return usage.ru_maxrss;
+#else
+  return usage.ru_maxrss * 1024;
+#endif
+#endif
+}
 
+// the config of the tile builder
+boost::property_tree::ptree build_config(boost::property_tree::ptree pt) {
   // confuses the tile builder otherwise
   pt.get_child("mjolnir").erase("tile_extract");
   pt.get_child("mjolnir").erase("tile_url");
+  return pt;
+}
 
-  bool result = vm::build_tile_set(pt, input_pbfs, vm::BuildStage::kInitialize,
-                                   vm::BuildStage::kCleanup, false);
+// runs one stage of the tile build, "parse" are the three parse stages which share their data in
+// memory, returns the seconds it took and its peak resident set size
+std::pair<double, size_t> py_build_tiles(const std::vector<std::string>& input_pbfs,
+                                         const std::string& stage) {
+  auto pt = build_config(configure());
 
-  return result;
+  auto first = vm::string_to_buildstage(stage), last = first;
+  if (stage == "parse") {
+    first = vm::BuildStage::kParseWays;
+    last = vm::BuildStage::kParseNodes;
+  } else if (first == vm::BuildStage::kInvalid ||
+             (vm::BuildStage::kParseWays <= first && first <= vm::BuildStage::kParseNodes)) {
+    throw py::value_error("Unknown build stage: " + stage);
+  }
+
+  py::gil_scoped_release release;
+  reset_peak_rss();
+  auto start = std::chrono::steady_clock::now();
+  if (!vm::build_tile_set(pt, input_pbfs, first, last, false)) {
+    throw std::runtime_error("Building tiles failed.");
+  }
+  std::chrono::duration<double> seconds = std::chrono::steady_clock::now() - start;
+
+  return {seconds.count(), peak_rss()};
+}
+
+vm::BuildStage tile_part_stage(const std::string& stage) {
+  auto build_stage = vm::string_to_buildstage(stage);
+  if (build_stage != vm::BuildStage::kBuild && build_stage != vm::BuildStage::kEnhance) {
+    throw py::value_error("Only the build and enhance stages run in parts, not " + stage);
+  }
+  return build_stage;
+}
+
+// runs the part of the build or enhance stage which needs the whole graph, returns the tiles to
+// build in parts with their first node and the peak resident set size
+std::pair<std::vector<std::pair<uint64_t, size_t>>, size_t>
+prepare_tile_parts(const std::string& stage) {
+  auto build_stage = tile_part_stage(stage);
+  auto pt = build_config(configure());
+
+  py::gil_scoped_release release;
+  reset_peak_rss();
+  std::vector<std::pair<uint64_t, size_t>> tiles;
+  for (const auto& tile : vm::prepare_tile_parts(pt, build_stage)) {
+    tiles.emplace_back(tile.first.value, tile.second);
+  }
+  return {std::move(tiles), peak_rss()};
+}
+
+// the state of a process building parts of the tiles, its OSM data is read once for all its parts.
+// every process holds its own copy of the OSM data, the restrictions, names and other maps which
+// aren't in the memory mapped way and node files, so N processes take about N+1 times the memory
+// of those maps, the parent having read them too
+struct tile_part_worker_t {
+  boost::property_tree::ptree config;
+  vm::BuildStage stage;
+  vm::OSMData osm_data{0};
+};
+std::unique_ptr<tile_part_worker_t> tile_part_worker;
+
+void init_tile_part_worker(const std::string& config, const std::string& stage) {
+  auto worker = std::make_unique<tile_part_worker_t>();
+  std::stringstream stream(config);
+  rapidjson::read_json(stream, worker->config);
+  worker->config = build_config(std::move(worker->config));
+  // the processes are the concurrency
+  worker->config.put("mjolnir.concurrency", 1);
+  worker->stage = tile_part_stage(stage);
+
+  py::gil_scoped_release release;
+  if (!vm::read_tile_part_data(worker->config, worker->stage, worker->osm_data)) {
+    throw std::runtime_error("Failed to read the OSM data of the " + stage + " stage");
+  }
+  tile_part_worker = std::move(worker);
+}
+
+// builds a part of the tiles in the worker process, returns its peak resident set size so far
+size_t build_tile_part(const std::vector<std::pair<uint64_t, size_t>>& tiles) {
+  if (!tile_part_worker) {
+    throw std::runtime_error("The tile part worker was not initialized");
+  }
+  std::map<vb::GraphId, size_t> part;
+  for (const auto& tile : tiles) {
+    part.emplace(vb::GraphId(tile.first), tile.second);
+  }
+  vm::build_tile_part(tile_part_worker->config, tile_part_worker->stage, tile_part_worker->osm_data,
+                      part);
+  return peak_rss();
+}
+
+bool ends_with(const std::string& str, const std::string& suffix) {
+  return str.size() >= suffix.size() &&
+         str.compare(str.size() - suffix.size(), suffix.size(), suffix) == 0;
+}
+
+// a ustar header of a regular file
+valhalla::midgard::tar::header_t tar_header(const std::string& name, size_t size) {
+  valhalla::midgard::tar::header_t header{};
+  if (name.size() >= sizeof(header.name)) {
+    throw std::runtime_error("Tile path too long for the extract: " + name);
+  }
+  std::copy(name.begin(), name.end(), header.name);
+  snprintf(header.mode, sizeof(header.mode), "%07o", 0644);
+  snprintf(header.uid, sizeof(header.uid), "%07o", 0);
+  snprintf(header.gid, sizeof(header.gid), "%07o", 0);
+  snprintf(header.size, sizeof(header.size), "%011llo", static_cast<unsigned long long>(size));
+  snprintf(header.mtime, sizeof(header.mtime), "%011llo",
+           static_cast<unsigned long long>(std::time(nullptr)));
+  header.typeflag = '0';
+  std::copy_n("ustar", 6, header.magic);
+  std::copy_n("00", 2, header.version);
+  std::fill_n(header.chksum, sizeof(header.chksum), ' ');
+  unsigned int checksum = 0;
+  for (size_t i = 0; i < sizeof(header); ++i) {
+    checksum += reinterpret_cast<const unsigned char*>(&header)[i];
+  }
+  snprintf(header.chksum, sizeof(header.chksum) - 1, "%06o", checksum);
+  return header;
+}
+
+// writes all tiles of the tile_dir to a tar at tile_extract, sorted by their graph id and behind an
+// index.bin which lets readers map the tiles without scanning the whole tar. the tiles are read and
+// optionally gzipped by the workers while the tar is written in order, at most a few tiles ahead
+size_t write_extract(const std::string& tile_dir,
+                     const std::string& tile_extract,
+                     bool compress,
+                     size_t workers) {
+  std::string root = filesystem::path(tile_dir).string();
+  while (root.size() > 1 && root.back() == filesystem::path::preferred_separator) {
+    root.pop_back();
+  }
+  std::string prefix = root.substr(root.rfind(filesystem::path::preferred_separator) + 1);
+
+  std::vector<std::pair<vb::GraphId, std::string>> tiles;
+  for (filesystem::recursive_directory_iterator i(root), end; i != end; ++i) {
+    if (!i->is_regular_file()) {
+      continue;
+    }
+    // only the tiles go into the extract, gzipped ones as they are
+    auto path = i->path().string();
+    if (!ends_with(path, ".gph") && !ends_with(path, ".gph.gz")) {
+      continue;
+    }
+    try {
+      tiles.emplace_back(vb::GraphTile::GetTileId(path), path);
+    } catch (...) {}
+  }
+  std::sort(tiles.begin(), tiles.end(), [](const auto& a, const auto& b) {
+    return a.first.value < b.first.value;
+  });
+
+  workers = std::max<size_t>(1, workers ? workers : std::thread::hardware_concurrency());
+  const size_t window = workers * 8;
+  std::vector<std::string> contents(tiles.size());
+  std::vector<bool> ready(tiles.size(), false);
+  std::atomic<size_t> next{0};
+  size_t done = 0;
+  std::exception_ptr error;
+  std::mutex mutex;
+  std::condition_variable condition;
+  auto work = [&]() {
+    for (size_t i = next++; i < tiles.size(); i = next++) {
+      {
+        std::unique_lock<std::mutex> lock(mutex);
+        condition.wait(lock, [&] { return i < done + window || error; });
+        if (error) {
+          return;
+        }
+      }
+      try {
+        std::ifstream file(tiles[i].second, std::ios::binary);
+        std::string data((std::istreambuf_iterator<char>(file)), std::istreambuf_iterator<char>());
+        if (!file.good() && !file.eof()) {
+          throw std::runtime_error("Failed to read " + tiles[i].second);
+        }
+        if (compress && !vb::GraphTile::IsCompressed(data.data(), data.size())) {
+          data = gzip(data, Z_DEFAULT_COMPRESSION);
+        }
+        std::lock_guard<std::mutex> lock(mutex);
+        contents[i] = std::move(data);
+        ready[i] = true;
+      } catch (...) {
+        std::lock_guard<std::mutex> lock(mutex);
+        error = std::current_exception();
+      }
+      condition.notify_all();
+    }
+  };
+  std::vector<std::thread> threads;
+  for (size_t i = 0; i < workers; ++i) {
+    threads.emplace_back(work);
+  }
+
+  // the index comes first, its entries are filled in once the offsets are known
+  using index_entry_t = valhalla::midgard::tar::tile_index_entry;
+  const auto block = sizeof(valhalla::midgard::tar::header_t);
+  const std::string padding(block, '\0');
+  std::vector<index_entry_t> index;
+  index.reserve(tiles.size());
+  std::string temp_extract = tile_extract + ".tmp";
+  std::ofstream tar(temp_extract, std::ios::binary | std::ios::trunc);
+  auto write = [&tar, &padding, block](const std::string& name, const char* data, size_t size) {
+    auto header = tar_header(name, size);
+    tar.write(reinterpret_cast<const char*>(&header), block);
+    tar.write(data, size);
+    tar.write(padding.data(), (block - size % block) % block);
+  };
+  std::string index_data(tiles.size() * sizeof(index_entry_t), '\0');
+  write("index.bin", index_data.data(), index_data.size());
+
+  for (size_t i = 0; i < tiles.size() && tar; ++i) {
+    std::string data;
+    {
+      std::unique_lock<std::mutex> lock(mutex);
+      condition.wait(lock, [&] { return ready[i] || error; });
+      if (error) {
+        break;
+      }
+      data = std::move(contents[i]);
+      ++done;
+    }
+    condition.notify_all();
+
+    auto name = prefix + tiles[i].second.substr(root.size());
+    if (vb::GraphTile::IsCompressed(data.data(), data.size()) && !ends_with(name, ".gz")) {
+      name += ".gz";
+    }
+    std::replace(name.begin(), name.end(), filesystem::path::preferred_separator, '/');
+    index.push_back({static_cast<uint64_t>(tar.tellp()) + block,
+                     static_cast<uint32_t>(tiles[i].first.value),
+                     static_cast<uint32_t>(data.size())});
+    write(name, data.data(), data.size());
+  }
+  {
+    std::lock_guard<std::mutex> lock(mutex);
+    if (!tar && !error) {
+      error = std::make_exception_ptr(std::runtime_error("Failed to write " + temp_extract));
+    }
+    // stops the workers waiting for the writer
+    done = tiles.size();
+  }
+  condition.notify_all();
+  for (auto& thread : threads) {
+    thread.join();
+  }
+  if (error) {
+    tar.close();
+    std::remove(temp_extract.c_str());
+    std::rethrow_exception(error);
+  }
+
+  // the end of the archive and the index
+  tar.write(padding.data(), block);
+  tar.write(padding.data(), block);
+  tar.seekp(block);
+  tar.write(reinterpret_cast<const char*>(index.data()), index.size() * sizeof(index_entry_t));
+  tar.close();
+  // a new file in place of the old one, actors which still map the old extract keep reading it
+  if (!tar || std::rename(temp_extract.c_str(), tile_extract.c_str()) != 0) {
+    std::remove(temp_extract.c_str());
+    throw std::runtime_error("Failed to write " + tile_extract);
+  }
+  return tiles.size();
 }
 
 void reset_actor() {
-  auto pt = configure();
-  actor.reset(new valhalla::tyr::actor_t(pt, true));
+  auto lock = lock_configure();
+  reset_pool(configure());
+}
+
+std::shared_ptr<actor_pool_t> current_pool() {
+  std::shared_ptr<actor_pool_t> current;
+  {
+    std::lock_guard<std::mutex> lock(pool_mutex);
+    current = pool;
+  }
+  if (!current) {
+    throw std::runtime_error("The service was not configured");
+  }
+  return current;
+}
+
+void py_cleanup() {
+  current_pool()->clear();
+}
+
+// runs a request through an actor of the pool, is called without holding the GIL
+std::string act(actor_pool_t& pool,
+                action_t action,
+                const std::string& request,
+                const interrupt_t* interrupt,
+                valhalla::Api* api = nullptr) {
+  std::function<void()> hook = [interrupt]() { (*interrupt)(); };
+  try {
+    return pool.run([&](valhalla::tyr::actor_t& actor) {
+      if (!interrupt) {
+        return (actor.*action)(request, nullptr, api);
+      }
+      hook();
+      return (actor.*action)(request, &hook, api);
+    });
+  } catch (...) {
+    // some algorithms swallow or rewrap exceptions, the interrupt knows what really happened
+    if (interrupt && interrupt->triggered()) {
+      hook();
+    }
+    throw;
+  }
+}
+
+const std::unordered_map<std::string, action_t>& actions() {
+  using valhalla::tyr::actor_t;
+  static const std::unordered_map<std::string, action_t> actions{
+      {"route", &actor_t::route},
+      {"locate", &actor_t::locate},
+      {"optimized_route", &actor_t::optimized_route},
+      {"sources_to_targets", &actor_t::matrix},
+      {"isochrone", &actor_t::isochrone},
+      {"trace_route", &actor_t::trace_route},
+      {"trace_attributes", &actor_t::trace_attributes},
+      {"height", &actor_t::height},
+      {"transit_available", &actor_t::transit_available},
+      {"expansion", &actor_t::expansion},
+      {"centroid", &actor_t::centroid},
+  };
+  return actions;
+}
+
+const std::string& action_name(action_t action) {
+  for (const auto& named : actions()) {
+    if (named.second == action) {
+      return named.first;
+    }
+  }
+  throw std::invalid_argument("Unknown action");
+}
+
+// writes the value with the members of all objects sorted by their name
+void write_sorted(const rapidjson::Value& value, rapidjson::Writer<rapidjson::StringBuffer>& writer) {
+  if (value.IsObject()) {
+    std::vector<const rapidjson::Value::Member*> members;
+    for (const auto& member : value.GetObject()) {
+      members.push_back(&member);
+    }
+    std::sort(members.begin(), members.end(), [](const auto* a, const auto* b) {
+      return std::lexicographical_compare(a->name.GetString(),
+                                          a->name.GetString() + a->name.GetStringLength(),
+                                          b->name.GetString(),
+                                          b->name.GetString() + b->name.GetStringLength());
+    });
+    writer.StartObject();
+    for (const auto* member : members) {
+      writer.Key(member->name.GetString(), member->name.GetStringLength());
+      write_sorted(member->value, writer);
+    }
+    writer.EndObject();
+  } else if (value.IsArray()) {
+    writer.StartArray();
+    for (const auto& element : value.GetArray()) {
+      write_sorted(element, writer);
+    }
+    writer.EndArray();
+  } else {
+    value.Accept(writer);
+  }
+}
+
+// the costing of a parsed request, empty if it has none
+std::string request_costing(const rapidjson::Document& document) {
+  if (!document.IsObject()) {
+    return {};
+  }
+  auto costing = document.FindMember("costing");
+  return costing != document.MemberEnd() && costing->value.IsString() ? costing->value.GetString()
+                                                                      : "";
+}
+
+std::string request_costing(const std::string& request) {
+  rapidjson::Document document;
+  document.Parse(request.c_str(), request.size());
+  return document.HasParseError() ? "" : request_costing(document);
+}
+
+// the request asking for the Api instead of a serialized response, the workers skip serializing
+// the directions, see odin_worker_t::narrate. a broken request is left for the actor to report
+std::string with_pbf_format(const std::string& request) {
+  rapidjson::Document document;
+  document.Parse<rapidjson::kParseFullPrecisionFlag>(request.c_str(), request.size());
+  if (document.HasParseError() || !document.IsObject()) {
+    return request;
+  }
+  document.RemoveMember("format");
+  document.AddMember("format", "pbf", document.GetAllocator());
+  rapidjson::StringBuffer buffer;
+  rapidjson::Writer<rapidjson::StringBuffer> writer(buffer);
+  document.Accept(writer);
+  return buffer.GetString();
+}
+
+// the action, the output and the request with sorted keys, so that requests which only differ in
+// the order of their keys or in whitespace share a response, empty if the response can't be reused,
+// the request's costing is handed out on the way
+std::string cache_key(action_t action, const std::string& request, bool pbf, std::string& costing) {
+  rapidjson::Document document;
+  document.Parse<rapidjson::kParseFullPrecisionFlag>(request.c_str(), request.size());
+  if (document.HasParseError()) {
+    return {};
+  }
+  costing = request_costing(document);
+  // a request at the current time gets another response as time goes by
+  if (document.IsObject()) {
+    auto date_time = document.FindMember("date_time");
+    if (date_time != document.MemberEnd() && date_time->value.IsObject()) {
+      auto type = date_time->value.FindMember("type");
+      if (type != date_time->value.MemberEnd() && type->value.IsInt() && type->value.GetInt() == 0) {
+        return {};
+      }
+    }
+  }
+  rapidjson::StringBuffer buffer;
+  rapidjson::Writer<rapidjson::StringBuffer> writer(buffer);
+  write_sorted(document, writer);
+  return action_name(action) + (pbf ? " pbf " : " json ") + buffer.GetString();
+}
+
+// the JSON response or, for pbf, the serialized Api with everything the workers filled in,
+// repeated requests are answered from the pool's response cache if it's enabled, a timing
+// gets where the request spent its time, every request is counted in the metrics
+std::string respond(actor_pool_t& pool,
+                    action_t action,
+                    const std::string& request,
+                    const interrupt_t* interrupt,
+                    bool pbf,
+                    timing_t* timing = nullptr) {
+  auto start = std::chrono::steady_clock::now();
+  auto elapsed = [start]() {
+    return std::chrono::duration<double>(std::chrono::steady_clock::now() - start).count();
+  };
+  timing_t measured;
+  if (!timing) {
+    timing = &measured;
+  }
+  auto& cache = pool.cache();
+  std::string costing;
+  std::string key = cache.enabled() ? cache_key(action, request, pbf, costing) : std::string();
+  if (!key.empty()) {
+    if (auto cached = cache.get(key)) {
+      timing->cached = true;
+      timing->total = elapsed();
+      metrics.record(action_name(action), costing, *timing, "", pool.tile_cache_bytes());
+      return *cached;
+    }
+  }
+
+  std::string response;
+  valhalla::Api api;
+  size_t tiles_loaded = pool_reader_t::tiles_loaded;
+  auto failed = [&](const std::string& error) {
+    timing->tiles_loaded = pool_reader_t::tiles_loaded - tiles_loaded;
+    timing->total = elapsed();
+    metrics.record(action_name(action), costing.empty() ? request_costing(request) : costing,
+                   *timing, error, pool.tile_cache_bytes());
+  };
+  try {
+    response = act(pool, action, pbf ? with_pbf_format(request) : request, interrupt, &api);
+  } catch (const timeout_error_t&) {
+    failed("timeout");
+    throw;
+  } catch (const interrupted_error_t&) {
+    failed("interrupted");
+    throw;
+  } catch (const valhalla::valhalla_exception_t& e) {
+    failed(e.statsd_key.empty() ? "error" : e.statsd_key);
+    throw;
+  } catch (...) {
+    failed("error");
+    throw;
+  }
+  if (pbf) {
+    response = api.SerializeAsString();
+  }
+  timing->read(api);
+  timing->tiles_loaded = pool_reader_t::tiles_loaded - tiles_loaded;
+  timing->total = elapsed();
+  if (api.options().has_costing()) {
+    costing = valhalla::Costing_Enum_Name(api.options().costing());
+  }
+  metrics.record(action_name(action), costing, *timing, "", pool.tile_cache_bytes());
+
+  if (!key.empty()) {
+    cache.put(std::move(key), std::make_shared<const std::string>(response));
+  }
+  return response;
+}
+
+// limits the response cache of the current and all future pools
+void set_response_cache(size_t max_bytes, double ttl) {
+  std::lock_guard<std::mutex> lock(pool_mutex);
+  cache_max_bytes = max_bytes;
+  cache_ttl = ttl;
+  if (pool) {
+    pool->cache().limit(max_bytes, ttl);
+  }
+}
+
+py::dict response_cache_info() {
+  auto size = current_pool()->cache().size();
+  py::dict info;
+  info["hits"] = response_cache_t::hits.load();
+  info["misses"] = response_cache_t::misses.load();
+  info["entries"] = size.first;
+  info["bytes"] = size.second;
+  {
+    std::lock_guard<std::mutex> lock(pool_mutex);
+    info["max_bytes"] = cache_max_bytes;
+    info["ttl"] = cache_ttl;
+  }
+  return info;
+}
+
+// the metrics of the requests and of the caches of the current pool
+py::dict metrics_snapshot() {
+  auto current = current_pool();
+  py::dict snapshot;
+  snapshot["requests"] = metrics.snapshot();
+  auto size = current->cache().size();
+  py::dict response_cache;
+  response_cache["hits"] = response_cache_t::hits.load();
+  response_cache["misses"] = response_cache_t::misses.load();
+  response_cache["entries"] = size.first;
+  response_cache["bytes"] = size.second;
+  snapshot["response_cache"] = response_cache;
+  py::dict tile_cache;
+  tile_cache["bytes"] = current->tile_cache_bytes();
+  tile_cache["actors"] = current->size();
+  snapshot["tile_cache"] = tile_cache;
+  return snapshot;
+}
+
+// serializes a request the way json.dumps would, without the detour through a python str
+void to_json(py::handle obj, rapidjson::Writer<rapidjson::StringBuffer>& writer) {
+  PyObject* ptr = obj.ptr();
+  if (ptr == Py_None) {
+    writer.Null();
+  } else if (PyBool_Check(ptr)) {
+    writer.Bool(ptr == Py_True);
+  } else if (PyLong_Check(ptr)) {
+    int overflow = 0;
+    auto value = PyLong_AsLongLongAndOverflow(ptr, &overflow);
+    if (overflow > 0) {
+      auto unsigned_value = PyLong_AsUnsignedLongLong(ptr);
+      if (PyErr_Occurred()) {
+        throw py::error_already_set();
+      }
+      writer.Uint64(unsigned_value);
+    } else if (overflow < 0) {
+      throw py::value_error("Integer " + py::repr(obj).cast<std::string>() + " is out of range");
+    } else {
+      writer.Int64(value);
+    }
+  } else if (PyFloat_Check(ptr)) {
+    if (!writer.Double(PyFloat_AS_DOUBLE(ptr))) {
+      throw py::value_error("Out of range float values are not JSON compliant");
+    }
+  } else if (PyUnicode_Check(ptr)) {
+    Py_ssize_t size;
+    const char* data = PyUnicode_AsUTF8AndSize(ptr, &size);
+    if (!data) {
+      throw py::error_already_set();
+    }
+    writer.String(data, static_cast<rapidjson::SizeType>(size));
+  } else if (PyDict_Check(ptr)) {
+    writer.StartObject();
+    PyObject *key, *value;
+    Py_ssize_t pos = 0;
+    while (PyDict_Next(ptr, &pos, &key, &value)) {
+      // like json.dumps, keys which aren't str are written as their JSON representation
+      if (PyUnicode_Check(key)) {
+        Py_ssize_t size;
+        const char* data = PyUnicode_AsUTF8AndSize(key, &size);
+        if (!data) {
+          throw py::error_already_set();
+        }
+        writer.Key(data, static_cast<rapidjson::SizeType>(size));
+      } else {
+        rapidjson::StringBuffer key_buffer;
+        rapidjson::Writer<rapidjson::StringBuffer> key_writer(key_buffer);
+        to_json(key, key_writer);
+        std::string key_str = key_buffer.GetString();
+        if (!key_str.empty() && key_str.front() == '"') {
+          throw py::type_error("keys must be str, int, float, bool or None");
+        }
+        writer.Key(key_str.c_str(), static_cast<rapidjson::SizeType>(key_str.size()));
+      }
+      to_json(value, writer);
+    }
+    writer.EndObject();
+  } else if (PyList_Check(ptr) || PyTuple_Check(ptr)) {
+    writer.StartArray();
+    for (auto item : py::reinterpret_borrow<py::sequence>(obj)) {
+      to_json(item, writer);
+    }
+    writer.EndArray();
+  } else {
+    throw py::type_error("Object of type " + std::string(Py_TYPE(ptr)->tp_name) +
+                         " is not JSON serializable");
+  }
+}
+
+std::string to_json(py::handle obj) {
+  rapidjson::StringBuffer buffer;
+  rapidjson::Writer<rapidjson::StringBuffer> writer(buffer);
+  to_json(obj, writer);
+  return std::string(buffer.GetString(), buffer.GetSize());
+}
+
+py::object steal(PyObject* ptr) {
+  if (!ptr) {
+    throw py::error_already_set();
+  }
+  return py::reinterpret_steal<py::object>(ptr);
+}
+
+// builds the python objects json.loads would, straight from the parsed response
+py::object from_json(const rapidjson::Value& value) {
+  switch (value.GetType()) {
+    case rapidjson::kNullType:
+      return py::none();
+    case rapidjson::kFalseType:
+      return py::bool_(false);
+    case rapidjson::kTrueType:
+      return py::bool_(true);
+    case rapidjson::kNumberType:
+      if (value.IsInt64()) {
+        return steal(PyLong_FromLongLong(value.GetInt64()));
+      } else if (value.IsUint64()) {
+        return steal(PyLong_FromUnsignedLongLong(value.GetUint64()));
+      }
+      return steal(PyFloat_FromDouble(value.GetDouble()));
+    case rapidjson::kStringType:
+      return steal(PyUnicode_FromStringAndSize(value.GetString(), value.GetStringLength()));
+    case rapidjson::kArrayType: {
+      auto list = steal(PyList_New(value.Size()));
+      Py_ssize_t i = 0;
+      for (const auto& item : value.GetArray()) {
+        PyList_SET_ITEM(list.ptr(), i++, from_json(item).release().ptr());
+      }
+      return list;
+    }
+    case rapidjson::kObjectType: {
+      auto dict = steal(PyDict_New());
+      for (const auto& member : value.GetObject()) {
+        // the same keys repeat over and over, e.g. in maneuvers, so they share one str
+        PyObject* key =
+            PyUnicode_FromStringAndSize(member.name.GetString(), member.name.GetStringLength());
+        if (!key) {
+          throw py::error_already_set();
+        }
+        PyUnicode_InternInPlace(&key);
+        auto key_obj = steal(key);
+        if (PyDict_SetItem(dict.ptr(), key_obj.ptr(), from_json(member.value).ptr()) != 0) {
+          throw py::error_already_set();
+        }
+      }
+      return dict;
+    }
+  }
+  return py::none();
+}
+
+// parses in place, needs no GIL
+void parse_json(std::string& json, rapidjson::Document& document) {
+  document.ParseInsitu<rapidjson::kParseFullPrecisionFlag>(&json[0]);
+  if (document.HasParseError()) {
+    throw std::runtime_error("Failed to parse the response: " +
+                             std::string(rapidjson::GetParseError_En(document.GetParseError())));
+  }
+}
+
+py::object from_json(std::string json) {
+  rapidjson::Document document;
+  parse_json(json, document);
+  return from_json(document);
 }
+
+// a matrix of sources (rows) to targets (columns) in row major order
+struct matrix_t {
+  std::vector<int32_t> durations;
+  std::vector<float> distances;
+  size_t rows = 0;
+  size_t columns = 0;
+};
+
+// reads a matrix response and fills the sources_to_targets (or the osrm durations and distances)
+// straight into flat arrays, unreachable pairs are -1 seconds and NaN meters, the rest of the
+// response is forwarded to the document
+class matrix_reader_t {
+public:
+  explicit matrix_reader_t(rapidjson::Document& document) : document_(document) {
+  }
+
+  bool Null() {
+    return capture_ == capture_t::none ? document_.Null() : value(boost::none);
+  }
+  bool Bool(bool b) {
+    return capture_ == capture_t::none ? document_.Bool(b) : value(boost::none);
+  }
+  bool Int(int i) {
+    return capture_ == capture_t::none ? document_.Int(i) : value(double(i));
+  }
+  bool Uint(unsigned u) {
+    return capture_ == capture_t::none ? document_.Uint(u) : value(double(u));
+  }
+  bool Int64(int64_t i) {
+    return capture_ == capture_t::none ? document_.Int64(i) : value(double(i));
+  }
+  bool Uint64(uint64_t u) {
+    return capture_ == capture_t::none ? document_.Uint64(u) : value(double(u));
+  }
+  bool Double(double d) {
+    return capture_ == capture_t::none ? document_.Double(d) : value(d);
+  }
+  bool RawNumber(const char* str, rapidjson::SizeType length, bool copy) {
+    return capture_ == capture_t::none ? document_.RawNumber(str, length, copy) : false;
+  }
+  bool String(const char* str, rapidjson::SizeType length, bool copy) {
+    return capture_ == capture_t::none ? document_.String(str, length, copy) : value(boost::none);
+  }
+  bool StartObject() {
+    ++depth_;
+    if (capture_ == capture_t::none) {
+      return document_.StartObject();
+    }
+    // a new pair of the sources_to_targets, unreachable until its time and distance are read
+    if (capture_ == capture_t::pairs && depth_ == key_depth_ + 3) {
+      matrix.durations.push_back(-1);
+      matrix.distances.push_back(std::numeric_limits<float>::quiet_NaN());
+    }
+    return true;
+  }
+  bool Key(const char* str, rapidjson::SizeType length, bool copy) {
+    if (capture_ != capture_t::none) {
+      field_ = std::string(str, length);
+      return true;
+    }
+    // only the top level arrays are captured, nested keys with the same names are kept
+    if (depth_ == 1) {
+      std::string key(str, length);
+      capture_ = key == "sources_to_targets" ? capture_t::pairs
+                 : key == "durations"        ? capture_t::durations
+                 : key == "distances"        ? capture_t::distances
+                                             : capture_t::none;
+      if (capture_ != capture_t::none) {
+        key_depth_ = depth_;
+        ++skipped_;
+        return true;
+      }
+    }
+    return document_.Key(str, length, copy);
+  }
+  bool EndObject(rapidjson::SizeType count) {
+    --depth_;
+    if (capture_ == capture_t::none) {
+      return document_.EndObject(depth_ == 0 ? count - skipped_ : count);
+    }
+    return true;
+  }
+  bool StartArray() {
+    ++depth_;
+    return capture_ == capture_t::none ? document_.StartArray() : true;
+  }
+  bool EndArray(rapidjson::SizeType count) {
+    if (capture_ == capture_t::none) {
+      --depth_;
+      return document_.EndArray(count);
+    }
+    // a row of the matrix ends, the distances repeat the rows of the durations
+    if (depth_ == key_depth_ + 2 && capture_ != capture_t::distances) {
+      ++matrix.rows;
+      matrix.columns = count;
+    }
+    if (--depth_ == key_depth_) {
+      capture_ = capture_t::none;
+    }
+    return true;
+  }
+
+  matrix_t matrix;
+
+private:
+  enum class capture_t { none, pairs, durations, distances };
+
+  bool value(const boost::optional<double>& number) {
+    if (depth_ == key_depth_) {
+      // not an array after all, drop it like the arrays
+      capture_ = capture_t::none;
+    } else if (capture_ == capture_t::pairs && depth_ == key_depth_ + 3 && number) {
+      if (field_ == "time") {
+        matrix.durations.back() = static_cast<int32_t>(*number);
+      } else if (field_ == "distance") {
+        matrix.distances.back() = static_cast<float>(*number);
+      }
+    } else if (capture_ == capture_t::durations && depth_ == key_depth_ + 2) {
+      matrix.durations.push_back(number ? static_cast<int32_t>(*number) : -1);
+    } else if (capture_ == capture_t::distances && depth_ == key_depth_ + 2) {
+      matrix.distances.push_back(number ? static_cast<float>(*number)
+                                        : std::numeric_limits<float>::quiet_NaN());
+    }
+    return true;
+  }
+
+  rapidjson::Document& document_;
+  capture_t capture_ = capture_t::none;
+  std::string field_;
+  size_t depth_ = 0;
+  size_t key_depth_ = 0;
+  rapidjson::SizeType skipped_ = 0;
+};
+
+// the array takes over the buffer of the vector instead of copying it
+template <typename T>
+py::array_t<T> to_array(std::vector<T>&& values, const std::vector<py::ssize_t>& shape) {
+  auto* owner = new std::vector<T>(std::move(values));
+  py::capsule free(owner, [](void* values) { delete static_cast<std::vector<T>*>(values); });
+  return py::array_t<T>(shape, owner->data(), free);
+}
+
+matrix_t read_matrix(std::string& response, rapidjson::Document& document) {
+  matrix_reader_t reader(document);
+  auto generator = [&](rapidjson::Document&) {
+    rapidjson::Reader parser;
+    rapidjson::InsituStringStream stream(&response[0]);
+    if (!parser.Parse<rapidjson::kParseInsituFlag | rapidjson::kParseFullPrecisionFlag>(stream,
+                                                                                        reader)) {
+      throw std::runtime_error("Failed to parse the response: " +
+                               std::string(rapidjson::GetParseError_En(parser.GetParseErrorCode())));
+    }
+    return true;
+  };
+  document.Populate(generator);
+  // both are complete for valhalla's responses, this only guards the shape of the arrays
+  matrix_t& matrix = reader.matrix;
+  matrix.durations.resize(matrix.rows * matrix.columns, -1);
+  matrix.distances.resize(matrix.rows * matrix.columns, std::numeric_limits<float>::quiet_NaN());
+  return std::move(matrix);
+}
+
+// (durations, distances) arrays
+py::tuple to_arrays(matrix_t&& matrix) {
+  std::vector<py::ssize_t> shape{py::ssize_t(matrix.rows), py::ssize_t(matrix.columns)};
+  return py::make_tuple(to_array(std::move(matrix.durations), shape),
+                        to_array(std::move(matrix.distances), shape));
+}
+
+py::object matrix_arrays(const py::object& req,
+                         const interrupt_t* interrupt,
+                         const py::object& report) {
+  std::string request = py::isinstance<py::dict>(req) ? to_json(req) : req.cast<std::string>();
+  std::string response;
+  rapidjson::Document document;
+  matrix_t matrix;
+  timing_t timing;
+  {
+    py::gil_scoped_release release;
+    response = respond(*current_pool(), &valhalla::tyr::actor_t::matrix, request, interrupt, false,
+                       report.is_none() ? nullptr : &timing);
+    matrix = read_matrix(response, document);
+  }
+  py::dict result = from_json(document);
+  py::tuple arrays = to_arrays(std::move(matrix));
+  result["durations"] = arrays[0];
+  result["distances"] = arrays[1];
+  if (!report.is_none()) {
+    report(timing.to_dict());
+  }
+  return std::move(result);
+}
+
+action_t get_action(const std::string& name) {
+  auto found = actions().find(name);
+  if (found == actions().cend()) {
+    throw std::invalid_argument("Unknown action: " + name);
+  }
+  return found->second;
+}
+
+// a varint of google's polyline algorithm, zigzag encoded in 5 bit chunks offset by 63
+int64_t read_polyline_value(const char*& it, const char* end) {
+  int64_t result = 0;
+  int shift = 0;
+  int byte;
+  do {
+    if (it == end || shift > 60) {
+      throw std::invalid_argument("Invalid polyline");
+    }
+    byte = *it++ - 63;
+    if (byte < 0 || byte > 63) {
+      throw std::invalid_argument("Invalid polyline");
+    }
+    result |= int64_t(byte & 0x1f) << shift;
+    shift += 5;
+  } while (byte >= 0x20);
+  return result & 1 ? ~(result >> 1) : result >> 1;
+}
+
+void write_polyline_value(int64_t value, std::string& polyline) {
+  uint64_t bits = value < 0 ? ~(uint64_t(value) << 1) : uint64_t(value) << 1;
+  while (bits >= 0x20) {
+    polyline.push_back(static_cast<char>((0x20 | (bits & 0x1f)) + 63));
+    bits >>= 5;
+  }
+  polyline.push_back(static_cast<char>(bits + 63));
+}
+
+// appends the coordinates of the polyline, the elevation of 3d polylines has a precision of 2
+void decode_polyline(const std::string& polyline,
+                     double factor,
+                     bool latlng,
+                     bool is3d,
+                     std::vector<double>& coordinates) {
+  int64_t lat = 0, lng = 0, z = 0;
+  const char* it = polyline.data();
+  const char* end = it + polyline.size();
+  while (it != end) {
+    lat += read_polyline_value(it, end);
+    lng += read_polyline_value(it, end);
+    coordinates.push_back((latlng ? lat : lng) / factor);
+    coordinates.push_back((latlng ? lng : lat) / factor);
+    if (is3d) {
+      z += read_polyline_value(it, end);
+      coordinates.push_back(z / 100.);
+    }
+  }
+}
+
+py::object py_decode_polyline(const std::string& polyline,
+                              int precision,
+                              bool latlng,
+                              bool is3d,
+                              bool numpy) {
+  std::vector<double> coordinates;
+  {
+    py::gil_scoped_release release;
+    decode_polyline(polyline, std::pow(10., precision), latlng, is3d, coordinates);
+  }
+  size_t columns = is3d ? 3 : 2;
+  size_t rows = coordinates.size() / columns;
+  if (numpy) {
+    return to_array(std::move(coordinates), {py::ssize_t(rows), py::ssize_t(columns)});
+  }
+  py::list result(rows);
+  for (size_t i = 0; i < rows; ++i) {
+    const double* coordinate = &coordinates[i * columns];
+    result[i] = is3d ? py::tuple(py::make_tuple(coordinate[0], coordinate[1], coordinate[2]))
+                     : py::tuple(py::make_tuple(coordinate[0], coordinate[1]));
+  }
+  return std::move(result);
+}
+
+// the coordinates of all polylines in one array, the ones of polyline i are in offsets[i]:offsets[i+1]
+py::tuple py_decode_polylines(const std::vector<std::string>& polylines,
+                              int precision,
+                              bool latlng,
+                              bool is3d) {
+  std::vector<int64_t> offsets{0};
+  std::vector<double> coordinates;
+  size_t columns = is3d ? 3 : 2;
+  {
+    py::gil_scoped_release release;
+    double factor = std::pow(10., precision);
+    offsets.reserve(polylines.size() + 1);
+    for (const auto& polyline : polylines) {
+      decode_polyline(polyline, factor, latlng, is3d, coordinates);
+      offsets.push_back(coordinates.size() / columns);
+    }
+  }
+  py::ssize_t count = offsets.size();
+  py::ssize_t rows = coordinates.size() / columns;
+  return py::make_tuple(to_array(std::move(offsets), {count}),
+                        to_array(std::move(coordinates), {rows, py::ssize_t(columns)}));
+}
+
+// encodes rows of 2 or 3 coordinates, a buffer of doubles is read directly, anything else by sequence
+std::string py_encode_polyline(const py::object& coordinates, int precision, bool latlng) {
+  std::vector<double> values;
+  size_t columns = 0;
+  if (py::isinstance<py::buffer>(coordinates)) {
+    py::buffer_info info = py::reinterpret_borrow<py::buffer>(coordinates).request();
+    if (info.format == py::format_descriptor<double>::format() && info.ndim == 2 &&
+        info.strides[1] == sizeof(double) &&
+        info.strides[0] == static_cast<py::ssize_t>(info.shape[1] * sizeof(double))) {
+      const double* data = static_cast<const double*>(info.ptr);
+      values.assign(data, data + info.size);
+      columns = info.shape[1];
+    }
+  }
+  if (!columns) {
+    for (const auto& coordinate : coordinates) {
+      auto row = coordinate.cast<std::vector<double>>();
+      if (columns && row.size() != columns) {
+        throw std::invalid_argument("All coordinates need the same number of dimensions");
+      }
+      columns = row.size();
+      values.insert(values.end(), row.begin(), row.end());
+    }
+  }
+  if (values.empty()) {
+    return {};
+  }
+  if (columns != 2 && columns != 3) {
+    throw std::invalid_argument("Coordinates need 2 or 3 dimensions");
+  }
+
+  py::gil_scoped_release release;
+  double factor = std::pow(10., precision);
+  std::string polyline;
+  polyline.reserve(values.size() * 4);
+  int64_t previous[3] = {0, 0, 0};
+  for (size_t i = 0; i < values.size(); i += columns) {
+    int64_t current[3] = {std::llround(values[i + (latlng ? 0 : 1)] * factor),
+                          std::llround(values[i + (latlng ? 1 : 0)] * factor),
+                          columns == 3 ? std::llround(values[i + 2] * 100.) : 0};
+    for (size_t j = 0; j < columns; ++j) {
+      write_polyline_value(current[j] - previous[j], polyline);
+      previous[j] = current[j];
+    }
+  }
+  return polyline;
+}
+
+// a response parsed in situ, the nodes handed out keep it alive
+struct parsed_t {
+  std::string json;
+  rapidjson::Document document;
+};
+
+// a json object or array of a response, converted to python only where it's accessed
+class lazy_t {
+public:
+  lazy_t(std::shared_ptr<const parsed_t> parsed, const rapidjson::Value& value)
+      : parsed_(std::move(parsed)), value_(&value) {
+  }
+
+  py::object get(const py::object& key) const {
+    if (value_->IsArray() && py::isinstance<py::slice>(key)) {
+      size_t start, stop, step, length;
+      if (!py::reinterpret_borrow<py::slice>(key).compute(value_->Size(), &start, &stop, &step,
+                                                          &length)) {
+        throw py::error_already_set();
+      }
+      py::list items(length);
+      for (size_t i = 0; i < length; ++i, start += step) {
+        items[i] = wrap((*value_)[static_cast<rapidjson::SizeType>(start)]);
+      }
+      return std::move(items);
+    }
+    return wrap(find(key));
+  }
+
+  py::object get_or(const py::object& key, const py::object& default_value) const {
+    if (!py::isinstance<py::str>(key)) {
+      return default_value;
+    }
+    auto member = value_->FindMember(key.cast<std::string>().c_str());
+    return member == value_->MemberEnd() ? default_value : wrap(member->value);
+  }
+
+  bool contains(const py::object& key) const {
+    if (value_->IsObject()) {
+      return py::isinstance<py::str>(key) &&
+             value_->HasMember(key.cast<std::string>().c_str());
+    }
+    for (const auto& item : value_->GetArray()) {
+      if (wrap(item).equal(key)) {
+        return true;
+      }
+    }
+    return false;
+  }
+
+  size_t size() const {
+    return value_->IsObject() ? value_->MemberCount() : value_->Size();
+  }
+
+  py::list keys() const {
+    py::list keys;
+    for (const auto& member : value_->GetObject()) {
+      keys.append(py::str(member.name.GetString(), member.name.GetStringLength()));
+    }
+    return keys;
+  }
+
+  py::list values() const {
+    py::list values;
+    if (value_->IsObject()) {
+      for (const auto& member : value_->GetObject()) {
+        values.append(wrap(member.value));
+      }
+    } else {
+      for (const auto& item : value_->GetArray()) {
+        values.append(wrap(item));
+      }
+    }
+    return values;
+  }
+
+  py::list items() const {
+    py::list items;
+    for (const auto& member : value_->GetObject()) {
+      items.append(py::make_tuple(py::str(member.name.GetString(), member.name.GetStringLength()),
+                                  wrap(member.value)));
+    }
+    return items;
+  }
+
+  // dicts iterate over their keys, lists over their items
+  py::iterator iter() const {
+    return py::iter(value_->IsObject() ? keys() : values());
+  }
+
+  py::object materialize() const {
+    return from_json(*value_);
+  }
+
+  std::string json() const {
+    rapidjson::StringBuffer buffer;
+    rapidjson::Writer<rapidjson::StringBuffer> writer(buffer);
+    value_->Accept(writer);
+    return std::string(buffer.GetString(), buffer.GetSize());
+  }
+
+  // decodes the "shape" polyline of this object without creating the str first
+  py::object decode_shape(int precision,
+                          const std::string& order,
+                          bool is3d,
+                          const std::string& output) const {
+    if (output != "list" && output != "numpy") {
+      throw std::invalid_argument("output must be one of list, numpy");
+    }
+    const auto& shape = find(py::str("shape"));
+    if (!shape.IsString()) {
+      throw py::type_error("shape is not an encoded polyline");
+    }
+    return py_decode_polyline(std::string(shape.GetString(), shape.GetStringLength()), precision,
+                              order == "latlng", is3d, output == "numpy");
+  }
+
+  // compares like the dict or list it stands for
+  bool equals(const py::object& other) const;
+
+  // objects and arrays stay lazy, everything else is converted right away
+  py::object wrap(const rapidjson::Value& value) const;
+
+private:
+  const rapidjson::Value& find(const py::object& key) const {
+    if (value_->IsObject()) {
+      if (!py::isinstance<py::str>(key)) {
+        throw py::key_error(py::repr(key).cast<std::string>());
+      }
+      auto member = value_->FindMember(key.cast<std::string>().c_str());
+      if (member == value_->MemberEnd()) {
+        throw py::key_error(key.cast<std::string>());
+      }
+      return member->value;
+    }
+    if (!py::isinstance<py::int_>(key)) {
+      throw py::type_error("list indices must be integers or slices");
+    }
+    auto index = key.cast<py::ssize_t>();
+    py::ssize_t size = value_->Size();
+    if (index < -size || index >= size) {
+      throw py::index_error("list index out of range");
+    }
+    return (*value_)[static_cast<rapidjson::SizeType>(index < 0 ? index + size : index)];
+  }
+
+  std::shared_ptr<const parsed_t> parsed_;
+  const rapidjson::Value* value_;
+};
+
+// the python types of json objects and arrays
+struct lazy_dict_t : lazy_t {
+  using lazy_t::lazy_t;
+};
+struct lazy_list_t : lazy_t {
+  using lazy_t::lazy_t;
+};
+
+py::object lazy_t::wrap(const rapidjson::Value& value) const {
+  if (value.IsObject()) {
+    return py::cast(lazy_dict_t(parsed_, value));
+  } else if (value.IsArray()) {
+    return py::cast(lazy_list_t(parsed_, value));
+  }
+  return from_json(value);
+}
+
+bool lazy_t::equals(const py::object& other) const {
+  if (py::isinstance<lazy_dict_t>(other) || py::isinstance<lazy_list_t>(other)) {
+    return materialize().equal(other.cast<const lazy_t&>().materialize());
+  }
+  return materialize().equal(other);
+}
+
+void def_action(py::module_& m, const char* name, action_t action) {
+  m.def(
+      name,
+      [action](const py::object& req, const interrupt_t* interrupt, bool pbf, bool lazy,
+               const py::object& report) -> py::object {
+        // dicts are serialized and the response is parsed natively, no json round trip in python
+        bool is_dict = py::isinstance<py::dict>(req);
+        std::string request = is_dict ? to_json(req) : req.cast<std::string>();
+        auto parsed = std::make_shared<parsed_t>();
+        timing_t timing;
+        {
+          // the GIL is released for the duration of the request, only the conversions hold it
+          py::gil_scoped_release release;
+          parsed->json = respond(*current_pool(), action, request, interrupt, pbf,
+                                 report.is_none() ? nullptr : &timing);
+          if ((is_dict || lazy) && !pbf) {
+            parse_json(parsed->json, parsed->document);
+          }
+        }
+        py::object response;
+        if (pbf) {
+          response = py::bytes(parsed->json);
+        } else if (lazy) {
+          response = lazy_t(parsed, parsed->document).wrap(parsed->document);
+        } else if (is_dict) {
+          response = from_json(parsed->document);
+        } else {
+          response = py::str(parsed->json);
+        }
+        if (!report.is_none()) {
+          report(timing.to_dict());
+        }
+        return response;
+      },
+      py::arg("req"), py::arg("interrupt") = py::none(), py::arg("pbf") = false,
+      py::arg("lazy") = false, py::arg("report") = py::none());
+}
+
+#ifdef __APPLE__
+using mincore_t = char;
+#else
+using mincore_t = unsigned char;
+#endif
+
+// reads one byte of every page of the memory on the worker threads, so that it's resident once
+// the threads finish, returns how many of its bytes are resident
+size_t page_in(const std::vector<std::pair<const char*, size_t>>& memory, size_t workers) {
+#ifdef _WIN32
+  return 0;
+#else
+  const size_t page = sysconf(_SC_PAGESIZE);
+  std::atomic<size_t> next{0};
+  auto touch = [&]() {
+    for (size_t i = next++; i < memory.size(); i = next++) {
+      const char* end = memory[i].first + memory[i].second;
+      for (const char* p = memory[i].first; p < end; p += page) {
+        static_cast<void>(*static_cast<const volatile char*>(p));
+      }
+    }
+  };
+  std::vector<std::thread> threads;
+  for (size_t i = 1; i < std::max<size_t>(workers, 1); ++i) {
+    threads.emplace_back(touch);
+  }
+  touch();
+  for (auto& thread : threads) {
+    thread.join();
+  }
+
+  size_t resident = 0;
+  std::vector<mincore_t> pages;
+  for (const auto& range : memory) {
+    auto address = reinterpret_cast<uintptr_t>(range.first);
+    auto first = address - address % page;
+    auto count = (address + range.second - first + page - 1) / page;
+    pages.resize(count);
+    if (mincore(reinterpret_cast<void*>(first), count * page, pages.data()) != 0) {
+      continue;
+    }
+    for (size_t i = 0; i < count; ++i) {
+      if (pages[i] & 1) {
+        // only the part of the page which belongs to the tile
+        auto begin = std::max(first + i * page, address);
+        auto end = std::min(first + (i + 1) * page, address + range.second);
+        resident += end - begin;
+      }
+    }
+  }
+  return resident;
+#endif
+}
+
+// pages the given (level, tile id) tiles of the tile extract in, returns the number of tiles found,
+// their bytes and how many of these are resident. the gzipped tiles of a compressed extract are
+// inflated into the tile caches of all actors too, paging them in only saves the disk reads
+py::dict warmup(const std::vector<std::pair<uint32_t, uint32_t>>& tiles, size_t workers) {
+  auto current = current_pool();
+  std::vector<vb::GraphId> ids;
+  ids.reserve(tiles.size());
+  for (const auto& tile : tiles) {
+    ids.emplace_back(tile.second, tile.first, 0);
+  }
+
+  size_t found = 0, bytes = 0, resident = 0, cached = 0;
+  {
+    py::gil_scoped_release release;
+    if (!current->reader().extract_tiles()) {
+      throw std::runtime_error("Warming up needs a tile extract");
+    }
+    auto memory = current->reader().extract_memory(ids, found);
+    for (const auto& range : memory) {
+      bytes += range.second;
+    }
+    workers = workers ? workers : std::max(std::thread::hardware_concurrency(), 1u);
+    resident = page_in(memory, workers);
+    if (current->reader().compressed_extract()) {
+      cached = current->load_tiles(ids, workers);
+    }
+  }
+
+  py::dict result;
+  result["tiles"] = found;
+  result["bytes"] = bytes;
+  result["resident_bytes"] = resident;
+  result["cached_tiles"] = cached;
+  return result;
+}
+
+// runs many requests of one action on native threads, each thread checks out actors from the
+// pool, and hands out (index, response, error) tuples in the order the requests finish
+class batch_t {
+public:
+  // a negative timeout limits none of the requests, a negative deadline not the whole batch
+  batch_t(const std::string& action,
+          std::vector<std::string> requests,
+          size_t workers,
+          std::shared_ptr<cancellation_token_t> token,
+          double timeout,
+          double deadline,
+          const std::string& output,
+          py::object report)
+      : pool_(current_pool()), action_(get_action(action)), requests_(std::move(requests)),
+        token_(std::move(token)), timeout_(timeout), output_(get_output(output)),
+        report_(std::move(report)),
+        deadline_(deadline < 0 ? std::chrono::steady_clock::time_point::max()
+                               : std::chrono::steady_clock::now() +
+                                     std::chrono::duration_cast<std::chrono::steady_clock::duration>(
+                                         std::chrono::duration<double>(deadline))) {
+    workers = std::min(workers ? workers : pool_->size(), requests_.size());
+    for (size_t i = 0; i < workers; ++i) {
+      threads_.emplace_back(&batch_t::work, this);
+    }
+  }
+
+  ~batch_t() {
+    // requests which didn't start yet are abandoned, the running ones we have to wait for
+    stop_ = true;
+    py::gil_scoped_release release;
+    for (auto& thread : threads_) {
+      thread.join();
+    }
+  }
+
+  py::tuple next() {
+    if (handed_out_ == requests_.size()) {
+      throw py::stop_iteration();
+    }
+    result_t result;
+    {
+      py::gil_scoped_release release;
+      std::unique_lock<std::mutex> lock(mutex_);
+      done_condition_.wait(lock, [this] { return !done_.empty(); });
+      result = std::move(done_.front());
+      done_.pop_front();
+    }
+    ++handed_out_;
+    if (!result.error) {
+      py::object response;
+      switch (output_) {
+        case output_t::json:
+          response = py::str(result.response);
+          break;
+        case output_t::pbf:
+          response = py::bytes(result.response);
+          break;
+        case output_t::numpy:
+          response = to_arrays(std::move(result.matrix));
+          break;
+      }
+      if (!report_.is_none()) {
+        auto timing = result.timing.to_dict();
+        timing["index"] = result.index;
+        report_(timing);
+      }
+      return py::make_tuple(result.index, response, py::none());
+    }
+    // the same exceptions a single request would raise, just not raised
+    return py::make_tuple(result.index, py::none(), result.error(py::str(result.response)));
+  }
+
+  // the python exception types failed requests are reported with, set when the module is loaded
+  static py::handle interrupted_type;
+  static py::handle timeout_type;
+
+private:
+  // json and pbf return the responses as str and bytes, numpy the arrays of the matrices
+  enum class output_t { json, pbf, numpy };
+
+  static output_t get_output(const std::string& output) {
+    if (output == "json") {
+      return output_t::json;
+    } else if (output == "pbf") {
+      return output_t::pbf;
+    } else if (output == "numpy") {
+      return output_t::numpy;
+    }
+    throw std::invalid_argument("Unknown output " + output);
+  }
+
+  struct result_t {
+    size_t index;
+    std::string response;
+    py::handle error;
+    matrix_t matrix;
+    timing_t timing;
+  };
+
+  void work() {
+    for (size_t i = next_request_++; i < requests_.size() && !stop_; i = next_request_++) {
+      result_t result{i, {}, {}, {}, {}};
+      try {
+        interrupt_t interrupt(token_, remaining());
+        result.response = respond(*pool_, action_, requests_[i], &interrupt,
+                                  output_ == output_t::pbf, measure_ ? &result.timing : nullptr);
+        if (output_ == output_t::numpy) {
+          // the rest of the response isn't needed, only the matrix is handed out
+          rapidjson::Document document;
+          result.matrix = read_matrix(result.response, document);
+        }
+      } catch (const timeout_error_t& e) {
+        result.response = e.what();
+        result.error = timeout_type;
+      } catch (const interrupted_error_t& e) {
+        result.response = e.what();
+        result.error = interrupted_type;
+      } catch (const std::exception& e) {
+        result.response = e.what();
+        result.error = PyExc_RuntimeError;
+      } catch (...) {
+        result.response = "Unknown error";
+        result.error = PyExc_RuntimeError;
+      }
+      {
+        std::lock_guard<std::mutex> lock(mutex_);
+        done_.push_back(std::move(result));
+      }
+      done_condition_.notify_one();
+    }
+  }
+
+  // the time a request may take, limited by its own timeout and the deadline of the batch
+  double remaining() const {
+    if (deadline_ == std::chrono::steady_clock::time_point::max()) {
+      return timeout_;
+    }
+    double left = std::max(std::chrono::duration<double>(deadline_ - std::chrono::steady_clock::now())
+                               .count(),
+                           0.);
+    return timeout_ < 0 ? left : std::min(timeout_, left);
+  }
+
+  std::shared_ptr<actor_pool_t> pool_;
+  action_t action_;
+  std::vector<std::string> requests_;
+  std::shared_ptr<cancellation_token_t> token_;
+  double timeout_;
+  output_t output_;
+  // only touched while holding the GIL, whether to measure is known without it
+  py::object report_;
+  bool measure_ = !report_.is_none();
+  std::chrono::steady_clock::time_point deadline_;
+  std::atomic<size_t> next_request_{0};
+  std::atomic<bool> stop_{false};
+  // only touched while holding the GIL
+  size_t handed_out_ = 0;
+  std::mutex mutex_;
+  std::condition_variable done_condition_;
+  std::deque<result_t> done_;
+  std::vector<std::thread> threads_;
+};
+
+py::handle batch_t::interrupted_type;
+py::handle batch_t::timeout_type;
 } // namespace
 
 PYBIND11_MODULE(python_valhalla, m) {
-  m.def("Configure", py_configure, py::arg("config_file"), py::arg("tile_extract"),
-        py::arg("config") = py::dict(), py::arg("verbose") = true,
-        "Configure Valhalla with the path to a ``config_file`` JSON.\n"
-        "If the file path doesn't exist one will be created at the "
-        "specified path, either with the ``config`` dict or, if no ``config`` specified, the default config "
-        "from ``valhalla.config.get_default()``.\nIf you pass a ``config`` dict and the file path "
-        "exists, the file will be overwritten\n``"
-        "``tile_extract`` is the path to an existing valhalla_tiles.tar graph or the path "
-        "``valhalla.BuildTiles()`` will put the tarred graph to.\n``verbose`` prints Valhalla's log.");
-
-  m.def("_Route", [](const std::string req) { return actor->route(req); });
-  m.def("_Locate", [](const std::string req) { return actor->locate(req); });
-  m.def("_OptimizedRoute", [](const std::string req) { return actor->optimized_route(req); });
-  m.def("_Matrix", [](const std::string req) { return actor->matrix(req); });
-  m.def("_Isochrone", [](const std::string req) { return actor->isochrone(req); });
-  m.def("_TraceRoute", [](const std::string req) { return actor->trace_route(req); });
-  m.def("_TraceAttributes", [](const std::string req) { return actor->trace_attributes(req); });
-  m.def("_Height", [](const std::string req) { return actor->height(req); });
-  m.def("_TransitAvailable", [](const std::string req) { return actor->transit_available(req); });
-  m.def("_Expansion", [](const std::string req) { return actor->expansion(req); });
-  m.def("_Centroid", [](const std::string req) { return actor->centroid(req); });
-
-  m.def("_BuildTiles", py_build_tiles);
+  m.def("_configure", py_configure, py::arg("config"), py::arg("pool_size") = 1);
+
+  auto& interrupted =
+      py::register_exception<interrupted_error_t>(m, "Interrupted", PyExc_RuntimeError);
+  auto& timeout = py::register_exception<timeout_error_t>(m, "Timeout", interrupted.ptr());
+  batch_t::interrupted_type = interrupted;
+  batch_t::timeout_type = timeout;
+  py::class_<cancellation_token_t, std::shared_ptr<cancellation_token_t>>(
+      m, "CancellationToken",
+      "Cancels all requests it was passed to, they raise ``valhalla.Interrupted``.")
+      .def(py::init<>())
+      .def("cancel", &cancellation_token_t::cancel)
+      .def_property_readonly("cancelled", &cancellation_token_t::cancelled);
+  py::class_<interrupt_t>(m, "_Interrupt")
+      .def(py::init<std::shared_ptr<cancellation_token_t>, double>(), py::arg("token") = py::none(),
+           py::arg("timeout") = -1)
+      .def("cancel", &interrupt_t::cancel)
+      .def_property_readonly("cancelled", &interrupt_t::triggered);
+
+  using valhalla::tyr::actor_t;
+  def_action(m, "_Route", &actor_t::route);
+  def_action(m, "_Locate", &actor_t::locate);
+  def_action(m, "_OptimizedRoute", &actor_t::optimized_route);
+  def_action(m, "_Matrix", &actor_t::matrix);
+  def_action(m, "_Isochrone", &actor_t::isochrone);
+  def_action(m, "_TraceRoute", &actor_t::trace_route);
+  def_action(m, "_TraceAttributes", &actor_t::trace_attributes);
+  def_action(m, "_Height", &actor_t::height);
+  def_action(m, "_TransitAvailable", &actor_t::transit_available);
+  def_action(m, "_Expansion", &actor_t::expansion);
+  def_action(m, "_Centroid", &actor_t::centroid);
+
+  m.def("_MatrixArrays", matrix_arrays, py::arg("req"), py::arg("interrupt") = py::none(),
+        py::arg("report") = py::none());
+
+  py::class_<lazy_dict_t>(m, "ResponseDict",
+                          "A JSON object of a lazy response, its values are converted on access.")
+      .def("__getitem__", &lazy_dict_t::get)
+      .def("get", &lazy_dict_t::get_or, py::arg("key"), py::arg("default") = py::none())
+      .def("__contains__", &lazy_dict_t::contains)
+      .def("__len__", &lazy_dict_t::size)
+      .def("__iter__", &lazy_dict_t::iter)
+      .def("keys", &lazy_dict_t::keys)
+      .def("values", &lazy_dict_t::values)
+      .def("items", &lazy_dict_t::items)
+      .def("__eq__", &lazy_dict_t::equals)
+      .def("to_dict", &lazy_dict_t::materialize, "Converts the whole object to a dict.")
+      .def("to_json", &lazy_dict_t::json, "Serializes the object to a JSON str.")
+      .def("decode_shape", &lazy_dict_t::decode_shape, py::arg("precision") = 6,
+           py::arg("order") = "lnglat", py::arg("is3d") = false, py::arg("output") = "list",
+           "Decodes the encoded polyline of the object's shape, like utils.decode_polyline.")
+      .def("__repr__", [](const lazy_dict_t& self) {
+        return py::str("ResponseDict(keys={})").format(self.keys());
+      });
+  py::class_<lazy_list_t>(m, "ResponseList",
+                          "A JSON array of a lazy response, its items are converted on access.")
+      .def("__getitem__", &lazy_list_t::get)
+      .def("__contains__", &lazy_list_t::contains)
+      .def("__len__", &lazy_list_t::size)
+      .def("__iter__", &lazy_list_t::iter)
+      .def("__eq__", &lazy_list_t::equals)
+      .def("to_list", &lazy_list_t::materialize, "Converts the whole array to a list.")
+      .def("to_json", &lazy_list_t::json, "Serializes the array to a JSON str.")
+      .def("__repr__", [](const lazy_list_t& self) {
+        return py::str("ResponseList(len={})").format(self.size());
+      });
+
+  m.def("_decode_polyline", py_decode_polyline, py::arg("polyline"), py::arg("precision") = 6,
+        py::arg("latlng") = false, py::arg("is3d") = false, py::arg("numpy") = false);
+  m.def("_decode_polylines", py_decode_polylines, py::arg("polylines"), py::arg("precision") = 6,
+        py::arg("latlng") = false, py::arg("is3d") = false);
+  m.def("_encode_polyline", py_encode_polyline, py::arg("coordinates"), py::arg("precision") = 6,
+        py::arg("latlng") = false);
+
+  m.def("_to_json", [](const py::object& obj) { return to_json(obj); });
+  m.def("_from_json", [](std::string json) { return from_json(std::move(json)); });
+
+  py::class_<batch_t>(m, "_Batch")
+      .def(py::init<const std::string&, std::vector<std::string>, size_t,
+                    std::shared_ptr<cancellation_token_t>, double, double, const std::string&,
+                    py::object>(),
+           py::arg("action"), py::arg("requests"), py::arg("workers") = 0,
+           py::arg("token") = py::none(), py::arg("timeout") = -1, py::arg("deadline") = -1,
+           py::arg("output") = "json", py::arg("report") = py::none())
+      .def("__iter__", [](py::object self) { return self; })
+      .def("__next__", &batch_t::next);
+
+  m.def("cleanup", py_cleanup, py::call_guard<py::gil_scoped_release>(),
+        "Empties the tile caches of all actors, waiting for the requests in flight to finish.");
+
+  m.def("_BuildTiles", py_build_tiles, py::arg("input_pbfs"), py::arg("stage"));
+  m.def("_prepare_tile_parts", prepare_tile_parts, py::arg("stage"));
+  m.def("_init_tile_part_worker", init_tile_part_worker, py::arg("config"), py::arg("stage"));
+  m.def("_build_tile_part", build_tile_part, py::call_guard<py::gil_scoped_release>(),
+        py::arg("tiles"));
+  m.def("_write_extract", write_extract, py::call_guard<py::gil_scoped_release>(),
+        py::arg("tile_dir"), py::arg("tile_extract"), py::arg("compress") = false,
+        py::arg("workers") = 0);
   m.def("_reset_actor", reset_actor);
+  m.def("_swap_extract", swap_extract, py::arg("tile_extract"));
+  m.def("_warmup", warmup, py::arg("tiles"), py::arg("workers") = 0);
+  m.def("_set_response_cache", set_response_cache, py::arg("max_bytes"), py::arg("ttl"));
+  m.def("_response_cache_info", response_cache_info);
+  m.def("_clear_response_cache", []() { current_pool()->cache().clear(); });
+  m.def("_metrics", metrics_snapshot);
 }
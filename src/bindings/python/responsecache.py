@@ -0,0 +1,31 @@
+from .python_valhalla import _clear_response_cache, _response_cache_info, _set_response_cache
+
+
+def set_response_cache(max_bytes: int, ttl: float = 0):
+    """
+    Caches the responses of up to ``max_bytes`` of requests and their responses, so that repeated
+    requests are answered without running them again. Requests are the same if they only differ in
+    the order of their keys or in whitespace, requests at the current ``date_time`` aren't cached.
+    The least recently used responses are evicted first and all of them after ``ttl`` seconds,
+    unless it's 0. ``Configure``, ``BuildTiles`` and ``swap_extract`` drop all cached responses.
+    A ``max_bytes`` of 0, the default, disables the cache.
+    """
+    if max_bytes < 0:
+        raise ValueError("max_bytes must not be negative.")
+    if ttl < 0:
+        raise ValueError("ttl must not be negative.")
+
+    _set_response_cache(max_bytes, ttl)
+
+
+def response_cache_info() -> dict:
+    """
+    Returns the ``hits`` and ``misses`` of the response cache since the module was loaded, the
+    ``entries`` and ``bytes`` it currently holds and its ``max_bytes`` and ``ttl``.
+    """
+    return _response_cache_info()
+
+
+def clear_response_cache():
+    """Drops all cached responses."""
+    _clear_response_cache()
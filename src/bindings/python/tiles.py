@@ -0,0 +1,125 @@
+import math
+from typing import Iterable, List, Sequence, Tuple, Union
+
+# GraphId bits: 3 for the level, 22 for the tile id and 21 for the id within the tile
+_LEVEL_BITS = 3
+_TILE_ID_BITS = 22
+_ID_BITS = 21
+_INVALID_GRAPH_ID = 0x3fffffffffff
+
+
+class Tiles:
+    """
+    The tiles of one level of the hierarchy, squares of ``tile_size`` degrees numbered row by row
+    from the south west corner of the world, like ``valhalla::midgard::Tiles``. The methods taking
+    single coordinates return ints, the plural ones take and return NumPy arrays.
+    """
+
+    def __init__(self, level: int, tile_size: float):
+        self.level = level
+        self.tile_size = tile_size
+        self.ncolumns = int(math.ceil(360 / tile_size))
+        self.nrows = int(math.ceil(180 / tile_size))
+        self.max_tile_id = self.ncolumns * self.nrows - 1
+
+    def row(self, lat: float) -> int:
+        """The row of ``lat``, -1 outside the world."""
+        if not -90 <= lat <= 90:
+            return -1
+        return min(int((lat + 90) / self.tile_size), self.nrows - 1)
+
+    def col(self, lon: float) -> int:
+        """The column of ``lon``, -1 outside the world."""
+        if not -180 <= lon <= 180:
+            return -1
+        return min(int((lon + 180) / self.tile_size), self.ncolumns - 1)
+
+    def tile_id(self, lon: float, lat: float) -> int:
+        """The id of the tile containing ``lon``, ``lat``, -1 outside the world."""
+        row, col = self.row(lat), self.col(lon)
+        return -1 if row < 0 or col < 0 else row * self.ncolumns + col
+
+    def graph_id(self, tile_id: int) -> int:
+        """The GraphId value of the tile ``tile_id``."""
+        return self.level | tile_id << _LEVEL_BITS
+
+    def tile_ids(self, lon: 'numpy.ndarray', lat: 'numpy.ndarray') -> 'numpy.ndarray':
+        """The int64 ids of the tiles containing the coordinates, -1 outside the world."""
+        import numpy as np
+
+        lon = np.asarray(lon, dtype=np.float64)
+        lat = np.asarray(lat, dtype=np.float64)
+        inside = (lon >= -180) & (lon <= 180) & (lat >= -90) & (lat <= 90)
+        with np.errstate(invalid='ignore'):
+            rows = np.minimum(((lat + 90) / self.tile_size).astype(np.int64), self.nrows - 1)
+            cols = np.minimum(((lon + 180) / self.tile_size).astype(np.int64), self.ncolumns - 1)
+        return np.where(inside, rows * self.ncolumns + cols, -1)
+
+    def graph_ids(self, lon: 'numpy.ndarray', lat: 'numpy.ndarray') -> 'numpy.ndarray':
+        """The uint64 GraphId values of the tiles containing the coordinates, the invalid GraphId outside the world."""
+        import numpy as np
+
+        tile_ids = self.tile_ids(lon, lat)
+        graph_ids = (tile_ids.astype(np.uint64) << np.uint64(_LEVEL_BITS)) | np.uint64(self.level)
+        return np.where(tile_ids >= 0, graph_ids, np.uint64(_INVALID_GRAPH_ID))
+
+    def bbox_tiles(self, bbox: Sequence[float]) -> List[int]:
+        """The ids of the tiles covering ``bbox`` (min_lon, min_lat, max_lon, max_lat), which may cross the antimeridian."""
+        tiles = []
+        for min_x, min_y, max_x, max_y in _split_bbox(bbox):
+            min_col, max_col = self.col(max(min_x, -180)), self.col(min(max_x, 180))
+            for row in range(self.row(max(min_y, -90)), self.row(min(max_y, 90)) + 1):
+                tiles.extend(range(row * self.ncolumns + min_col, row * self.ncolumns + max_col + 1))
+        return tiles
+
+    def file_path(self, tile_id: int, suffix: str = 'gph') -> str:
+        """The path of the tile ``tile_id`` relative to the tile directory, e.g. ``2/000/818/660.gph``."""
+        digits = len(str(self.max_tile_id))
+        digits += -digits % 3
+        padded = str(tile_id).zfill(digits)
+        return '/'.join([str(self.level)] + [padded[i:i + 3] for i in range(0, digits, 3)]) + '.' + suffix
+
+
+class TileHierarchy:
+    """The levels of the tile hierarchy, like ``valhalla::baldr::TileHierarchy``."""
+
+    levels = {
+        0: Tiles(0, 4.),  # highway
+        1: Tiles(1, 1.),  # arterial
+        2: Tiles(2, .25),  # local
+    }
+
+    @classmethod
+    def bbox_tiles(cls, bbox: Sequence[float], levels: Iterable[int] = (0, 1, 2)) -> List[Tuple[int, int]]:
+        """The ``(level, tile_id)`` of the tiles of ``levels`` covering ``bbox`` (min_lon, min_lat, max_lon, max_lat)."""
+        return [(level, tile_id) for level in levels for tile_id in cls.levels[level].bbox_tiles(bbox)]
+
+    @classmethod
+    def tile_ids(cls, lon: 'numpy.ndarray', lat: 'numpy.ndarray', levels: Iterable[int] = (0, 1, 2)) -> 'numpy.ndarray':
+        """The tile ids of the coordinates on ``levels``, an int64 array of shape (len(levels), N)."""
+        import numpy as np
+
+        return np.stack([cls.levels[level].tile_ids(lon, lat) for level in levels])
+
+    @staticmethod
+    def graph_id_parts(graph_ids: Union[int, 'numpy.ndarray']) -> Tuple:
+        """Splits GraphId values into their ``(level, tile_id, id)``, works on ints and NumPy arrays."""
+        # numpy arrays need constants of their own type, uint64 and int don't mix
+        dtype = getattr(graph_ids, 'dtype', None)
+        const = int if dtype is None else dtype.type
+        level = graph_ids & const((1 << _LEVEL_BITS) - 1)
+        tile_id = (graph_ids >> const(_LEVEL_BITS)) & const((1 << _TILE_ID_BITS) - 1)
+        id = (graph_ids >> const(_LEVEL_BITS + _TILE_ID_BITS)) & const((1 << _ID_BITS) - 1)
+        return level, tile_id, id
+
+
+def _split_bbox(bbox: Sequence[float]) -> List[Tuple[float, float, float, float]]:
+    # like scripts/list_tiles.py a bbox across the antimeridian is split in two
+    min_x, min_y, max_x, max_y = bbox
+    if min_x >= max_x:
+        min_x -= 360
+    if min_x < -180 < max_x:
+        return [(-180, min_y, max_x, max_y), (min_x + 360, min_y, 180, max_y)]
+    if min_x < 180 < max_x:
+        return [(min_x, min_y, 180, max_y), (-180, min_y, max_x - 360, max_y)]
+    return [(min_x, min_y, max_x, max_y)]
@@ -1,11 +1,59 @@
-from typing import List, Tuple
+from typing import Iterable, List, Sequence, Tuple, Union
 
+try:
+    try:
+        from .python_valhalla import _decode_polyline, _decode_polylines, _encode_polyline
+    except ModuleNotFoundError:
+        from python_valhalla import _decode_polyline, _decode_polylines, _encode_polyline
+except ImportError:
+    # without the compiled extension the polylines are decoded and encoded in Python
+    _decode_polyline = _decode_polylines = _encode_polyline = None
 
-def decode_polyline(polyline: str, precision: int = 6, order: str = 'lnglat') -> List[Tuple[float, float]]:
-    """Decodes an encoded ``polyline`` string with ``precision`` to a list of coordinate tuples. 
-    The coordinate ``order`` of the output can be ``lnglat`` or ``latlng``."""
+_OUTPUTS = ('list', 'numpy')
 
-    return _decode(polyline, precision=precision, order=order, is3d=False)
+
+def decode_polyline(polyline: str, precision: int = 6, order: str = 'lnglat', is3d: bool = False, output: str = 'list') -> Union[List[Tuple[float, ...]], 'numpy.ndarray']:
+    """Decodes an encoded ``polyline`` string with ``precision`` to a list of coordinate tuples.
+    The coordinate ``order`` of the output can be ``lnglat`` or ``latlng``, ``is3d`` polylines
+    have a third elevation coordinate. With ``output="numpy"`` the coordinates are a float64
+    array of shape (N, 2) or (N, 3)."""
+    if output not in _OUTPUTS:
+        raise ValueError("output must be one of {}".format(", ".join(_OUTPUTS)))
+
+    if _decode_polyline is not None:
+        return _decode_polyline(polyline, precision, order == 'latlng', is3d, output == 'numpy')
+
+    coordinates = _decode(polyline, precision=precision, order=order, is3d=is3d)
+    if output == 'numpy':
+        import numpy
+
+        return numpy.array(coordinates, dtype=numpy.float64).reshape(-1, 3 if is3d else 2)
+    return coordinates
+
+
+def decode_polylines(polylines: Iterable[str], precision: int = 6, order: str = 'lnglat', is3d: bool = False) -> Tuple['numpy.ndarray', 'numpy.ndarray']:
+    """Decodes all ``polylines`` in one go to ``(offsets, coordinates)`` NumPy arrays, the coordinates
+    of ``polylines[i]`` are ``coordinates[offsets[i]:offsets[i + 1]]``."""
+    if _decode_polylines is not None:
+        return _decode_polylines(list(polylines), precision, order == 'latlng', is3d)
+
+    import numpy
+
+    offsets, coordinates = [0], []
+    for polyline in polylines:
+        coordinates.extend(_decode(polyline, precision=precision, order=order, is3d=is3d))
+        offsets.append(len(coordinates))
+    return (numpy.array(offsets, dtype=numpy.int64),
+            numpy.array(coordinates, dtype=numpy.float64).reshape(-1, 3 if is3d else 2))
+
+
+def encode_polyline(coordinates: Union[Sequence[Sequence[float]], 'numpy.ndarray'], precision: int = 6, order: str = 'lnglat') -> str:
+    """Encodes a sequence or (N, 2) or (N, 3) array of ``coordinates`` in ``order`` to a polyline
+    string with ``precision``, the inverse of ``decode_polyline``."""
+    if _encode_polyline is not None:
+        return _encode_polyline(coordinates, precision, order == 'latlng')
+
+    return _encode(coordinates, precision=precision, order=order)
 
 
 def _trans(value, index):
@@ -13,11 +61,17 @@ def _trans(value, index):
     Copyright (c) 2014 Bruno M. Custódio
     Copyright (c) 2016 Frederick Jansen
     https://github.com/hicsail/polyline/commit/ddd12e85c53d394404952754e39c91f63a808656
+
+    Modified to raise a ValueError for invalid polylines.
     """
     byte, result, shift = None, 0, 0
 
     while byte is None or byte >= 0x20:
+        if index >= len(value):
+            raise ValueError("Invalid polyline")
         byte = ord(value[index]) - 63
+        if not 0 <= byte <= 63:
+            raise ValueError("Invalid polyline")
         index += 1
         result |= (byte & 0x1f) << shift
         shift += 5
@@ -52,3 +106,33 @@ def _decode(expression, precision=5, order='lnglat', is3d=False):
             coordinates.append((*coord, z / 100))
 
     return coordinates
+
+
+def _round(value):
+    """Rounds half away from zero like the native encoder."""
+    return int(value + 0.5) if value >= 0 else -int(-value + 0.5)
+
+
+def _encode(coordinates, precision=6, order='lnglat'):
+    """The inverse of ``_decode``, the elevation of 3D coordinates has a precision of 2."""
+    polyline, previous, factor, columns = [], [0, 0, 0], 10**precision, None
+
+    for coordinate in coordinates:
+        coordinate = [float(c) for c in coordinate]
+        if columns is not None and len(coordinate) != columns:
+            raise ValueError("All coordinates need the same number of dimensions")
+        columns = len(coordinate)
+        if columns not in (2, 3):
+            raise ValueError("Coordinates need 2 or 3 dimensions")
+        lat, lng = coordinate[:2] if order == 'latlng' else coordinate[1::-1]
+        current = [_round(lat * factor), _round(lng * factor), _round(coordinate[2] * 100) if columns == 3 else 0]
+        for i in range(columns):
+            bits = current[i] - previous[i]
+            bits = ~(bits << 1) if bits < 0 else bits << 1
+            while bits >= 0x20:
+                polyline.append(chr((0x20 | (bits & 0x1f)) + 63))
+                bits >>= 5
+            polyline.append(chr(bits + 63))
+            previous[i] = current[i]
+
+    return ''.join(polyline)
@@ -87,6 +87,7 @@ std::string loki_worker_t::height(Api& request) {
     }
   }
 
+  auto serialization = measure_serialization_time(request);
   return tyr::serializeHeight(request, heights, ranges);
 }
 } // namespace loki
@@ -46,6 +46,7 @@ std::string loki_worker_t::transit_available(Api& request) {
     }
   } catch (const std::exception&) { throw valhalla_exception_t{170}; }
 
+  auto serialization = measure_serialization_time(request);
   return tyr::serializeTransitAvailable(request, locations, found);
 }
 
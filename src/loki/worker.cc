@@ -153,13 +153,7 @@ loki_worker_t::loki_worker_t(const boost::property_tree::ptree& config,
       connectivity_map(config.get<bool>("loki.use_connectivity", true)
                            ? new connectivity_map_t(config.get_child("mjolnir"), graph_reader)
                            : nullptr),
-      max_contours(config.get<size_t>("service_limits.isochrone.max_contours")),
-      max_contour_min(config.get<size_t>("service_limits.isochrone.max_time_contour")),
-      max_contour_km(config.get<size_t>("service_limits.isochrone.max_distance_contour")),
-      max_trace_shape(config.get<size_t>("service_limits.trace.max_shape")),
-      sample(config.get<std::string>("additional_data.elevation", "")),
-      max_elevation_shape(config.get<size_t>("service_limits.skadi.max_shape")),
-      min_resample(config.get<float>("service_limits.skadi.min_resample")) {
+      sample(config.get<std::string>("additional_data.elevation", "")) {
   // If we weren't provided with a graph reader make our own
   if (!reader)
     reader.reset(new baldr::GraphReader(config.get_child("mjolnir")));
@@ -179,7 +173,26 @@ loki_worker_t::loki_worker_t(const boost::property_tree::ptree& config,
     throw std::runtime_error("The config actions for Loki are incorrectly loaded");
   }
 
+  // the limits and defaults of the requests
+  configure(config);
+
+  // signal that the worker started successfully
+  started();
+}
+
+void loki_worker_t::configure(const boost::property_tree::ptree& config) {
+  max_contours = config.get<size_t>("service_limits.isochrone.max_contours");
+  max_contour_min = config.get<size_t>("service_limits.isochrone.max_time_contour");
+  max_contour_km = config.get<size_t>("service_limits.isochrone.max_distance_contour");
+  max_trace_shape = config.get<size_t>("service_limits.trace.max_shape");
+  max_elevation_shape = config.get<size_t>("service_limits.skadi.max_shape");
+  min_resample = config.get<float>("service_limits.skadi.min_resample");
+
   // Build max_locations and max_distance maps
+  max_locations.clear();
+  max_distance.clear();
+  max_matrix_distance.clear();
+  max_matrix_locations.clear();
   for (const auto& kv : config.get_child("service_limits")) {
     if (kv.first == "max_exclude_locations" || kv.first == "max_reachability" ||
         kv.first == "max_radius" || kv.first == "max_timedep_distance" ||
@@ -242,9 +255,6 @@ loki_worker_t::loki_worker_t(const boost::property_tree::ptree& config,
   max_best_paths = config.get<unsigned int>("service_limits.trace.max_best_paths");
   max_best_paths_shape = config.get<size_t>("service_limits.trace.max_best_paths_shape");
   max_alternates = config.get<unsigned int>("service_limits.max_alternates");
-
-  // signal that the worker started successfully
-  started();
 }
 
 void loki_worker_t::cleanup() {
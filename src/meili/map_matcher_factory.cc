@@ -77,6 +77,10 @@ Config MapMatcherFactory::MergeConfig(const Options& options) const {
   return config;
 }
 
+void MapMatcherFactory::Configure(const boost::property_tree::ptree& root) {
+  config_ = Config(root.get_child("meili"));
+}
+
 void MapMatcherFactory::ClearFullCache() {
   if (graphreader_->OverCommitted()) {
     graphreader_->Trim();
@@ -155,6 +155,7 @@ void TransitionCostModel::UpdateRoute(const StateId& lhs, const StateId& rhs) co
                                            mode_costing_[static_cast<size_t>(travelmode_)], edgelabel,
                                            turn_cost_table_, max_route_distance, max_route_time);
 
+  expanded_labels_ += labelset->size();
   left.SetRoute(unreached_stateids, results, labelset);
 }
 
@@ -1131,9 +1131,19 @@ void GraphBuilder::Build(const boost::property_tree::ptree& pt,
                          const std::string& complex_from_restriction_file,
                          const std::string& complex_to_restriction_file,
                          const std::map<GraphId, size_t>& tiles) {
+  Reclassify(pt, osmdata, ways_file, way_nodes_file, nodes_file, edges_file);
+  BuildTiles(pt, osmdata, ways_file, way_nodes_file, nodes_file, edges_file,
+             complex_from_restriction_file, complex_to_restriction_file, tiles);
+}
+
+void GraphBuilder::Reclassify(const boost::property_tree::ptree& pt,
+                              const OSMData& osmdata,
+                              const std::string& ways_file,
+                              const std::string& way_nodes_file,
+                              const std::string& nodes_file,
+                              const std::string& edges_file) {
   // Reclassify links (ramps). Cannot do this when building tiles since the
   // edge list needs to be modified
-  DataQuality stats;
   if (pt.get<bool>("mjolnir.reclassify_links", true)) {
     ReclassifyLinks(ways_file, nodes_file, edges_file, way_nodes_file, osmdata,
                     pt.get<bool>("mjolnir.data_processing.infer_turn_channels", true));
@@ -1150,6 +1160,18 @@ void GraphBuilder::Build(const boost::property_tree::ptree& pt,
   }
   ReclassifyFerryConnections(ways_file, way_nodes_file, nodes_file, edges_file,
                              static_cast<uint32_t>(rc));
+}
+
+void GraphBuilder::BuildTiles(const boost::property_tree::ptree& pt,
+                              const OSMData& osmdata,
+                              const std::string& ways_file,
+                              const std::string& way_nodes_file,
+                              const std::string& nodes_file,
+                              const std::string& edges_file,
+                              const std::string& complex_from_restriction_file,
+                              const std::string& complex_to_restriction_file,
+                              const std::map<GraphId, size_t>& tiles) {
+  DataQuality stats;
   unsigned int threads =
       std::max(static_cast<unsigned int>(1),
                pt.get<unsigned int>("mjolnir.concurrency", std::thread::hardware_concurrency()));
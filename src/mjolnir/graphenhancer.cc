@@ -1656,6 +1656,17 @@ namespace mjolnir {
 void GraphEnhancer::Enhance(const boost::property_tree::ptree& pt,
                             const OSMData& osmdata,
                             const std::string& access_file) {
+  boost::property_tree::ptree hierarchy_properties = pt.get_child("mjolnir");
+  auto local_level = TileHierarchy::levels().back().level;
+  GraphReader reader(hierarchy_properties);
+  auto local_tiles = reader.GetTileSet(local_level);
+  Enhance(pt, osmdata, access_file, std::vector<GraphId>(local_tiles.begin(), local_tiles.end()));
+}
+
+void GraphEnhancer::Enhance(const boost::property_tree::ptree& pt,
+                            const OSMData& osmdata,
+                            const std::string& access_file,
+                            const std::vector<GraphId>& tiles) {
   LOG_INFO("Enhancing local graph...");
 
   // A place to hold worker threads and their results, exceptions or otherwise
@@ -1667,14 +1678,8 @@ void GraphEnhancer::Enhance(const boost::property_tree::ptree& pt,
   std::list<std::promise<enhancer_stats>> results;
 
   // Create a randomized queue of tiles to work from
-  std::deque<GraphId> tempqueue;
+  std::deque<GraphId> tempqueue(tiles.begin(), tiles.end());
   boost::property_tree::ptree hierarchy_properties = pt.get_child("mjolnir");
-  auto local_level = TileHierarchy::levels().back().level;
-  GraphReader reader(hierarchy_properties);
-  auto local_tiles = reader.GetTileSet(local_level);
-  for (const auto& tile_id : local_tiles) {
-    tempqueue.emplace_back(tile_id);
-  }
   std::random_device rd;
   std::shuffle(tempqueue.begin(), tempqueue.end(), std::mt19937(rd()));
   std::queue<GraphId> tilequeue(tempqueue);
@@ -7,9 +7,12 @@
 #include "midgard/logging.h"
 #include <algorithm>
 #include <boost/format.hpp>
+#include <chrono>
+#include <cstdio>
 #include <list>
 #include <set>
 #include <stdexcept>
+#include <thread>
 
 using namespace valhalla::baldr;
 
@@ -231,9 +234,15 @@ void GraphTileBuilder::StoreTileData() {
     filesystem::create_directories(filename.parent_path());
   }
 
-  // Open file and truncate
+  // Write to a temporary file and move it into place at the end, other processes may read the
+  // tile while it's rebuilt and must never see a truncated or partially written one
+  std::stringstream tmp_suffix;
+  tmp_suffix << ".tmp_" << std::this_thread::get_id() << "_"
+             << std::chrono::high_resolution_clock::now().time_since_epoch().count();
+  filesystem::path tmp_filename(filename.string() + tmp_suffix.str());
+
   std::stringstream in_mem;
-  std::ofstream file(filename.c_str(), std::ios::out | std::ios::binary | std::ios::trunc);
+  std::ofstream file(tmp_filename.c_str(), std::ios::out | std::ios::binary | std::ios::trunc);
   if (file.is_open()) {
     // Write the nodes
     header_builder_.set_nodecount(nodes_builder_.size());
@@ -393,8 +402,12 @@ void GraphTileBuilder::StoreTileData() {
     file.write(reinterpret_cast<const char*>(&header_builder_), sizeof(GraphTileHeader));
     file << in_mem.rdbuf();
     file.close();
+    if (file.fail() || std::rename(tmp_filename.c_str(), filename.c_str())) {
+      filesystem::remove(tmp_filename);
+      throw std::runtime_error("Failed to write file " + filename.string());
+    }
   } else {
-    throw std::runtime_error("Failed to open file " + filename.string());
+    throw std::runtime_error("Failed to open file " + tmp_filename.string());
   }
 }
 
@@ -1,5 +1,6 @@
 #include "mjolnir/util.h"
 
+#include "baldr/graphreader.h"
 #include "baldr/tilehierarchy.h"
 #include "filesystem.h"
 #include "midgard/aabb2.h"
@@ -400,5 +401,71 @@ bool build_tile_set(const boost::property_tree::ptree& original_config,
   return true;
 }
 
+namespace {
+
+std::string tile_dir_of(const ptree& config) {
+  auto tile_dir = config.get<std::string>("mjolnir.tile_dir");
+  if (tile_dir.back() != filesystem::path::preferred_separator) {
+    tile_dir.push_back(filesystem::path::preferred_separator);
+  }
+  return tile_dir;
+}
+
+void check_tile_part_stage(const BuildStage stage) {
+  if (stage != BuildStage::kBuild && stage != BuildStage::kEnhance) {
+    throw std::runtime_error("Only the build and enhance stages run in parts, not " +
+                             to_string(stage));
+  }
+}
+
+} // namespace
+
+std::map<baldr::GraphId, size_t> prepare_tile_parts(const ptree& config, const BuildStage stage) {
+  check_tile_part_stage(stage);
+  auto tile_dir = tile_dir_of(config);
+
+  if (stage == BuildStage::kEnhance) {
+    std::map<baldr::GraphId, size_t> tiles;
+    baldr::GraphReader reader(config.get_child("mjolnir"));
+    for (const auto& tile_id : reader.GetTileSet(baldr::TileHierarchy::levels().back().level)) {
+      tiles.emplace(tile_id, 0);
+    }
+    return tiles;
+  }
+
+  OSMData osm_data{0};
+  osm_data.read_from_temp_files(tile_dir);
+  GraphBuilder::Reclassify(config, osm_data, tile_dir + ways_file, tile_dir + way_nodes_file,
+                           tile_dir + nodes_file, tile_dir + edges_file);
+  return TileManifest::ReadFromFile(tile_dir + tile_manifest_file).tileset;
+}
+
+bool read_tile_part_data(const ptree& config, const BuildStage stage, OSMData& osm_data) {
+  check_tile_part_stage(stage);
+  return stage == BuildStage::kBuild ? osm_data.read_from_temp_files(tile_dir_of(config))
+                                     : osm_data.read_from_unique_names_file(tile_dir_of(config));
+}
+
+void build_tile_part(const ptree& config,
+                     const BuildStage stage,
+                     const OSMData& osm_data,
+                     const std::map<baldr::GraphId, size_t>& tiles) {
+  check_tile_part_stage(stage);
+  auto tile_dir = tile_dir_of(config);
+
+  if (stage == BuildStage::kEnhance) {
+    std::vector<baldr::GraphId> tile_ids;
+    for (const auto& tile : tiles) {
+      tile_ids.push_back(tile.first);
+    }
+    GraphEnhancer::Enhance(config, osm_data, tile_dir + access_file, tile_ids);
+    return;
+  }
+
+  GraphBuilder::BuildTiles(config, osm_data, tile_dir + ways_file, tile_dir + way_nodes_file,
+                           tile_dir + nodes_file, tile_dir + edges_file, tile_dir + cr_from_file,
+                           tile_dir + cr_to_file, tiles);
+}
+
 } // namespace mjolnir
 } // namespace valhalla
@@ -44,7 +44,13 @@ std::string odin_worker_t::narrate(Api& request) const {
     odin::DirectionsBuilder().Build(request);
   } catch (...) { throw valhalla_exception_t{202}; }
 
+  // the caller serializes the Api with the directions itself
+  if (request.options().format() == Options::pbf) {
+    return {};
+  }
+
   // serialize those to the proper format
+  auto serialization = measure_serialization_time(request);
   return tyr::serializeDirections(request);
 }
 
@@ -90,6 +96,10 @@ odin_worker_t::work(const std::list<zmq::message_t>& job,
       default: {
         // narrate them and serialize them along
         auto response = narrate(request);
+        if (request.options().format() == Options::pbf) {
+          result = to_response(request.SerializeAsString(), info, request, worker::PBF_MIME);
+          break;
+        }
         const bool as_gpx = request.options().format() == Options::gpx;
         result = to_response(response, info, request, as_gpx ? worker::GPX_MIME : worker::JSON_MIME,
                              as_gpx);
@@ -36,7 +36,8 @@ class CostMatrix::TargetMap : public robin_hood::unordered_map<uint64_t, std::ve
 // Constructor with cost threshold.
 CostMatrix::CostMatrix()
     : mode_(TravelMode::kDrive), access_mode_(kAutoAccess), source_count_(0), remaining_sources_(0),
-      target_count_(0), remaining_targets_(0), current_cost_threshold_(0), targets_{new TargetMap} {
+      target_count_(0), remaining_targets_(0), current_cost_threshold_(0), targets_{new TargetMap},
+      interrupt_(nullptr) {
 }
 
 CostMatrix::~CostMatrix() {
@@ -84,6 +85,18 @@ void CostMatrix::Clear() {
   target_status_.clear();
 }
 
+// The edge labels of all source and target searches
+size_t CostMatrix::expanded_labels() const {
+  size_t labels = 0;
+  for (const auto& edgelabels : source_edgelabel_) {
+    labels += edgelabels.size();
+  }
+  for (const auto& edgelabels : target_edgelabel_) {
+    labels += edgelabels.size();
+  }
+  return labels;
+}
+
 // Form a time distance matrix from the set of source locations
 // to the set of target locations.
 std::vector<TimeDistance> CostMatrix::SourceToTarget(
@@ -114,7 +127,16 @@ std::vector<TimeDistance> CostMatrix::SourceToTarget(
   // search from all source locations. Connections between the 2 search
   // spaces is checked during the forward search.
   int n = 0;
+  // every iteration expands a label of each location, check the interrupt about as often as the
+  // path algorithms do
+  const int interrupt_interval =
+      std::max<int>(kInterruptIterationsInterval / std::max(source_count_ + target_count_, 1u), 1);
   while (true) {
+    // Allow this process to be aborted
+    if (interrupt_ && n > 0 && (n % interrupt_interval) == 0) {
+      (*interrupt_)();
+    }
+
     // Iterate all target locations in a backwards search
     for (uint32_t i = 0; i < target_count_; i++) {
       if (target_status_[i].threshold > 0) {
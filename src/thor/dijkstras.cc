@@ -46,7 +46,7 @@ Dijkstras::Dijkstras(const boost::property_tree::ptree& config)
     : mode_(TravelMode::kDrive), access_mode_(kAutoAccess),
       max_reserved_labels_count_(
           config.get<uint32_t>("max_reserved_labels_count", kInitialEdgeLabelCount)),
-      multipath_(false) {
+      multipath_(false), interrupt_(nullptr) {
 }
 
 // Clear the temporary information generated during path construction.
@@ -339,8 +339,14 @@ void Dijkstras::Compute(google::protobuf::RepeatedPtrField<valhalla::Location>&
   auto time_infos = SetTime(locations, graphreader);
 
   // Compute the isotile
+  int n = 0;
   auto cb_decision = ExpansionRecommendation::continue_expansion;
   while (cb_decision != ExpansionRecommendation::stop_expansion) {
+    // Allow this process to be aborted
+    if (interrupt_ && (++n % kInterruptIterationsInterval) == 0) {
+      (*interrupt_)();
+    }
+
     // Get next element from adjacency list. Check that it is valid. An
     // invalid label indicates there are no edges that can be expanded.
     uint32_t predindex = adjacencylist_.pop();
@@ -721,8 +727,14 @@ void Dijkstras::ComputeMultiModal(
   processed_tiles_.clear();
 
   // Expand using adjacency list until we exceed threshold
+  int n = 0;
   auto cb_decision = ExpansionRecommendation::continue_expansion;
   while (cb_decision != ExpansionRecommendation::stop_expansion) {
+    // Allow this process to be aborted
+    if (interrupt_ && (++n % kInterruptIterationsInterval) == 0) {
+      (*interrupt_)();
+    }
+
     // Get next element from adjacency list. Check that it is valid. An
     // invalid label indicates there are no edges that can be expanded.
     const uint32_t predindex = adjacencylist_.pop();
@@ -36,6 +36,7 @@ std::string thor_worker_t::isochrones(Api& request) {
   auto expansion_type = costing == "multimodal" || costing == "transit" ? ExpansionType::multimodal
                                                                         : ExpansionType::forward;
   auto grid = isochrone_gen.Expand(expansion_type, request, *reader, mode_costing, mode);
+  count_expanded_labels(request, isochrone_gen.expanded_labels());
 
   // we have parallel vectors of contour properties and the actual geojson features
   // this method sorts the contour specifications by metric (time or distance) and then by value
@@ -44,6 +45,7 @@ std::string thor_worker_t::isochrones(Api& request) {
       grid->GenerateContours(contours, options.polygons(), options.denoise(), options.generalize());
 
   // make the final json
+  auto serialization = measure_serialization_time(request);
   std::string ret = tyr::serializeIsochrones(request, contours, isolines, options.polygons(),
                                              options.show_locations());
 
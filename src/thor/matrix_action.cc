@@ -43,19 +43,30 @@ std::string thor_worker_t::matrix(Api& request) {
   std::vector<TimeDistance> time_distances;
   auto costmatrix = [&]() {
     thor::CostMatrix matrix;
-    return matrix.SourceToTarget(options.sources(), options.targets(), *reader, mode_costing, mode,
-                                 max_matrix_distance.find(costing)->second);
+    matrix.set_interrupt(interrupt);
+    auto time_distances =
+        matrix.SourceToTarget(options.sources(), options.targets(), *reader, mode_costing, mode,
+                              max_matrix_distance.find(costing)->second);
+    count_expanded_labels(request, matrix.expanded_labels());
+    return time_distances;
   };
   auto timedistancematrix = [&]() {
     thor::TimeDistanceMatrix matrix;
-    return matrix.SourceToTarget(options.sources(), options.targets(), *reader, mode_costing, mode,
-                                 max_matrix_distance.find(costing)->second);
+    matrix.set_interrupt(interrupt);
+    auto time_distances =
+        matrix.SourceToTarget(options.sources(), options.targets(), *reader, mode_costing, mode,
+                              max_matrix_distance.find(costing)->second);
+    count_expanded_labels(request, matrix.expanded_labels());
+    return time_distances;
   };
   if (costing == "bikeshare") {
     thor::TimeDistanceBSSMatrix matrix;
+    matrix.set_interrupt(interrupt);
     time_distances =
         matrix.SourceToTarget(options.sources(), options.targets(), *reader, mode_costing, mode,
                               max_matrix_distance.find(costing)->second);
+    count_expanded_labels(request, matrix.expanded_labels());
+    auto serialization = measure_serialization_time(request);
     return tyr::serializeMatrix(request, time_distances, distance_scale);
   }
   switch (source_to_target_algorithm) {
@@ -87,6 +98,7 @@ std::string thor_worker_t::matrix(Api& request) {
       time_distances = timedistancematrix();
       break;
   }
+  auto serialization = measure_serialization_time(request);
   return tyr::serializeMatrix(request, time_distances, distance_scale);
 }
 } // namespace thor
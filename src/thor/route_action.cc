@@ -157,7 +157,7 @@ namespace thor {
 
 std::string thor_worker_t::expansion(Api& request) {
   // time this whole method and save that statistic
-  measure_scope_time(request);
+  auto _ = measure_scope_time(request);
 
   // default the expansion geojson so its easy to add to as we go
   rapidjson::Document dom;
@@ -241,6 +241,7 @@ std::string thor_worker_t::expansion(Api& request) {
   }
 
   // serialize it
+  auto serialization = measure_serialization_time(request);
   return rapidjson::to_string(dom, 5);
 }
 
@@ -372,7 +373,9 @@ std::vector<std::vector<thor::PathInfo>> thor_worker_t::get_path(PathAlgorithm*
                                                                  valhalla::Location& origin,
                                                                  valhalla::Location& destination,
                                                                  const std::string& costing,
-                                                                 const Options& options) {
+                                                                 Api& api) {
+  const Options& options = api.options();
+
   // Find the path.
   valhalla::sif::cost_ptr_t cost = mode_costing[static_cast<uint32_t>(mode)];
 
@@ -383,6 +386,7 @@ std::vector<std::vector<thor::PathInfo>> thor_worker_t::get_path(PathAlgorithm*
 
   cost->set_pass(0);
   auto paths = path_algorithm->GetBestPath(origin, destination, *reader, mode_costing, mode, options);
+  count_expanded_labels(api, path_algorithm->expanded_labels());
 
   // Check if we should run a second pass pedestrian route with different A*
   // (to look for better routes where a ferry is taken)
@@ -416,6 +420,7 @@ std::vector<std::vector<thor::PathInfo>> thor_worker_t::get_path(PathAlgorithm*
     // Get the best path. Return if not empty (else return the original path)
     auto relaxed_paths =
         path_algorithm->GetBestPath(origin, destination, *reader, mode_costing, mode, options);
+    count_expanded_labels(api, path_algorithm->expanded_labels());
     if (!relaxed_paths.empty()) {
       return relaxed_paths;
     }
@@ -451,7 +456,7 @@ void thor_worker_t::path_arrive_by(Api& api, const std::string& costing) {
     }
 
     // Get best path and keep it
-    auto temp_paths = this->get_path(path_algorithm, *origin, *destination, costing, options);
+    auto temp_paths = this->get_path(path_algorithm, *origin, *destination, costing, api);
     if (temp_paths.empty())
       return false;
 
@@ -595,7 +600,7 @@ void thor_worker_t::path_depart_at(Api& api, const std::string& costing) {
     }
 
     // Get best path and keep it
-    auto temp_paths = this->get_path(path_algorithm, *origin, *destination, costing, options);
+    auto temp_paths = this->get_path(path_algorithm, *origin, *destination, costing, api);
     if (temp_paths.empty())
       return false;
 
@@ -36,7 +36,8 @@ namespace valhalla {
 namespace thor {
 
 // Constructor with cost threshold.
-TimeDistanceBSSMatrix::TimeDistanceBSSMatrix() : settled_count_(0), current_cost_threshold_(0) {
+TimeDistanceBSSMatrix::TimeDistanceBSSMatrix()
+    : settled_count_(0), current_cost_threshold_(0), expanded_labels_(0), interrupt_(nullptr) {
 }
 
 float TimeDistanceBSSMatrix::GetCostThreshold(const float max_matrix_distance) const {
@@ -192,7 +193,13 @@ std::vector<TimeDistance> TimeDistanceBSSMatrix::OneToMany(
 
   // Find shortest path
   const GraphTile* tile;
+  int n = 0;
   while (true) {
+    // Allow this process to be aborted
+    if (interrupt_ && (++n % kInterruptIterationsInterval) == 0) {
+      (*interrupt_)();
+    }
+
     // Get next element from adjacency list. Check that it is valid. An
     // invalid label indicates there are no edges that can be expanded.
     uint32_t predindex = adjacencylist_.pop();
@@ -385,7 +392,13 @@ std::vector<TimeDistance> TimeDistanceBSSMatrix::ManyToOne(
   SetDestinationsManyToOne(graphreader, locations);
 
   graph_tile_ptr tile;
+  int n = 0;
   while (true) {
+    // Allow this process to be aborted
+    if (interrupt_ && (++n % kInterruptIterationsInterval) == 0) {
+      (*interrupt_)();
+    }
+
     // Get next element from adjacency list. Check that it is valid. An
     // invalid label indicates there are no edges that can be expanded.
     uint32_t predindex = adjacencylist_.pop();
@@ -450,12 +463,14 @@ std::vector<TimeDistance> TimeDistanceBSSMatrix::SourceToTarget(
     const sif::TravelMode _,
     const float max_matrix_distance) {
   // Run a series of one to many calls and concatenate the results.
+  expanded_labels_ = 0;
   std::vector<TimeDistance> many_to_many;
   if (source_location_list.size() <= target_location_list.size()) {
     for (const auto& origin : source_location_list) {
       std::vector<TimeDistance> td =
           OneToMany(origin, target_location_list, graphreader, mode_costing, _, max_matrix_distance);
       many_to_many.insert(many_to_many.end(), td.begin(), td.end());
+      expanded_labels_ += edgelabels_.size();
       Clear();
     }
   } else {
@@ -463,6 +478,7 @@ std::vector<TimeDistance> TimeDistanceBSSMatrix::SourceToTarget(
       std::vector<TimeDistance> td = ManyToOne(destination, source_location_list, graphreader,
                                                mode_costing, _, max_matrix_distance);
       many_to_many.insert(many_to_many.end(), td.begin(), td.end());
+      expanded_labels_ += edgelabels_.size();
       Clear();
     }
   }
@@ -28,7 +28,8 @@ namespace thor {
 
 // Constructor with cost threshold.
 TimeDistanceMatrix::TimeDistanceMatrix()
-    : mode_(TravelMode::kDrive), settled_count_(0), current_cost_threshold_(0) {
+    : mode_(TravelMode::kDrive), settled_count_(0), current_cost_threshold_(0),
+      expanded_labels_(0), interrupt_(nullptr) {
 }
 
 // Compute a cost threshold in seconds based on average speed for the travel mode.
@@ -174,8 +175,14 @@ TimeDistanceMatrix::OneToMany(const valhalla::Location& origin,
   SetDestinations(graphreader, locations);
 
   // Find shortest path
+  int n = 0;
   graph_tile_ptr tile;
   while (true) {
+    // Allow this process to be aborted
+    if (interrupt_ && (++n % kInterruptIterationsInterval) == 0) {
+      (*interrupt_)();
+    }
+
     // Get next element from adjacency list. Check that it is valid. An
     // invalid label indicates there are no edges that can be expanded.
     uint32_t predindex = adjacencylist_.pop();
@@ -342,8 +349,14 @@ TimeDistanceMatrix::ManyToOne(const valhalla::Location& dest,
   SetDestinationsManyToOne(graphreader, locations);
 
   // Find shortest path
+  int n = 0;
   graph_tile_ptr tile;
   while (true) {
+    // Allow this process to be aborted
+    if (interrupt_ && (++n % kInterruptIterationsInterval) == 0) {
+      (*interrupt_)();
+    }
+
     // Get next element from adjacency list. Check that it is valid. An
     // invalid label indicates there are no edges that can be expanded.
     uint32_t predindex = adjacencylist_.pop();
@@ -404,12 +417,14 @@ std::vector<TimeDistance> TimeDistanceMatrix::SourceToTarget(
     const sif::TravelMode mode,
     const float max_matrix_distance) {
   // Run a series of one to many calls and concatenate the results.
+  expanded_labels_ = 0;
   std::vector<TimeDistance> many_to_many;
   if (source_location_list.size() <= target_location_list.size()) {
     for (const auto& origin : source_location_list) {
       std::vector<TimeDistance> td = OneToMany(origin, target_location_list, graphreader,
                                                mode_costing, mode, max_matrix_distance);
       many_to_many.insert(many_to_many.end(), td.begin(), td.end());
+      expanded_labels_ += edgelabels_.size();
       Clear();
     }
   } else {
@@ -417,6 +432,7 @@ std::vector<TimeDistance> TimeDistanceMatrix::SourceToTarget(
       std::vector<TimeDistance> td = ManyToOne(destination, source_location_list, graphreader,
                                                mode_costing, mode, max_matrix_distance);
       many_to_many.insert(many_to_many.end(), td.begin(), td.end());
+      expanded_labels_ += edgelabels_.size();
       Clear();
     }
   }
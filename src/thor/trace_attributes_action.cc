@@ -109,6 +109,7 @@ std::string thor_worker_t::trace_attributes(Api& request) {
       break;
   }
 
+  auto serialization = measure_serialization_time(request);
   return tyr::serializeTraceAttributes(request, controller, map_match_results);
 }
 
@@ -195,6 +195,7 @@ thor_worker_t::map_match(Api& request) {
   int topk =
       request.options().action() == Options::trace_attributes ? request.options().best_paths() : 1;
   auto topk_match_results = matcher->OfflineMatch(trace, topk);
+  count_expanded_labels(request, matcher->transition_cost_model().expanded_labels());
 
   // Process each score/match result
   std::vector<std::tuple<float, float, std::vector<meili::MatchResult>>> map_match_results;
@@ -78,6 +78,23 @@ thor_worker_t::thor_worker_t(const boost::property_tree::ptree& config,
   // Select the matrix algorithm based on the conf file (defaults to
   // select_optimal if not present)
   auto conf_algorithm = config.get<std::string>("thor.source_to_target_algorithm", "select_optimal");
+  if (conf_algorithm == "timedistancematrix") {
+    source_to_target_algorithm = TIME_DISTANCE_MATRIX;
+  } else if (conf_algorithm == "costmatrix") {
+    source_to_target_algorithm = COST_MATRIX;
+  } else {
+    source_to_target_algorithm = SELECT_OPTIMAL;
+  }
+
+  // the limits of the requests
+  configure(config);
+
+  // signal that the worker started successfully
+  started();
+}
+
+void thor_worker_t::configure(const boost::property_tree::ptree& config) {
+  max_matrix_distance.clear();
   for (const auto& kv : config.get_child("service_limits")) {
     if (kv.first == "max_exclude_locations" || kv.first == "max_reachability" ||
         kv.first == "max_radius" || kv.first == "max_timedep_distance" ||
@@ -91,19 +108,11 @@ thor_worker_t::thor_worker_t(const boost::property_tree::ptree& config,
                                                             ".max_matrix_distance"));
   }
 
-  if (conf_algorithm == "timedistancematrix") {
-    source_to_target_algorithm = TIME_DISTANCE_MATRIX;
-  } else if (conf_algorithm == "costmatrix") {
-    source_to_target_algorithm = COST_MATRIX;
-  } else {
-    source_to_target_algorithm = SELECT_OPTIMAL;
-  }
-
   max_timedep_distance =
       config.get<float>("service_limits.max_timedep_distance", kDefaultMaxTimeDependentDistance);
 
-  // signal that the worker started successfully
-  started();
+  // the map matching parameters, its candidate grid keeps the size it was constructed with
+  matcher_factory.Configure(config);
 }
 
 thor_worker_t::~thor_worker_t() {
@@ -355,6 +364,15 @@ void thor_worker_t::cleanup() {
 void thor_worker_t::set_interrupt(const std::function<void()>* interrupt_function) {
   interrupt = interrupt_function;
   reader->SetInterrupt(interrupt);
+  isochrone_gen.set_interrupt(interrupt);
+  centroid_gen.set_interrupt(interrupt);
+}
+
+void thor_worker_t::count_expanded_labels(Api& api, size_t expanded_labels) const {
+  auto* stat = api.mutable_info()->mutable_statistics()->Add();
+  stat->set_key(Options_Action_Enum_Name(api.options().action()) + ".info.thor.expanded_labels");
+  stat->set_value(expanded_labels);
+  stat->set_type(count);
 }
 } // namespace thor
 } // namespace valhalla
@@ -32,6 +32,10 @@ struct actor_t::pimpl_t {
     thor_worker.cleanup();
     odin_worker.cleanup();
   }
+  void configure(const boost::property_tree::ptree& config) {
+    loki_worker.configure(config);
+    thor_worker.configure(config);
+  }
   std::shared_ptr<baldr::GraphReader> reader;
   loki::loki_worker_t loki_worker;
   thor::thor_worker_t thor_worker;
@@ -51,6 +55,10 @@ void actor_t::cleanup() {
   pimpl->cleanup();
 }
 
+void actor_t::configure(const boost::property_tree::ptree& config) {
+  pimpl->configure(config);
+}
+
 std::string
 actor_t::route(const std::string& request_str, const std::function<void()>* interrupt, Api* api) {
   // set the interrupts
@@ -1111,7 +1111,8 @@ struct statsd_client_t : public Statsd::StatsdClient {
 };
 
 service_worker_t::service_worker_t(const boost::property_tree::ptree& config)
-    : interrupt(nullptr), statsd_client(new statsd_client_t(config)) {
+    : interrupt(nullptr), statsd_client(new statsd_client_t(config)),
+      serialization_timing(config.get<bool>("statsd.serialization_timing", false)) {
 }
 service_worker_t::~service_worker_t() {
 }
@@ -1178,6 +1179,27 @@ midgard::Finally<std::function<void()>> service_worker_t::measure_scope_time(Api
     stat->set_type(timing);
   });
 }
+midgard::Finally<std::function<void()>>
+service_worker_t::measure_serialization_time(Api& api) const {
+  if (!serialization_timing) {
+    return midgard::Finally<std::function<void()>>([]() {});
+  }
+  auto start = std::chrono::steady_clock::now();
+  return midgard::Finally<std::function<void()>>([this, &api, start]() {
+    auto elapsed = std::chrono::steady_clock::now() - start;
+    auto e = std::chrono::duration_cast<std::chrono::duration<double, std::milli>>(elapsed).count();
+    auto worker = typeid(*this) == typeid(loki::loki_worker_t)
+                      ? ".loki"
+                      : (typeid(*this) == typeid(thor::thor_worker_t) ? ".thor" : ".odin");
+    const auto& action = Options_Action_Enum_Name(api.options().action());
+
+    // the worker it's part of, so its time can be told apart from the rest of the worker's
+    auto* stat = api.mutable_info()->mutable_statistics()->Add();
+    stat->set_key(action + ".info" + worker + ".tyr.latency_ms");
+    stat->set_value(e);
+    stat->set_type(timing);
+  });
+}
 
 void service_worker_t::started() {
   std::string worker = typeid(*this) == typeid(loki::loki_worker_t)
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmarks the bindings on the bundled nyc.osm.pbf, not part of the tests, run it with
+
+    python -m unittest bench_bindings.py -v
+
+VALHALLA_BENCH_COUNT sets the requests per action, VALHALLA_BENCH_THREADS the threads separated by
+commas. The report is saved to .benchmarks, with VALHALLA_BENCH_BASELINE set to a saved report the
+runs whose throughput or p99 got more than 10% worse fail.
+"""
+
+import os
+from pathlib import Path
+import unittest
+
+from valhalla import bench
+
+PWD = Path(os.path.dirname(os.path.abspath(__file__)))
+
+# most of the nodes of nyc.osm.pbf are in here
+BBOX = (-74.01, 40.733, -74.0, 40.75)
+COUNT = int(os.environ.get('VALHALLA_BENCH_COUNT', 100))
+THREADS = [int(n) for n in os.environ.get('VALHALLA_BENCH_THREADS', '1,2,4').split(',')]
+
+
+class BenchBindings(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.pbf_path = os.path.join(PWD.parent.parent, 'data', 'nyc.osm.pbf')
+        cls.extract_dir = PWD / 'bench_extract'
+        cls.results = []
+        bench.build_extract([cls.pbf_path], str(cls.extract_dir), max(THREADS))
+
+    @classmethod
+    def tearDownClass(cls):
+        report = bench.make_report(cls.results, [cls.pbf_path], BBOX, COUNT, 0)
+        print('\nSaved to {}'.format(bench.save(report, str(PWD / '.benchmarks'))))
+
+    def _bench(self, action: str):
+        reqs = bench.requests(action, BBOX, COUNT)
+        results = []
+        for cache in bench.CACHE_MODES:
+            for threads in THREADS:
+                result = bench.run(action, reqs, threads, cache)
+                print('\n{action} {cache} threads={threads}: {throughput:.1f} req/s, p50 {p50:.4f}s, p99 {p99:.4f}s, '
+                      '{errors} errors, rss {rss}'.format(**result), end='')
+                self.assertLess(result['errors'], result['requests'])
+                results.append(result)
+        self.results.extend(results)
+
+        baseline = os.environ.get('VALHALLA_BENCH_BASELINE')
+        if baseline:
+            regressions = [c for c in bench.compare({'results': results}, bench.load(baseline)) if c['regression']]
+            self.assertEqual(regressions, [])
+
+    def test_route(self):
+        self._bench('route')
+
+    def test_matrix(self):
+        self._bench('matrix')
+
+    def test_isochrone(self):
+        self._bench('isochrone')
+
+    def test_trace_route(self):
+        self._bench('trace_route')
+
+    def test_height(self):
+        self._bench('height')
@@ -2,16 +2,20 @@
 
 import os
 import json
+import socket
 from shutil import rmtree
 from pathlib import Path
 import unittest
 
 from valhalla import *
 from valhalla import config
-from valhalla.utils import decode_polyline
+from valhalla.utils import decode_polyline, decode_polylines, encode_polyline
 
 PWD = Path(os.path.dirname(os.path.abspath(__file__)))
 
+# a route across Utrecht, the tests change its costing or add options where they need to
+QUERY = {"locations": [{"lat": 52.08813, "lon": 5.03231}, {"lat": 52.09987, "lon": 5.14913}], "costing": "bicycle"}
+
 class TestBindings(unittest.TestCase):
     """Be a bit lazy: all tests are run in the given order, so that config failure test succeeds."""
 
@@ -185,4 +189,605 @@ class TestBindings(unittest.TestCase):
 
         dec6_latlng = decode_polyline(encoded, order='latlng')
         self.assertEqual(len(dec6_latlng), 43)
-        self.assertEqual(dec6_latlng[0], tuple(reversed(dec6[0])))
\ No newline at end of file
+        self.assertEqual(dec6_latlng[0], tuple(reversed(dec6[0])))
+
+    def test_m_concurrent_requests(self):
+        from concurrent.futures import ThreadPoolExecutor
+
+        Configure(str(self.config_path), str(self.tar_path), pool_size=4)
+        query = {**QUERY, "costing": "auto"}
+        expected = Route(query)
+
+        with ThreadPoolExecutor(4) as executor:
+            routes = list(executor.map(Route, [query] * 16))
+
+        self.assertEqual(len(routes), 16)
+        for route in routes:
+            self.assertEqual(route['trip']['summary'], expected['trip']['summary'])
+
+    def test_n_cache_policy(self):
+        with self.assertRaises(ValueError):
+            Configure(str(self.config_path), str(self.tar_path), cache_policy='bla')
+
+        Configure(str(self.config_path), str(self.tar_path), cache_policy='lru')
+        from valhalla.config import _global_config
+        self.assertTrue(_global_config['mjolnir']['use_lru_mem_cache'])
+
+        query = {**QUERY, "costing": "auto"}
+        route = Route(query)
+        cleanup()
+        self.assertEqual(Route(query)['trip']['summary'], route['trip']['summary'])
+
+    def test_o_route_many(self):
+        query = {**QUERY, "costing": "auto"}
+        invalid = {**QUERY, "locations": QUERY["locations"][:1], "costing": "auto"}
+        reqs = [query, invalid, json.dumps(query)]
+
+        routes = RouteMany(reqs, workers=2)
+        self.assertEqual(len(routes), 3)
+        self.assertIn('trip', routes[0])
+        self.assertIsInstance(routes[1], RuntimeError)
+        self.assertIsInstance(routes[2], str)
+        self.assertEqual(routes[0]['trip']['summary'], json.loads(routes[2])['trip']['summary'])
+
+        unordered = dict(RouteMany(reqs, ordered=False))
+        self.assertEqual(sorted(unordered), [0, 1, 2])
+        self.assertEqual(unordered[0]['trip']['summary'], routes[0]['trip']['summary'])
+
+        matrices = MatrixMany([{"sources": query['locations'], "targets": query['locations'], "costing": "auto"}] * 4)
+        self.assertEqual(len(matrices), 4)
+        for matrix in matrices:
+            self.assertEqual(len(matrix['sources_to_targets']), 2)
+
+    def test_p_aio(self):
+        import asyncio
+        from valhalla import aio
+
+        query = {**QUERY, "costing": "auto"}
+        expected = Route(query)
+
+        async def requests():
+            return await asyncio.gather(aio.Route(query), aio.Route(json.dumps(query)), aio.Matrix({"sources": query['locations'], "targets": query['locations'], "costing": "auto"}))
+
+        route, route_str, matrix = asyncio.run(requests())
+        self.assertEqual(route['trip']['summary'], expected['trip']['summary'])
+        self.assertIsInstance(route_str, str)
+        self.assertEqual(len(matrix['sources_to_targets']), 2)
+
+        async def cancelled():
+            task = asyncio.ensure_future(aio.Route(query))
+            await asyncio.sleep(0)
+            task.cancel()
+            await task
+
+        with self.assertRaises(asyncio.CancelledError):
+            asyncio.run(cancelled())
+        self.assertEqual(Route(query)['trip']['summary'], expected['trip']['summary'])
+
+    def test_q_interrupt(self):
+        import time
+
+        query = {**QUERY, "costing": "auto"}
+        with self.assertRaises(Timeout):
+            Route(query, timeout=0)
+        with self.assertRaises(Timeout):
+            Route(query, deadline=time.monotonic() - 1)
+
+        token = CancellationToken()
+        self.assertIn('trip', Route(query, timeout=60, token=token))
+        token.cancel()
+        with self.assertRaises(Interrupted) as e:
+            Route(query, token=token)
+        self.assertNotIsInstance(e.exception, Timeout)
+
+        routes = RouteMany([query] * 3, token=token)
+        for route in routes:
+            self.assertIsInstance(route, Interrupted)
+
+    def test_r_native_json(self):
+        from valhalla.python_valhalla import _to_json, _from_json
+
+        obj = {"a": [1, 2.5, None, True, "Двигайтесь"], 1: {"b": -3, "c": (0.1, 1e-7)}, "big": 2**63}
+        expected = json.loads(json.dumps(obj))
+        self.assertEqual(json.loads(_to_json(obj)), expected)
+        self.assertEqual(_from_json(json.dumps(obj)), expected)
+
+        with self.assertRaises(TypeError):
+            _to_json({"a": object()})
+        with self.assertRaises(ValueError):
+            _to_json({"a": float('nan')})
+
+    def test_s_pbf(self):
+        query = {**QUERY, "directions_options": {"language": "ru-RU"}}
+        pbf = Route(query, format="pbf")
+        self.assertIsInstance(pbf, bytes)
+        self.assertGreater(len(pbf), 0)
+        self.assertIsInstance(RouteMany([query], format="pbf")[0], bytes)
+
+        # the directions aren't serialized to JSON
+        timings = []
+        Route({**query, "directions_options": {"language": "de-DE"}}, format="pbf", report=timings.append)
+        self.assertFalse(timings[0]["cached"])
+        self.assertEqual(timings[0]["tyr"], 0)
+
+        with self.assertRaises(ValueError):
+            Route(query, format="xml")
+
+    def test_t_matrix_numpy(self):
+        import numpy as np
+
+        locations = QUERY["locations"] + [{"lat": 52.0951, "lon": 5.0998}]
+        query = {"sources": locations, "targets": locations[:2], "costing": "auto"}
+        matrix = Matrix(query)
+        arrays = Matrix(query, output="numpy")
+        self.assertNotIn("sources_to_targets", arrays)
+        self.assertEqual(arrays["units"], matrix["units"])
+
+        durations, distances = arrays["durations"], arrays["distances"]
+        self.assertEqual((durations.shape, durations.dtype), ((3, 2), np.int32))
+        self.assertEqual((distances.shape, distances.dtype), ((3, 2), np.float32))
+        for i, row in enumerate(matrix["sources_to_targets"]):
+            for j, pair in enumerate(row):
+                self.assertEqual(durations[i, j], pair["time"])
+                self.assertAlmostEqual(float(distances[i, j]), pair["distance"], places=3)
+
+        with self.assertRaises(ValueError):
+            Matrix(query, output="pandas")
+
+    def test_u_large_matrix(self):
+        import numpy as np
+
+        locations = QUERY["locations"] + [{"lat": 52.0951, "lon": 5.0998}]
+        expected = Matrix({"sources": locations, "targets": locations, "costing": "auto"}, output="numpy")
+
+        durations = np.zeros((3, 3), dtype=np.int32)
+        distances = np.zeros((3, 3), dtype=np.float32)
+        blocks = list(LargeMatrix(locations, locations, "auto", block_size=2, workers=2, durations=durations, distances=distances))
+        self.assertEqual(sorted((b.source_offset, b.target_offset) for b in blocks), [(0, 0), (0, 2), (2, 0), (2, 2)])
+        self.assertEqual(blocks[0].durations.dtype, np.int32)
+        np.testing.assert_array_equal(durations, expected["durations"])
+        np.testing.assert_allclose(distances, expected["distances"])
+
+        with self.assertRaises(ValueError):
+            LargeMatrix(locations, locations, "auto", durations=np.zeros((2, 2)))
+
+    def test_v_polyline_codec(self):
+        import numpy as np
+
+        encoded = 'mpivlAhwadlCxl@jPhj@hOdJ~BnFjAdEf@pIp@bDHhHKrI[~EB|AG|B_@fNuDzC?bCTzAXtFlBhANnADrAKhA]rAi@|A{@fGkE|CuApDuA|Ac@jAm@lAy@xA_C~@iD`@cD\\mAh@cAv@e@v@UrAOjB@~BNjUzBzz@xIndAnK'
+        coords = decode_polyline(encoded)
+        array = decode_polyline(encoded, output='numpy')
+        self.assertEqual((array.shape, array.dtype), ((43, 2), np.float64))
+        np.testing.assert_array_equal(array, np.array(coords))
+
+        self.assertEqual(encode_polyline(coords), encoded)
+        self.assertEqual(encode_polyline(array), encoded)
+        self.assertEqual(encode_polyline(decode_polyline(encoded, order='latlng'), order='latlng'), encoded)
+
+        coords3d = [(5.03231, 52.08813, 1.5), (5.14913, 52.09987, -2.25)]
+        self.assertEqual(decode_polyline(encode_polyline(coords3d), is3d=True), coords3d)
+
+        offsets, flat = decode_polylines([encoded, "", encoded])
+        self.assertEqual(offsets.tolist(), [0, 43, 43, 86])
+        np.testing.assert_array_equal(flat[offsets[2]:offsets[3]], array)
+
+        with self.assertRaises(ValueError):
+            decode_polyline(encoded[:-1] + "\x7f")
+
+        # the Python fallback for when the extension can't be imported gives the same results
+        from valhalla import utils
+        self.assertEqual(utils._decode(encoded, precision=6), coords)
+        self.assertEqual(utils._encode(coords), encoded)
+        self.assertEqual(utils._decode(utils._encode(coords3d), precision=6, is3d=True), coords3d)
+        with self.assertRaises(ValueError):
+            utils._decode(encoded[:-1] + "\x7f")
+
+    def test_w_lazy_response(self):
+        from collections.abc import Mapping, Sequence
+
+        query = {**QUERY, "directions_options": {"language": "ru-RU"}}
+        expected = Route(query)
+        route = Route(query, lazy=True)
+        self.assertIsInstance(route, ResponseDict)
+        self.assertIsInstance(route, Mapping)
+        self.assertEqual(route["trip"]["summary"], expected["trip"]["summary"])
+        self.assertEqual(set(route.keys()), set(expected.keys()))
+        self.assertEqual(route, expected)
+        self.assertEqual(Route(json.dumps(query), lazy=True), expected)
+
+        legs = route["trip"]["legs"]
+        self.assertIsInstance(legs, Sequence)
+        self.assertEqual(len(legs), 1)
+        self.assertEqual(legs[-1]["maneuvers"][:2], expected["trip"]["legs"][0]["maneuvers"][:2])
+        self.assertEqual(legs[0].decode_shape(), decode_polyline(expected["trip"]["legs"][0]["shape"]))
+        self.assertEqual(json.loads(legs.to_json()), expected["trip"]["legs"])
+        self.assertEqual(route["trip"].to_dict(), expected["trip"])
+        self.assertIsNone(route.get("not_there"))
+        with self.assertRaises(KeyError):
+            route["not_there"]
+        with self.assertRaises(IndexError):
+            legs[1]
+
+    def test_x_compressed_extract(self):
+        import struct
+        import tarfile
+
+        expected = Route(QUERY)
+
+        pbf_path = os.path.join(PWD.parent.parent, 'data', 'utrecht_netherlands.osm.pbf')
+        tar_path = BuildTiles([pbf_path], compress=True, workers=2)
+
+        with tarfile.open(tar_path) as tar:
+            members = tar.getmembers()
+            self.assertEqual(members[0].name, "index.bin")
+            index = tar.extractfile(members[0]).read()
+            entries = list(struct.iter_unpack('<QII', index))
+            tiles = members[1:]
+            self.assertEqual(len(entries), len(tiles))
+            self.assertTrue(all(m.name.endswith(".gph.gz") for m in tiles))
+            self.assertEqual([e[1] for e in entries], sorted(e[1] for e in entries))
+            for (offset, _, size), member in zip(entries, tiles):
+                self.assertEqual((offset, size), (member.offset_data, member.size))
+
+        # the GraphReader maps the tiles from the index and inflates them
+        self.assertEqual(Route(QUERY)["trip"]["summary"], expected["trip"]["summary"])
+
+        # warming up inflates the tiles into the caches of a new pool
+        swap_extract(str(tar_path))
+        self.assertEqual(warmup(bbox=(5.0, 52.0, 5.2, 52.2))["cached_tiles"], 3)
+        timings = []
+        Route(QUERY, report=timings.append)
+        self.assertEqual(timings[0]["tiles_loaded"], 0)
+
+    def test_y_resume_build_tiles(self):
+        from valhalla.buildtiles import STAGES
+
+        expected = Route(QUERY)
+
+        pbf_path = os.path.join(PWD.parent.parent, 'data', 'utrecht_netherlands.osm.pbf')
+        reports = []
+        tile_dir = Path(BuildTiles([pbf_path], end='enhance', report=lambda *r: reports.append(r)))
+
+        self.assertEqual([r[0] for r in reports], list(STAGES[:STAGES.index('enhance') + 1]))
+        self.assertTrue(all(seconds >= 0 and peak_rss > 0 for _, seconds, peak_rss in reports))
+        with open(tile_dir / 'build_state.json') as f:
+            self.assertEqual(list(json.load(f)['stages']), [r[0] for r in reports])
+
+        # the finished stages are skipped
+        reports.clear()
+        tar_path = BuildTiles([pbf_path], start='build', resume=True, report=lambda *r: reports.append(r))
+
+        self.assertEqual(Path(tar_path), self.tar_path)
+        self.assertEqual([r[0] for r in reports], list(STAGES[STAGES.index('filter'):]))
+        self.assertEqual(Route(QUERY)["trip"]["summary"], expected["trip"]["summary"])
+
+        with self.assertRaises(ValueError):
+            BuildTiles([pbf_path], start='parseways')
+        with self.assertRaises(ValueError):
+            BuildTiles([pbf_path], start='enhance', end='build')
+
+    def test_za_build_tiles_processes(self):
+        expected = Route(QUERY)
+
+        pbf_path = os.path.join(PWD.parent.parent, 'data', 'utrecht_netherlands.osm.pbf')
+        progress = []
+        BuildTiles([pbf_path], processes=2, progress=lambda *p: progress.append(p))
+
+        self.assertEqual(sorted(set(p[0] for p in progress)), ['build', 'enhance'])
+        for stage in ('build', 'enhance'):
+            counts = [(done, total) for s, done, total in progress if s == stage]
+            dones = [done for done, _ in counts]
+            self.assertEqual(dones, sorted(set(dones)))
+            self.assertEqual(dones[-1], counts[0][1])
+            # a few parts per process, not one per tile
+            self.assertLessEqual(len(counts), 2 * 4)
+        self.assertEqual(Route(QUERY)["trip"]["summary"], expected["trip"]["summary"])
+
+        with self.assertRaises(ValueError):
+            BuildTiles([pbf_path], processes=0)
+
+    def test_zb_swap_extract(self):
+        import shutil
+        from concurrent.futures import ThreadPoolExecutor
+
+        expected = Route(QUERY)
+
+        swapped_path = self.tar_path.with_name('swapped_tiles.tar')
+        shutil.copy(self.tar_path, swapped_path)
+        with ThreadPoolExecutor(4) as executor:
+            futures = [executor.submit(Route, QUERY) for _ in range(20)]
+            swap_extract(str(swapped_path))
+            routes = [future.result() for future in futures]
+
+        self.assertTrue(all(route["trip"]["summary"] == expected["trip"]["summary"] for route in routes))
+        self.assertEqual(config._global_config['mjolnir']['tile_extract'], str(swapped_path))
+        self.assertEqual(Route(QUERY)["trip"]["summary"], expected["trip"]["summary"])
+
+        # a swap doesn't lose the limits configured meanwhile
+        c = Config.from_file(str(self.config_path))
+        c['service_limits']['bicycle']['max_distance'] = 1
+        with ThreadPoolExecutor(1) as executor:
+            swapped = executor.submit(swap_extract, str(swapped_path))
+            c.apply(verbose=False)
+            swapped.result()
+        with self.assertRaises(RuntimeError):
+            Route(QUERY)
+        c['service_limits']['bicycle']['max_distance'] = config.get_default()['service_limits']['bicycle']['max_distance']
+        c.apply(verbose=False)
+
+        swap_extract(str(self.tar_path))
+        with self.assertRaises(ValueError):
+            swap_extract(str(self.tar_path.with_name('missing.tar')))
+
+    def test_zc_warmup(self):
+        report = warmup(bbox=(5.0, 52.0, 5.2, 52.2))
+
+        self.assertEqual(report["tiles"], 3)
+        self.assertGreater(report["bytes"], 0)
+        self.assertLessEqual(report["resident_bytes"], report["bytes"])
+        self.assertEqual(report["cached_tiles"], 0)
+
+        self.assertEqual(warmup(bbox=(5.0, 52.0, 5.2, 52.2), levels=(2,))["tiles"], 1)
+        self.assertEqual(warmup(tile_ids=[(0, 3196), (1, 51305), (2, 818660)]), report)
+        self.assertEqual(warmup(tile_ids={0: [3196], 1: [51305], 2: [818660]}), report)
+        self.assertEqual(warmup(tile_ids=[(2, 0)])["tiles"], 0)
+
+        with self.assertRaises(ValueError):
+            warmup()
+        with self.assertRaises(ValueError):
+            warmup(bbox=(5.0, 52.0, 5.2, 52.2), levels=(3,))
+
+    def test_zd_tiles(self):
+        import numpy as np
+        from valhalla.tiles import TileHierarchy
+
+        local = TileHierarchy.levels[2]
+        self.assertEqual(local.tile_id(5.12, 52.09), 818660)
+        self.assertEqual(local.tile_id(181, 52.09), -1)
+        self.assertEqual(local.file_path(818660), "2/000/818/660.gph")
+        self.assertEqual(TileHierarchy.levels[0].file_path(3196, "gph.gz"), "0/003/196.gph.gz")
+
+        lon = np.array([5.12, 180., np.nan, -74.0])
+        lat = np.array([52.09, 90., 0., 40.75])
+        np.testing.assert_array_equal(local.tile_ids(lon, lat), [818660, local.max_tile_id, -1, local.tile_id(-74.0, 40.75)])
+        self.assertEqual(TileHierarchy.tile_ids(lon, lat).shape, (3, 4))
+
+        levels, tile_ids, ids = TileHierarchy.graph_id_parts(local.graph_ids(lon[:1], lat[:1]))
+        self.assertEqual((levels[0], tile_ids[0], ids[0]), (2, 818660, 0))
+        self.assertEqual(TileHierarchy.graph_id_parts(local.graph_id(818660)), (2, 818660, 0))
+
+        self.assertEqual(TileHierarchy.bbox_tiles((5.0, 52.0, 5.2, 52.2)), [(0, 3196), (1, 51305), (2, 818660)])
+        # across the antimeridian
+        self.assertEqual(TileHierarchy.levels[0].bbox_tiles((179.5, 0, -179.5, 0.5)), [1980, 2069])
+
+    def test_ze_response_cache(self):
+        reordered = {"costing": "bicycle", "locations": QUERY["locations"]}
+
+        set_response_cache(1 << 20, ttl=60)
+        expected = Route(QUERY)
+        info = response_cache_info()
+        self.assertEqual(Route(reordered), expected)
+        self.assertEqual(json.loads(Route(json.dumps(QUERY, indent=2))), expected)
+        self.assertEqual(response_cache_info()["hits"], info["hits"] + 2)
+        self.assertEqual(response_cache_info()["entries"], 1)
+
+        # a request at the current time isn't cached
+        Route({**QUERY, "date_time": {"type": 0}})
+        self.assertEqual(response_cache_info()["entries"], 1)
+
+        # a new pool starts empty, but keeps the limits
+        swap_extract(str(self.tar_path))
+        self.assertEqual(response_cache_info()["entries"], 0)
+        self.assertEqual(response_cache_info()["max_bytes"], 1 << 20)
+        Route(QUERY)
+        clear_response_cache()
+        self.assertEqual(response_cache_info()["bytes"], 0)
+
+        set_response_cache(0)
+        Route(QUERY)
+        self.assertEqual(response_cache_info()["entries"], 0)
+        with self.assertRaises(ValueError):
+            set_response_cache(-1)
+
+    def test_zf_timing(self):
+
+        # a new pool with cold tile caches
+        swap_extract(str(self.tar_path))
+        timings = []
+        Route(QUERY, report=timings.append)
+        timing = timings[0]
+        self.assertFalse(timing["cached"])
+        for worker in ("loki", "thor", "odin", "tyr"):
+            self.assertGreater(timing[worker], 0)
+        self.assertLessEqual(timing["loki"] + timing["thor"] + timing["odin"] + timing["tyr"], timing["total"])
+        self.assertGreater(timing["expanded_labels"], 0)
+        self.assertGreater(timing["tiles_loaded"], 0)
+
+        Locate(QUERY, report=timings.append)
+        self.assertEqual((timings[1]["thor"], timings[1]["odin"], timings[1]["expanded_labels"]), (0, 0, 0))
+        self.assertGreater(timings[1]["tyr"], 0)
+
+        timings.clear()
+        RouteMany([QUERY, QUERY], report=timings.append)
+        self.assertEqual(sorted(timing["index"] for timing in timings), [0, 1])
+
+        # the searches of the other actions count their labels too
+        shape = [{"lat": lat, "lon": lon} for lon, lat in decode_polyline(Route(QUERY)['trip']['legs'][0]['shape'])[::5]]
+        timings.clear()
+        Matrix({"sources": QUERY["locations"], "targets": QUERY["locations"], "costing": "bicycle"}, report=timings.append)
+        Isochrone({"locations": QUERY["locations"][:1], "costing": "bicycle", "contours": [{"time": 10}]}, report=timings.append)
+        TraceRoute({"shape": shape, "costing": "bicycle", "shape_match": "map_snap"}, report=timings.append)
+        for timing in timings:
+            self.assertGreater(timing["expanded_labels"], 0)
+
+    def test_zg_metrics(self):
+
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as listener:
+            listener.bind(('127.0.0.1', 0))
+            listener.settimeout(5)
+            c = config.get_default()
+            c['statsd'] = {**c['statsd'], 'host': '127.0.0.1', 'port': listener.getsockname()[1]}
+            Configure(str(self.config_path), str(self.tar_path), c)
+
+            Route(QUERY)
+            with self.assertRaises(RuntimeError):
+                Route({**QUERY, "locations": QUERY["locations"][:1]})
+            received = ''
+            while 'route.error.python.' not in received:
+                received += listener.recv(65536).decode()
+            self.assertIn('route.info.python.requests:1|c', received)
+            self.assertIn('route.info.python.thor.latency_ms:', received)
+            # nothing under the keys of the services
+            self.assertNotIn('route.info.thor.', received)
+            self.assertIn('costing:bicycle', received)
+
+        snapshot = metrics()
+        series = next(s for s in snapshot['requests'] if (s['action'], s['costing']) == ('route', 'bicycle'))
+        self.assertGreaterEqual(series['requests'], 2)
+        self.assertGreaterEqual(sum(series['errors'].values()), 1)
+        self.assertEqual(series['buckets'][-1][1], series['requests'])
+        self.assertGreater(series['thor'], 0)
+        self.assertGreater(snapshot['tile_cache']['bytes'], 0)
+        self.assertIn('hits', snapshot['response_cache'])
+
+    def test_zh_bench(self):
+        from valhalla import bench
+
+        bbox = (5.03, 52.08, 5.15, 52.10)
+        reqs = bench.requests('route', bbox, 5, seed=1)
+        self.assertEqual(reqs, bench.requests('route', bbox, 5, seed=1))
+        self.assertNotEqual(reqs, bench.requests('route', bbox, 5, seed=2))
+
+        result = bench.run('route', reqs, threads=2, cache='response')
+        self.assertEqual(result['requests'], 5)
+        self.assertLessEqual(result['p50'], result['p99'])
+        self.assertGreater(result['rss'], 0)
+        self.assertEqual(response_cache_info()['max_bytes'], 0)
+
+        report = bench.make_report([result], [], bbox, 5, 1)
+        self.assertEqual([c['regression'] for c in bench.compare(report, report)], [False])
+
+    def test_zi_config(self):
+        mtime = os.path.getmtime(self.config_path)
+
+        c = Config.from_file(str(self.config_path))
+        c.apply(verbose=False)
+        route = Route(QUERY)
+
+        # the limits are applied to the running actors
+        c['service_limits']['bicycle']['max_distance'] = 1
+        self.assertFalse(c.apply(verbose=False))
+        with self.assertRaises(RuntimeError) as e:
+            Route(QUERY)
+        self.assertIn('exceeds the max distance limit', str(e.exception))
+
+        c['service_limits']['bicycle']['max_distance'] = config.get_default()['service_limits']['bicycle']['max_distance']
+        self.assertFalse(c.apply(verbose=False))
+        self.assertEqual(Route(QUERY), route)
+
+        # anything else needs new actors
+        self.assertTrue(c.apply(verbose=False, pool_size=2))
+
+        # the limits are applied while more requests than actors keep coming in
+        import threading
+        from concurrent.futures import ThreadPoolExecutor
+
+        stop = threading.Event()
+
+        def route_until_stopped():
+            while not stop.is_set():
+                Route(QUERY)
+
+        with ThreadPoolExecutor(4) as executor:
+            futures = [executor.submit(route_until_stopped) for _ in range(4)]
+            try:
+                self.assertFalse(c.apply(verbose=False))
+            finally:
+                stop.set()
+            for future in futures:
+                future.result()
+
+        c['mjolnir']['max_cache_size'] //= 2
+        self.assertTrue(c.apply(verbose=False))
+        self.assertEqual(Route(QUERY), route)
+
+        self.assertEqual(os.path.getmtime(self.config_path), mtime)
+        with self.assertRaises(ValueError):
+            c.apply(pool_size=0)
+
+    def _large_requests(self):
+        # enough expansion for many interrupt checks, the cache would answer repeated requests
+        set_response_cache(0)
+        Config.from_file(str(self.config_path)).apply(verbose=False, pool_size=1)
+        grid = [{"lat": 52.05 + 0.02 * i, "lon": 5.05 + 0.03 * j} for i in range(5) for j in range(6)]
+        return [
+            (Isochrone, {"locations": [{"lat": 52.09, "lon": 5.12}], "costing": "bicycle", "contours": [{"time": 120}]}),
+            (Matrix, {"sources": grid, "targets": grid, "costing": "auto"}),
+            (Matrix, {"sources": grid[:3], "targets": grid, "costing": "pedestrian"}),
+        ]
+
+    def _errors(self, action, query):
+        # the failed requests the metrics recorded for the action and costing by kind
+        name = {Isochrone: 'isochrone', Matrix: 'sources_to_targets'}[action]
+        series = [s for s in metrics()['requests'] if (s['action'], s['costing']) == (name, query['costing'])]
+        return series[0]['errors'] if series else {}
+
+    def _expanded_labels(self, action, query):
+        timings = []
+        action(query, report=timings.append)
+        return timings[0]['expanded_labels']
+
+    def test_zj_interrupt_search(self):
+        import threading
+        import time
+
+        for action, query in self._large_requests():
+            start = time.monotonic()
+            expanded_labels = self._expanded_labels(action, query)
+            duration = time.monotonic() - start
+            self.assertGreater(expanded_labels, 0)
+
+            # the deadline passes while the graph is expanded and the search stops at its next check
+            timeouts = self._errors(action, query).get('timeout', 0)
+            with self.assertRaises(Timeout):
+                action(query, timeout=duration / 4)
+            self.assertEqual(self._errors(action, query)['timeout'], timeouts + 1)
+
+            token = CancellationToken()
+            threading.Timer(duration / 4, token.cancel).start()
+            interrupted = self._errors(action, query).get('interrupted', 0)
+            with self.assertRaises(Interrupted):
+                action(query, token=token)
+            self.assertEqual(self._errors(action, query)['interrupted'], interrupted + 1)
+
+            # the only actor isn't left with anything of the stopped searches
+            self.assertEqual(self._expanded_labels(action, query), expanded_labels)
+
+    def test_zk_aio_cancel_search(self):
+        import asyncio
+        import time
+        from valhalla import aio
+
+        actions = {Isochrone: aio.Isochrone, Matrix: aio.Matrix}
+        for action, query in self._large_requests():
+            start = time.monotonic()
+            expanded_labels = self._expanded_labels(action, query)
+            duration = time.monotonic() - start
+            interrupted = self._errors(action, query).get('interrupted', 0)
+
+            async def cancelled():
+                task = asyncio.ensure_future(actions[action](query))
+                # well inside the expansion
+                await asyncio.sleep(duration / 4)
+                task.cancel()
+                with self.assertRaises(asyncio.CancelledError):
+                    await task
+
+            asyncio.run(cancelled())
+            # the search in the executor stops at its next check and is recorded as interrupted
+            # rather than finishing, the wait is only bounded so a broken cancel doesn't hang
+            waited = time.monotonic() + 60
+            while self._errors(action, query).get('interrupted', 0) == interrupted and time.monotonic() < waited:
+                time.sleep(0.01)
+            self.assertEqual(self._errors(action, query).get('interrupted', 0), interrupted + 1)
+            self.assertEqual(self._expanded_labels(action, query), expanded_labels)
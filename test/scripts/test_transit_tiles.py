@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / 'scripts'))
+import transit_tiles  # noqa: E402
+
+TILES = transit_tiles.Tiles(2, .25)
+BBOX = (5.1, 52.1, 5.3, 52.2)  # tiles 818660 and 818661
+
+
+def _pair(origin: str, destination: str, trip: str, end: str = '2030-01-01') -> dict:
+    return {'origin_onestop_id': origin, 'destination_onestop_id': destination, 'route_onestop_id': 'r-utrecht',
+            'trip': trip, 'block_id': 'b1', 'service_end_date': end, 'created_at': 'dropped'}
+
+
+# the pages of every endpoint by the min_x of the tile's bbox, the stop s-centraal is in both tiles
+PAGES = {
+    '5.0': {
+        'stops': [[{'onestop_id': 's-centraal', 'created_at': 'dropped'}], [{'onestop_id': 's-vaartsche'}]],
+        'schedule_stop_pairs': [[_pair('s-centraal', 's-vaartsche', 't1'), _pair('s-vaartsche', 's-centraal', 't0', '2010-01-01')]],
+        'routes': [[{'onestop_id': 'r-utrecht', 'geometry': 'dropped'}]],
+    },
+    '5.25': {
+        'stops': [[{'onestop_id': 's-centraal'}, {'onestop_id': 's-bilthoven'}]],
+        'schedule_stop_pairs': [[_pair('s-centraal', 's-bilthoven', 't2')], [_pair('s-bilthoven', 's-centraal', 't1')]],
+        'routes': [[{'onestop_id': 'r-utrecht'}]],
+    },
+}
+
+
+class TransitLandStub(BaseHTTPRequestHandler):
+    """Serves PAGES like the transit.land API, paginated with meta.next links."""
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        query = dict(parse_qsl(parts.query))
+        self.server.requests.append(query)
+        endpoint = parts.path.rsplit('/', 1)[-1]
+        pages = PAGES.get(query['bbox'].split(',')[0], {}).get(endpoint, [[]])
+        page = int(query.get('page', 0))
+        body = {endpoint: pages[page], 'meta': {}}
+        if page + 1 < len(pages):
+            body['meta']['next'] = 'http://{}:{}{}?{}'.format(*self.server.server_address, parts.path,
+                                                               urlencode({**query, 'page': page + 1}))
+        data = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestTransitTiles(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), TransitLandStub)
+        cls.server.requests = []
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.api = 'http://{}:{}/api/v1'.format(*cls.server.server_address)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.server.requests.clear()
+        self.transit_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.transit_dir.cleanup)
+
+    def fetch(self) -> int:
+        client = transit_tiles.Client('secret', timeout=5, retries=0)
+        return transit_tiles.fetch(self.transit_dir.name, TILES, [BBOX], client, self.api, per_page=1,
+                                   workers=2, today=date(2020, 1, 1))
+
+    def read_tile(self, tile_id: int) -> dict:
+        with open(os.path.join(self.transit_dir.name, TILES.file(tile_id))) as f:
+            return json.load(f)
+
+    def test_pagination(self):
+        self.assertEqual(self.fetch(), 2)
+
+        tile = self.read_tile(818660)
+        self.assertEqual([stop['onestop_id'] for stop in tile['stops']], ['s-centraal', 's-vaartsche'])
+        self.assertEqual(len(tile['stops_url']), 2)
+        self.assertTrue(all(url.count('api_key=secret') == 1 for url in tile['stops_url']))
+        self.assertNotIn('created_at', tile['stops'][0])
+        # the pair which ended before today is skipped
+        self.assertEqual([pair['trip'] for pair in tile['schedule_stop_pairs']], ['t1'])
+        self.assertNotIn('geometry', tile['routes'][0])
+
+        tile = self.read_tile(818661)
+        self.assertEqual([pair['trip'] for pair in tile['schedule_stop_pairs']], ['t2', 't1'])
+        self.assertEqual(len(tile['schedule_stop_pairs_url']), 2)
+
+    def test_keys(self):
+        self.fetch()
+        first, second = self.read_tile(818660), self.read_tile(818661)
+
+        # the same onestop id, trip and block get the same key in every tile
+        self.assertEqual(first['stops'][0]['key'], second['stops'][0]['key'])
+        self.assertEqual(first['schedule_stop_pairs'][0]['trip_key'], second['schedule_stop_pairs'][1]['trip_key'])
+        self.assertEqual(first['schedule_stop_pairs'][0]['block_key'], second['schedule_stop_pairs'][0]['block_key'])
+        self.assertEqual(first['routes'][0]['key'], first['schedule_stop_pairs'][0]['route_key'])
+        onestop_keys = {stop['key'] for stop in first['stops'] + second['stops']} | {first['routes'][0]['key']}
+        self.assertEqual(onestop_keys, {1, 2, 3, 4})
+
+        # and the same key in a later run
+        keys = transit_tiles.Keys(os.path.join(self.transit_dir.name, transit_tiles.KEYS_LOG))
+        self.assertEqual(keys('onestop', 's-centraal'), first['stops'][0]['key'])
+        self.assertEqual(keys('trip', 't1'), first['schedule_stop_pairs'][0]['trip_key'])
+        self.assertEqual(keys('onestop', 's-new'), 5)
+
+    def test_resume(self):
+        self.assertEqual(self.fetch(), 2)
+        expected = self.read_tile(818661)
+
+        # nothing left to fetch
+        self.server.requests.clear()
+        self.assertEqual(self.fetch(), 0)
+        self.assertEqual(self.server.requests, [])
+
+        # a crash while the second tile was logged, and while a new key was logged
+        done_path = os.path.join(self.transit_dir.name, transit_tiles.DONE_LOG)
+        keys_path = os.path.join(self.transit_dir.name, transit_tiles.KEYS_LOG)
+        with open(done_path) as f:
+            done = f.read().split()
+        with open(done_path, 'w') as f:
+            f.write('818660\n8186')
+        with open(keys_path, 'a') as f:
+            f.write('onestop\ts-crashed\t1')
+        os.remove(os.path.join(self.transit_dir.name, TILES.file(818661)))
+
+        self.assertEqual(sorted(done), ['818660', '818661'])
+        self.assertEqual(self.fetch(), 1)
+        self.assertEqual({query['bbox'].split(',')[0] for query in self.server.requests}, {'5.25'})
+        self.assertEqual(self.read_tile(818661), expected)
+        with open(done_path) as f:
+            self.assertEqual(f.read().split(), ['818660', '818661'])
+        with open(keys_path) as f:
+            self.assertNotIn('s-crashed', f.read())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -81,6 +81,12 @@ public:
    */
   virtual bool OverCommitted() const = 0;
 
+  /**
+   * Returns the memory the cached tiles take.
+   * @return the size of the cache in bytes
+   */
+  virtual size_t Size() const = 0;
+
   /**
    * Clears the cache.
    */
@@ -139,6 +145,12 @@ public:
    */
   bool OverCommitted() const override;
 
+  /**
+   * Returns the memory the cached tiles take.
+   * @return the size of the cache in bytes
+   */
+  size_t Size() const override;
+
   /**
    * Clears the cache.
    */
@@ -222,6 +234,12 @@ public:
    */
   bool OverCommitted() const override;
 
+  /**
+   * Returns the memory the cached tiles take.
+   * @return the size of the cache in bytes
+   */
+  size_t Size() const override;
+
   /**
    * Clears the cache.
    */
@@ -297,6 +315,12 @@ public:
    */
   bool OverCommitted() const override;
 
+  /**
+   * Returns the memory the cached tiles take.
+   * @return the size of the cache in bytes
+   */
+  size_t Size() const override;
+
   /**
    * Clears the cache.
    */
@@ -398,6 +422,12 @@ public:
    */
   bool OverCommitted() const override;
 
+  /**
+   * Returns the memory the cached tiles take.
+   * @return the size of the cache in bytes
+   */
+  size_t Size() const override;
+
   /**
    * Clears the cache.
    */
@@ -528,6 +558,14 @@ public:
     return cache_->OverCommitted();
   }
 
+  /**
+   * Returns the memory the tiles in the cache take
+   * @return the size of the cache in bytes
+   */
+  size_t GetCacheSize() const {
+    return cache_->Size();
+  }
+
   /**
    * Convenience method to get an opposing directed edge.
    * @param  edgeid  Graph Id of the directed edge.
@@ -84,6 +84,31 @@ public:
                                std::unique_ptr<const GraphMemory>&& memory,
                                std::unique_ptr<const GraphMemory>&& traffic_memory = nullptr);
 
+  /** Decrompresses tile bytes into the internal graphtile byte buffer
+   * @param  graphid         the id of the tile to be decompressed
+   * @param  compressed      the compressed bytes
+   * @param  size            the number of compressed bytes
+   * @param  traffic_memory  the traffic of the tile, if any
+   * @return a pointer to a graphtile if it  has been successfully initialized with
+   *         the uncompressed data, or nullptr
+   */
+  static graph_tile_ptr DecompressTile(const GraphId& graphid,
+                                       const char* compressed,
+                                       size_t size,
+                                       std::unique_ptr<const GraphMemory>&& traffic_memory = nullptr);
+
+  /**
+   * Whether the tile bytes are gzipped. The gzip magic bytes can't start a tile, their graph id
+   * would be on the invalid level 7.
+   * @param  data  the tile bytes
+   * @param  size  the number of tile bytes
+   * @return true if the bytes start with the gzip magic bytes
+   */
+  static bool IsCompressed(const char* data, size_t size) {
+    return size > 2 && static_cast<unsigned char>(data[0]) == 0x1f &&
+           static_cast<unsigned char>(data[1]) == 0x8b;
+  }
+
   /**
    * Constructs a tile given a url for the tile using curl
    * @param  tile_url URL of tile
@@ -820,14 +845,6 @@ protected:
    * @param  graphid  Tile Id.
    */
   void AssociateOneStopIds(const GraphId& graphid);
-
-  /** Decrompresses tile bytes into the internal graphtile byte buffer
-   * @param  graphid     the id of the tile to be decompressed
-   * @param  compressed  the compressed bytes
-   * @return a pointer to a graphtile if it  has been successfully initialized with
-   *         the uncompressed data, or nullptr
-   */
-  static graph_tile_ptr DecompressTile(const GraphId& graphid, const std::vector<char>& compressed);
 };
 
 } // namespace baldr
@@ -36,6 +36,10 @@ public:
 #endif
   virtual void cleanup() override;
 
+  // applies the service_limits, loki.service_defaults and meili.default of the config to the next
+  // requests, the rest of the config is only read when the worker is constructed
+  void configure(const boost::property_tree::ptree& config);
+
   std::string locate(Api& request);
   void route(Api& request);
   void matrix(Api& request);
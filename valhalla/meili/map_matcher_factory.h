@@ -43,6 +43,10 @@ public:
 
   Config MergeConfig(const Options& options) const;
 
+  // replaces the config of the matchers created next with the meili section of root, the
+  // candidate grid keeps the size it was constructed with
+  void Configure(const boost::property_tree::ptree& root);
+
   void ClearFullCache();
 
   void ClearCache();
@@ -248,6 +248,14 @@ public:
     return labels_[label_idx];
   }
 
+  /**
+   * Get the number of labels in the label set.
+   * @return  Returns the number of labels.
+   */
+  size_t size() const {
+    return labels_.size();
+  }
+
   /**
    * Clear the priority queue.
    */
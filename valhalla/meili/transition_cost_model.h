@@ -51,6 +51,11 @@ public:
 
   float operator()(const StateId& lhs, const StateId& rhs) const;
 
+  // the labels of all routes between the states computed so far
+  size_t expanded_labels() const {
+    return expanded_labels_;
+  }
+
 private:
   void UpdateRoute(const StateId& lhs, const StateId& rhs) const;
 
@@ -93,6 +98,8 @@ private:
   float turn_cost_table_[181];
 
   bool match_on_restrictions_{false};
+
+  mutable size_t expanded_labels_{0};
 };
 
 } // namespace meili
@@ -657,7 +657,24 @@ struct tar {
     }
   };
 
-  tar(const std::string& tar_file, bool regular_files_only = true)
+  // an entry of an index file, the offset of a file's data in the archive, its id and its size
+#pragma pack(push, 1)
+  struct tile_index_entry {
+    uint64_t offset;
+    uint32_t tile_id;
+    uint32_t size;
+  };
+#pragma pack(pop)
+
+  // reads the index file the archive starts with instead of scanning the whole archive, it's called
+  // with the first entry's name, data and size and the data and size of the archive and returns
+  // whether it could use the entry as an index. if it couldn't the archive is scanned
+  using index_loader_t =
+      std::function<bool(const std::string&, const char*, size_t, const char*, size_t)>;
+
+  tar(const std::string& tar_file,
+      bool regular_files_only = true,
+      const index_loader_t& from_index = nullptr)
       : tar_file(tar_file), corrupt_blocks(0) {
     // get the file size
     struct stat s;
@@ -690,6 +707,11 @@ struct tar {
         continue;
       }
       auto size = h->get_file_size();
+      // the first entry may be an index of all the others
+      if (from_index && position == mm.get() + sizeof(header_t) &&
+          from_index(std::string{h->name}, position, size, mm.get(), mm.size())) {
+        return;
+      }
       // do we record entry file or not
       if (!regular_files_only || (h->typeflag == '0' || h->typeflag == '\0')) {
         // tar doesn't automatically update path separators based on OS, so we need to do it...
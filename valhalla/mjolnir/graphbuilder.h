@@ -46,6 +46,40 @@ public:
                     const std::string& complex_to_restriction_file,
                     const std::map<baldr::GraphId, size_t>& tiles);
 
+  /**
+   * Reclassify the links and ferry connections, the part of Build which needs the
+   * whole graph. Has to run once before the tiles are built with BuildTiles.
+   * @param  config          properties file
+   * @param  osmdata         OSM data used to build the graph.
+   * @param  ways_file       where the ways are stored
+   * @param  way_nodes_file  where the way nodes are stored
+   * @param  nodes_file      where the node information is stored
+   * @param  edges_file      where the edge information is stored
+   */
+  static void Reclassify(const boost::property_tree::ptree& pt,
+                         const OSMData& osmdata,
+                         const std::string& ways_file,
+                         const std::string& way_nodes_file,
+                         const std::string& nodes_file,
+                         const std::string& edges_file);
+
+  /**
+   * Build the given local tiles after Reclassify. Disjoint sets of tiles can be built
+   * at the same time, e.g. in separate processes.
+   * @param  config  properties file
+   * @param  tiles   the tiles to build with their first node in the nodes file
+   * see Build for the other parameters
+   */
+  static void BuildTiles(const boost::property_tree::ptree& pt,
+                         const OSMData& osmdata,
+                         const std::string& ways_file,
+                         const std::string& way_nodes_file,
+                         const std::string& nodes_file,
+                         const std::string& edges_file,
+                         const std::string& complex_from_restriction_file,
+                         const std::string& complex_to_restriction_file,
+                         const std::map<baldr::GraphId, size_t>& tiles);
+
   static std::map<baldr::GraphId, size_t> BuildEdges(const ptree& conf,
                                                      const std::string& ways_file,
                                                      const std::string& way_nodes_file,
@@ -3,6 +3,9 @@
 
 #include <boost/property_tree/ptree.hpp>
 #include <cstdint>
+#include <vector>
+
+#include <valhalla/baldr/graphid.h>
 #include <valhalla/mjolnir/osmdata.h>
 
 namespace valhalla {
@@ -22,6 +25,19 @@ public:
   static void Enhance(const boost::property_tree::ptree& pt,
                       const OSMData& osmdata,
                       const std::string& access_file);
+
+  /**
+   * Enhance the given local level tiles. Disjoint sets of tiles can be enhanced
+   * at the same time, e.g. in separate processes.
+   * @param pt          property tree containing the hierarchy configuration
+   * @param osmdata     OSM data used to enhance the turn lanes.
+   * @param access_file where to store the nodes so they are not in memory
+   * @param tiles       the local level tiles to enhance
+   */
+  static void Enhance(const boost::property_tree::ptree& pt,
+                      const OSMData& osmdata,
+                      const std::string& access_file,
+                      const std::vector<baldr::GraphId>& tiles);
 };
 
 } // namespace mjolnir
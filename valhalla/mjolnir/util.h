@@ -146,6 +146,41 @@ bool build_tile_set(const ptree& config,
                     const BuildStage end_stage = BuildStage::kValidate,
                     const bool release_osmpbf_memory = true);
 
+struct OSMData;
+
+/**
+ * Prepares the build or the enhance stage to run on parts of the tile set, e.g. in separate
+ * processes. Runs the part of the stage which needs the whole graph and returns the local
+ * tiles, for the build stage with their first node from the tile manifest.
+ * @param config  Used to tell the function where and how to build the tiles
+ * @param stage   BuildStage::kBuild or BuildStage::kEnhance
+ * @return Returns the tiles of the stage which can be split into parts.
+ */
+std::map<baldr::GraphId, size_t> prepare_tile_parts(const ptree& config, const BuildStage stage);
+
+/**
+ * Reads the OSM data the parts of the build or the enhance stage need from the tile directory,
+ * once for any number of parts.
+ * @param config    Used to tell the function where the tiles are built
+ * @param stage     BuildStage::kBuild or BuildStage::kEnhance
+ * @param osm_data  The OSM data to fill
+ * @return Returns true if successful, false if an error occurs.
+ */
+bool read_tile_part_data(const ptree& config, const BuildStage stage, OSMData& osm_data);
+
+/**
+ * Runs the build or the enhance stage on a part of the tiles returned by prepare_tile_parts.
+ * Disjoint parts can run at the same time.
+ * @param config    Used to tell the function where and how to build the tiles
+ * @param stage     BuildStage::kBuild or BuildStage::kEnhance
+ * @param osm_data  The OSM data from read_tile_part_data
+ * @param tiles     The part of the tiles
+ */
+void build_tile_part(const ptree& config,
+                     const BuildStage stage,
+                     const OSMData& osm_data,
+                     const std::map<baldr::GraphId, size_t>& tiles);
+
 // The tile manifest is a JSON-serializable index of tiles to be processed during the build stage of
 // valhalla_build_tiles'. It can be used to distribute shard keys when building tiles with
 // parallelized, distributed batch processing. For example, a workflow orchestrator can partition
@@ -71,6 +71,14 @@ public:
    */
   virtual void Clear() override;
 
+  /**
+   * Returns the number of edge labels the last path computation expanded, until it's cleared
+   * @return the number of edge labels
+   */
+  size_t expanded_labels() const override {
+    return edgelabels_.size();
+  }
+
   /**
    * Set a maximum label count. The path algorithm terminates if this
    * is exceeded.
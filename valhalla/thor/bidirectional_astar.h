@@ -84,6 +84,14 @@ public:
    */
   void Clear() override;
 
+  /**
+   * Returns the number of edge labels the last path computation expanded, until it's cleared
+   * @return the number of edge labels
+   */
+  size_t expanded_labels() const override {
+    return edgelabels_forward_.size() + edgelabels_reverse_.size();
+  }
+
 protected:
   // Access mode used by the costing method
   uint32_t access_mode_;
@@ -2,6 +2,7 @@
 #define VALHALLA_THOR_COSTMATRIX_H_
 
 #include <cstdint>
+#include <functional>
 #include <map>
 #include <memory>
 #include <set>
@@ -15,6 +16,7 @@
 #include <valhalla/sif/dynamiccost.h>
 #include <valhalla/sif/edgelabel.h>
 #include <valhalla/thor/edgestatus.h>
+#include <valhalla/thor/pathalgorithm.h>
 
 namespace valhalla {
 namespace thor {
@@ -119,6 +121,21 @@ public:
    */
   void Clear();
 
+  /**
+   * Set a callback that will throw when the matrix computation should be aborted
+   * @param interrupt_callback  the function to periodically call to see if
+   *                            we should abort
+   */
+  void set_interrupt(const std::function<void()>* interrupt_callback) {
+    interrupt_ = interrupt_callback;
+  }
+
+  /**
+   * Returns the number of edge labels the last matrix computation expanded, until it's cleared
+   * @return the number of edge labels
+   */
+  size_t expanded_labels() const;
+
 protected:
   // Access mode used by the costing method
   uint32_t access_mode_;
@@ -253,6 +270,9 @@ private:
 
   // Mark each target edge with a list of target indexes that have reached it
   std::unique_ptr<TargetMap> targets_;
+
+  // A callback that throws when the caller wants to abort the computation
+  const std::function<void()>* interrupt_;
 };
 
 } // namespace thor
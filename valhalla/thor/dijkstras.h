@@ -2,6 +2,7 @@
 #define VALHALLA_THOR_Dijkstras_H_
 
 #include <cstdint>
+#include <functional>
 #include <map>
 #include <memory>
 #include <unordered_map>
@@ -64,6 +65,23 @@ public:
               const sif::mode_costing_t& costings,
               const sif::TravelMode mode);
 
+  /**
+   * Set a callback that will throw when the expansion should be aborted
+   * @param interrupt_callback  the function to periodically call to see if
+   *                            we should abort
+   */
+  void set_interrupt(const std::function<void()>* interrupt_callback) {
+    interrupt_ = interrupt_callback;
+  }
+
+  /**
+   * Returns the number of edge labels the last expansion expanded, until it's cleared
+   * @return the number of edge labels
+   */
+  size_t expanded_labels() const {
+    return bdedgelabels_.size() + mmedgelabels_.size();
+  }
+
 protected:
   /**
    * Compute the best first graph traversal from a list of origin locations
@@ -144,7 +162,8 @@ protected:
   // separately from the other paths
   bool multipath_;
 
-  // TODO: add an interrupt here so that the caller can abort the main loop externally
+  // A callback that throws when the caller wants to abort the main loop externally
+  const std::function<void()>* interrupt_;
 
   /**
    * Initialization prior to computing the graph expansion
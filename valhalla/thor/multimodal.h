@@ -73,6 +73,14 @@ public:
    */
   void Clear() override;
 
+  /**
+   * Returns the number of edge labels the last path computation expanded, until it's cleared
+   * @return the number of edge labels
+   */
+  size_t expanded_labels() const override {
+    return edgelabels_.size();
+  }
+
 protected:
   // Current walking distance.
   uint32_t walking_distance_;
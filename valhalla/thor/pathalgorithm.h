@@ -75,6 +75,12 @@ public:
    */
   virtual void Clear() = 0;
 
+  /**
+   * Returns the number of edge labels the last path computation expanded, until it's cleared
+   * @return the number of edge labels
+   */
+  virtual size_t expanded_labels() const = 0;
+
   /**
    * Set a callback that will throw when the path computation should be aborted
    * @param interrupt_callback  the function to periodically call to see if
@@ -2,6 +2,7 @@
 #define VALHALLA_THOR_TIMEDISTANCEBSSMATRIX_H_
 
 #include <cstdint>
+#include <functional>
 #include <map>
 #include <memory>
 #include <unordered_map>
@@ -116,6 +117,23 @@ public:
    */
   void Clear();
 
+  /**
+   * Set a callback that will throw when the matrix computation should be aborted
+   * @param interrupt_callback  the function to periodically call to see if
+   *                            we should abort
+   */
+  void set_interrupt(const std::function<void()>* interrupt_callback) {
+    interrupt_ = interrupt_callback;
+  }
+
+  /**
+   * Returns the number of edge labels the last matrix computation expanded
+   * @return the number of edge labels
+   */
+  size_t expanded_labels() const {
+    return expanded_labels_ + edgelabels_.size();
+  }
+
 protected:
   // Number of destinations that have been found and settled (least cost path
   // computed).
@@ -149,6 +167,12 @@ protected:
   // has a vector of indexes into the destinations vector
   std::unordered_map<uint64_t, std::vector<uint32_t>> dest_edges_;
 
+  // The edge labels of the one to many or many to one searches already cleared
+  size_t expanded_labels_;
+
+  // A callback that throws when the caller wants to abort the computation
+  const std::function<void()>* interrupt_;
+
   /**
    * Expand from the node along the forward search path. Immediately expands
    * from the end node of any transition edge (so no transition edges are added
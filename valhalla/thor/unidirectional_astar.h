@@ -61,6 +61,14 @@ public:
    */
   void Clear() override;
 
+  /**
+   * Returns the number of edge labels the last path computation expanded, until it's cleared
+   * @return the number of edge labels
+   */
+  size_t expanded_labels() const override {
+    return edgelabels_.size();
+  }
+
   /**
    * Returns the name of the algorithm
    * @return the name of the algorithm
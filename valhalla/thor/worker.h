@@ -49,6 +49,10 @@ public:
 #endif
   virtual void cleanup() override;
 
+  // applies the service_limits and meili sections of the config to the next requests, the rest of
+  // the config is only read when the worker is constructed
+  void configure(const boost::property_tree::ptree& config);
+
   static std::string offset_date(baldr::GraphReader& reader,
                                  const std::string& in_dt,
                                  const baldr::GraphId& in_edge,
@@ -72,8 +76,10 @@ protected:
                                                     Location& origin,
                                                     Location& destination,
                                                     const std::string& costing,
-                                                    const Options& options);
+                                                    Api& api);
   void log_admin(const TripLeg&);
+  // records the edge labels an algorithm expanded for the request, every pass counts
+  void count_expanded_labels(Api& api, size_t expanded_labels) const;
   thor::PathAlgorithm* get_path_algorithm(const std::string& routetype,
                                           const Location& origin,
                                           const Location& destination,
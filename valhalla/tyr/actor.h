@@ -18,6 +18,9 @@ public:
           baldr::GraphReader& reader,
           bool auto_cleanup = false);
   void cleanup();
+  // applies the service_limits, loki.service_defaults and meili sections of the config to the next
+  // requests without reconstructing the workers, changes to the rest of the config need a new actor
+  void configure(const boost::property_tree::ptree& config);
   std::string route(const std::string& request_str,
                     const std::function<void()>* interrupt = nullptr,
                     Api* api = nullptr);
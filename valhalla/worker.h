@@ -65,6 +65,7 @@ const content_type JSON_MIME{"Content-type", "application/json;charset=utf-8"};
 const content_type JS_MIME{"Content-type", "application/javascript;charset=utf-8"};
 const content_type XML_MIME{"Content-type", "text/xml;charset=utf-8"};
 const content_type GPX_MIME{"Content-type", "application/gpx+xml;charset=utf-8"};
+const content_type PBF_MIME{"Content-type", "application/x-protobuf"};
 } // namespace worker
 
 prime_server::worker_t::result_t
@@ -129,6 +130,16 @@ protected:
    */
   midgard::Finally<std::function<void()>> measure_scope_time(Api& api) const;
 
+  /**
+   * Used to measure the time it takes this worker to serialize the response, recorded as
+   * <action>.info.<worker>.tyr.latency_ms. Only if statsd.serialization_timing is enabled, it's off
+   * by default so that the services don't send the extra series
+   *
+   * @param api  The request object where we store the timing information
+   * @return an object whose destructor records the elapsed time since construction as a stat
+   */
+  midgard::Finally<std::function<void()>> measure_serialization_time(Api& api) const;
+
   /**
    * Signals the start of the worker, sends statsd message if so configured
    */
@@ -136,6 +147,7 @@ protected:
 
   const std::function<void()>* interrupt;
   std::unique_ptr<statsd_client_t> statsd_client;
+  bool serialization_timing;
 };
 } // namespace valhalla
 